@@ -0,0 +1 @@
+"""Offline benchmarks: synthetic or recorded fixtures replayed through local stubs (see run.py)."""
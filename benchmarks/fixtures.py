@@ -0,0 +1,306 @@
+"""
+Deterministic fixtures at production scale.
+
+Everything is generated from a fixed seed, so two runs (and two commits)
+replay byte-identical inputs. `write_fixtures` materialises the file-backed
+ones; a directory of recorded captures with the same file names can be
+passed instead (`run.py --fixtures DIR`) and is used as-is.
+
+Loki is not file-backed: `LokiStream` computes line i on demand, so a
+1M-line stream costs no memory in the stub and counts/pages are exact.
+Recorded captures override the file-backed fixtures only.
+"""
+import hashlib
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+SEED = 20240601
+NS = 1_000_000_000
+
+PODS = 10_000
+EVENTS = 5_000
+NODES = 200
+APPS = 500
+DNS_RECORDS = 5_000
+LOKI_LINES = 1_000_000
+LOKI_WINDOW_S = 25 * 60  # inside a 30m lookback even when a case starts minutes after the stream
+
+ZONE_ID = "0" * 32
+ZONE_NAME = "example.com"
+
+NAMESPACES = ["default", "kube-system", "argocd", "monitoring", "ingress-nginx", "chat", "payments",
+              "search", "batch", "data", "auth", "edge"]
+APPS_PER_NS = ["api", "worker", "web", "cron", "proxy", "cache", "indexer", "gateway"]
+
+FILES = ("pods.json", "pods_wide.txt", "events.json", "top_nodes.txt", "top_pods.txt", "apps.json", "dns_records.json")
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha1("/".join(map(str, parts)).encode()).hexdigest()[:10]
+
+
+def _scaled(n: int, scale: float) -> int:
+    return max(1, int(n * scale))
+
+
+# --- kubernetes -------------------------------------------------------------
+def _container_status(rng: random.Random, name: str, image: str, anomaly: Optional[str]) -> Dict[str, Any]:
+    restarts = rng.choice([0] * 20 + [1, 2, 3])
+    state: Dict[str, Any] = {"running": {"startedAt": "2024-06-01T10:00:00Z"}}
+    last: Dict[str, Any] = {}
+    ready = True
+    if anomaly in ("CrashLoopBackOff", "ImagePullBackOff"):
+        state, ready = {"waiting": {"reason": anomaly, "message": f"back-off restarting {name}"}}, False
+        restarts = rng.randint(5, 300) if anomaly == "CrashLoopBackOff" else 0
+    elif anomaly == "OOMKilled":
+        last = {"terminated": {"reason": "OOMKilled", "exitCode": 137}}
+        restarts = rng.randint(1, 40)
+    elif anomaly == "NotReady":
+        ready = False
+    return {"name": name, "image": image, "imageID": f"docker-pullable://{image}@sha256:{_hash(image) * 6}",
+            "ready": ready, "started": ready, "restartCount": restarts, "state": state, "lastState": last,
+            "containerID": f"containerd://{_hash(name, restarts) * 6}"}
+
+
+def pods(n: int = PODS) -> Dict[str, Any]:
+    """A `kubectl get pods -A -o json` list with ~3% anomalies of the usual kinds."""
+    rng = random.Random(SEED)
+    items = []
+    for i in range(n):
+        ns = NAMESPACES[i % len(NAMESPACES)]
+        app = f"{APPS_PER_NS[(i // len(NAMESPACES)) % len(APPS_PER_NS)]}-{(i // 96) % 20}"
+        pth = _hash(ns, app)[:9]
+        name = f"{app}-{pth}-{_hash(i)[:5]}"
+        roll = rng.random()
+        anomaly = (
+            "CrashLoopBackOff" if roll < 0.01 else "ImagePullBackOff" if roll < 0.013 else
+            "OOMKilled" if roll < 0.017 else "NotReady" if roll < 0.022 else "Pending" if roll < 0.027 else None
+        )
+        phase = "Pending" if anomaly == "Pending" else "Succeeded" if app.startswith("cron") and roll > 0.9 else "Running"
+        node = f"node-{rng.randrange(NODES):03d}"
+        image = f"registry.example.com/{ns}/{app.rsplit('-', 1)[0]}:1.{i % 7}.{i % 13}"
+        containers = [{"name": "main", "image": image,
+                       "resources": {"requests": {"cpu": "100m", "memory": "128Mi"}, "limits": {"memory": "512Mi"}}}]
+        if i % 4 == 0:
+            containers.append({"name": "istio-proxy", "image": "docker.io/istio/proxyv2:1.22.1",
+                               "resources": {"requests": {"cpu": "10m", "memory": "40Mi"}}})
+        statuses = [] if phase == "Pending" else [
+            _container_status(rng, c["name"], c["image"], anomaly if c["name"] == "main" else None) for c in containers
+        ]
+        items.append({
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {
+                "name": name, "namespace": ns, "uid": _hash("uid", i) * 3,
+                "creationTimestamp": "2024-06-01T09:58:00Z", "resourceVersion": str(100000 + i),
+                "labels": {"app": app, "pod-template-hash": pth, "team": ns},
+                "annotations": {"kubectl.kubernetes.io/restartedAt": "2024-05-30T12:00:00Z"},
+                "ownerReferences": [{"apiVersion": "apps/v1", "kind": "ReplicaSet", "name": f"{app}-{pth}",
+                                     "uid": _hash("rs", ns, app) * 3, "controller": True}],
+            },
+            "spec": {"nodeName": "" if phase == "Pending" else node, "containers": containers,
+                     "serviceAccountName": "default", "restartPolicy": "Always"},
+            "status": {
+                "phase": phase,
+                "conditions": [{"type": t, "status": "False" if anomaly and t == "Ready" else "True"}
+                               for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")],
+                "hostIP": "" if phase == "Pending" else f"10.0.{int(node[-3:]) // 250}.{int(node[-3:]) % 250}",
+                "podIP": "" if phase == "Pending" else f"10.{100 + i // 65000}.{(i // 250) % 256}.{i % 250}",
+                "startTime": "2024-06-01T09:58:01Z",
+                "containerStatuses": statuses,
+            },
+        })
+    return {"apiVersion": "v1", "kind": "List", "items": items, "metadata": {"resourceVersion": ""}}
+
+
+def pods_wide(data: Dict[str, Any]) -> str:
+    """`kubectl get pods -A -o wide --no-headers` for the same pods."""
+    from auto_k8s_pilot.tools.kube_printers import pod_ready, pod_restarts, pod_status
+
+    lines = []
+    for p in data["items"]:
+        lines.append(" ".join([
+            p["metadata"]["namespace"], p["metadata"]["name"], pod_ready(p), pod_status(p), str(pod_restarts(p)), "2d",
+            p["status"].get("podIP") or "<none>", p["spec"].get("nodeName") or "<none>", "<none>", "<none>",
+        ]))
+    return "\n".join(lines) + "\n"
+
+
+def events(n: int = EVENTS) -> Dict[str, Any]:
+    rng = random.Random(SEED + 1)
+    warnings = [("BackOff", "Back-off restarting failed container main"),
+                ("FailedScheduling", "0/200 nodes are available: 200 Insufficient memory."),
+                ("Unhealthy", "Readiness probe failed: HTTP probe failed with statuscode: 503"),
+                ("FailedMount", "MountVolume.SetUp failed for volume \"config\": configmap not found")]
+    normals = ["Scheduled", "Pulled", "Created", "Started", "Killing", "SuccessfulCreate"]
+    items = []
+    for i in range(n):
+        ns = NAMESPACES[i % len(NAMESPACES)]
+        warn = rng.random() < 0.2
+        reason, message = rng.choice(warnings) if warn else (rng.choice(normals), "normal lifecycle event")
+        pod = f"{APPS_PER_NS[i % len(APPS_PER_NS)]}-{i % 20}-{_hash(ns)[:9]}-{_hash(i)[:5]}"
+        items.append({
+            "apiVersion": "v1", "kind": "Event", "type": "Warning" if warn else "Normal",
+            "metadata": {"name": f"{pod}.{_hash('ev', i)}", "namespace": ns},
+            "involvedObject": {"kind": "Pod", "name": pod, "namespace": ns},
+            "reason": reason, "message": message, "count": rng.randint(1, 50),
+            "lastTimestamp": f"2024-06-01T10:{i % 60:02d}:{(i * 7) % 60:02d}Z",
+            "source": {"component": "kubelet"},
+        })
+    return {"apiVersion": "v1", "kind": "List", "items": items}
+
+
+def top_nodes(n: int = NODES) -> str:
+    rng = random.Random(SEED + 2)
+    lines = ["NAME       CPU(cores)   CPU%   MEMORY(bytes)   MEMORY%"]
+    lines += [f"node-{i:03d}   {rng.randint(200, 7800)}m   {rng.randint(3, 98)}%   "
+              f"{rng.randint(2000, 30000)}Mi   {rng.randint(10, 95)}%" for i in range(n)]
+    return "\n".join(lines) + "\n"
+
+
+def top_pods(n: int) -> str:
+    rng = random.Random(SEED + 3)
+    lines = ["NAME   CPU(cores)   MEMORY(bytes)"]
+    lines += [f"api-{i % 20}-{_hash(i)[:9]}-{_hash('p', i)[:5]}   {rng.randint(1, 900)}m   {rng.randint(20, 900)}Mi"
+              for i in range(n)]
+    return "\n".join(lines) + "\n"
+
+
+# --- argo cd ------------------------------------------------------------------
+def apps(n: int = APPS) -> Dict[str, Any]:
+    """An Argo CD application list, about 8% out of sync or degraded."""
+    rng = random.Random(SEED + 4)
+    items = []
+    for i in range(n):
+        name = "chat-api" if i == 0 else f"{NAMESPACES[i % len(NAMESPACES)]}-{APPS_PER_NS[i % len(APPS_PER_NS)]}-{i}"
+        roll = rng.random()
+        sync = "OutOfSync" if roll < 0.05 else "Synced"
+        health = "Degraded" if 0.05 <= roll < 0.08 else "Progressing" if roll > 0.98 else "Healthy"
+        phase = "Failed" if roll < 0.01 else "Succeeded"
+        items.append({
+            "metadata": {"name": name, "namespace": "argocd", "labels": {"team": NAMESPACES[i % len(NAMESPACES)]}},
+            "spec": {
+                "project": NAMESPACES[i % 4],
+                "source": {"repoURL": "https://git.example.com/platform/deploy.git",
+                           "path": f"apps/{name}", "targetRevision": "main"},
+                "destination": {"server": "https://kubernetes.default.svc", "namespace": NAMESPACES[i % len(NAMESPACES)]},
+            },
+            "status": {
+                "sync": {"status": sync, "revision": _hash("rev", i) * 4},
+                "health": {"status": health},
+                "operationState": {"phase": phase, "message": "successfully synced (all tasks run)"
+                                   if phase == "Succeeded" else "one or more objects failed to apply"},
+                "resources": [{"kind": k, "name": f"{name}-{k.lower()}", "status": sync, "health": {"status": health}}
+                              for k in ("Deployment", "Service", "ConfigMap", "Ingress", "ServiceAccount")],
+            },
+        })
+    return {"items": items, "metadata": {}}
+
+
+# --- cloudflare -----------------------------------------------------------------
+def dns_records(n: int = DNS_RECORDS) -> List[Dict[str, Any]]:
+    rng = random.Random(SEED + 5)
+    out = [{"id": _hash("dns", "api") * 3, "type": "A", "name": f"api.{ZONE_NAME}", "content": "203.0.113.10",
+            "proxied": True, "ttl": 1}]
+    for i in range(1, n):
+        kind = rng.choice(["A", "A", "A", "AAAA", "CNAME", "TXT"])
+        name = f"svc-{i}.{NAMESPACES[i % len(NAMESPACES)]}.{ZONE_NAME}"
+        content = {
+            "A": f"203.0.{113 + i // 250 % 3}.{i % 250}",
+            "AAAA": f"2001:db8::{i:x}",
+            "CNAME": f"lb-{i % 7}.{ZONE_NAME}",
+            "TXT": f"\"v=spf1 include:_spf.{ZONE_NAME} ~all {i}\"",
+        }[kind]
+        out.append({"id": _hash("dns", i) * 3, "type": kind, "name": name, "content": content,
+                    "proxied": kind in ("A", "AAAA", "CNAME") and i % 3 == 0, "ttl": 1 if i % 3 == 0 else 300})
+    return out
+
+
+# --- loki ----------------------------------------------------------------------------
+TEMPLATES = [
+    # (weight out of 40, template); fields are filled from the line index
+    (1, "ERROR db timeout after {ms}ms pool=primary conn={conn}"),
+    (1, "ERROR upstream 502 from payments-{pod}.payments.svc: bad gateway"),
+    (16, "INFO HTTP GET /api/v1/chat/{id} 200 {ms}ms"),
+    (8, "INFO HTTP POST /api/v1/messages 201 {ms}ms"),
+    (2, "WARN HTTP GET /api/v1/search 429 {ms}ms rate limited user={id}"),
+    (4, "WARN retrying upstream search-{pod} attempt={attempt}"),
+    (8, "DEBUG cache hit key=session:{id}"),
+]
+SLOTS = [t for w, t in TEMPLATES for _ in range(w)]
+PODS_PER_APP = 8
+
+
+class LokiStream:
+    """A chat-api log stream of `n` lines spread evenly over the last `window_s` seconds before `end_ns`."""
+
+    def __init__(self, n: int = LOKI_LINES, end_ns: int = 0, window_s: int = LOKI_WINDOW_S):
+        self.n = n
+        self.end_ns = end_ns
+        self.step = max(1, window_s * NS // n)
+        self.start_ns = end_ns - self.step * n
+
+    def ts(self, i: int) -> int:
+        return self.start_ns + (i + 1) * self.step
+
+    def labels(self, i: int) -> Dict[str, str]:
+        return {"app": "chat-api", "namespace": "chat", "pod": f"chat-api-{i % PODS_PER_APP}"}
+
+    def line(self, i: int) -> str:
+        return SLOTS[i % len(SLOTS)].format(
+            ms=(i * 37) % 2000, conn=i % 64, pod=i % 5, id=(i * 2654435761) % 10_000_019, attempt=1 + i % 3,
+        )
+
+    def index_range(self, start_ns: int, end_ns: int) -> Tuple[int, int]:
+        """Line indexes with start <= ts <= end (Loki's query_range bounds)."""
+        lo = max(0, -(-(start_ns - self.start_ns) // self.step) - 1)
+        hi = min(self.n, (end_ns - self.start_ns) // self.step)
+        return lo, max(lo, hi)
+
+    def _slots(self, contains: List[str]) -> Set[int]:
+        """Template slots whose text carries every `|=` filter; other lines can be skipped arithmetically."""
+        return {s for s, t in enumerate(SLOTS) if all(c in t for c in contains)}
+
+    def select(self, start_ns: int, end_ns: int, contains: List[str], pod: Optional[int] = None,
+               backward: bool = False) -> Iterator[int]:
+        """Indexes of matching lines in [start, end], oldest first unless `backward`."""
+        lo, hi = self.index_range(start_ns, end_ns)
+        slots = self._slots(contains)
+        for i in (range(hi - 1, lo - 1, -1) if backward else range(lo, hi)):
+            if i % len(SLOTS) in slots and (pod is None or i % PODS_PER_APP == pod):
+                yield i
+
+    def count(self, start_ns: int, end_ns: int, contains: List[str]) -> Dict[str, int]:
+        """Matching lines per pod in (start, end], without walking them one by one."""
+        lo, hi = self.index_range(start_ns + 1, end_ns)
+        slots = self._slots(contains)
+        # slot and pod both repeat with this period, so whole periods contribute equally
+        period = len(SLOTS) * PODS_PER_APP // math.gcd(len(SLOTS), PODS_PER_APP)
+        full, rest = divmod(hi - lo, period)
+        counts: Dict[str, int] = {}
+        for offset in range(min(period, hi - lo)):
+            i = lo + offset
+            if i % len(SLOTS) in slots:
+                pod = f"chat-api-{i % PODS_PER_APP}"
+                counts[pod] = counts.get(pod, 0) + full + (offset < rest)
+        return counts
+
+
+# --- files ---------------------------------------------------------------------------------
+def write_fixtures(target: Path, scale: float = 1.0) -> Path:
+    """Generate the file-backed fixtures into `target` (skipped when they already exist)."""
+    target.mkdir(parents=True, exist_ok=True)
+    if all((target / f).exists() for f in FILES):
+        return target
+    pod_list = pods(_scaled(PODS, scale))
+    (target / "pods.json").write_text(json.dumps(pod_list))
+    (target / "pods_wide.txt").write_text(pods_wide(pod_list))
+    (target / "events.json").write_text(json.dumps(events(_scaled(EVENTS, scale))))
+    (target / "top_nodes.txt").write_text(top_nodes(_scaled(NODES, scale)))
+    (target / "top_pods.txt").write_text(top_pods(_scaled(300, scale)))
+    (target / "apps.json").write_text(json.dumps(apps(_scaled(APPS, scale))))
+    (target / "dns_records.json").write_text(json.dumps(dns_records(_scaled(DNS_RECORDS, scale))))
+    return target
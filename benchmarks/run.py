@@ -0,0 +1,308 @@
+"""
+Offline benchmark runner.
+
+    python -m benchmarks.run                    # every case at full scale, appended to results.jsonl
+    python -m benchmarks.run --only loki,flow   # a subset (prefix match on case names)
+    python -m benchmarks.run --scale 0.05       # quick run on 5% fixtures (compared only with 0.05 runs)
+
+Each case runs in a fresh interpreter against the local stubs, so peak RSS
+is per case and nothing is warm from a previous one. The first call of a
+case is reported as `cold_s`, the median of all calls as `seconds`. Results
+are appended to the history file and compared with the last record at the
+same scale; `--fail-on-regression` turns a slowdown, RSS growth or token
+growth beyond the threshold into a non-zero exit.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_RESULTS = ROOT / "benchmarks" / "results.jsonl"
+DEFAULT_FIXTURES = ROOT / "benchmarks" / ".fixtures"
+FLOW = "flow-infra-health"
+
+# case -> (tool class, arguments); `flow` runs flow-infra-health end to end
+CASES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "kubectl.pods.json": ("kubectl_tool:KubectlTool",
+                          {"action": "get", "kind": "pods", "namespace": "all", "output": "json"}),
+    "kubectl.pods.compact": ("kubectl_tool:KubectlTool",
+                             {"action": "get", "kind": "pods", "namespace": "all", "output": "compact"}),
+    "kubectl.pods.digest": ("kubectl_tool:KubectlTool",
+                            {"action": "get", "kind": "pods", "namespace": "all", "output": "digest"}),
+    "kubectl.pods.wide": ("kubectl_tool:KubectlTool",
+                          {"action": "get", "kind": "pods", "namespace": "all", "output": "wide"}),
+    "kubectl.events.digest": ("kubectl_tool:KubectlTool",
+                              {"action": "get", "kind": "events", "namespace": "all", "output": "digest"}),
+    "kubectl.top.nodes": ("kubectl_tool:KubectlTool", {"action": "top", "kind": "nodes", "namespace": "all"}),
+    "argocd.list_apps": ("argocd_tool:ArgoCDTool", {"op": "list_apps"}),
+    "argocd.fleet_status": ("argocd_tool:ArgoCDTool", {"op": "fleet_status"}),
+    "argocd.app_status": ("argocd_tool:ArgoCDTool", {"op": "app_status", "app": "chat-api"}),
+    "loki.lines": ("loki_tool:LokiQueryTool", {"query": '{app="chat-api"} |= "HTTP"', "minutes": 30, "limit": 200}),
+    "loki.count": ("loki_tool:LokiQueryTool",
+                   {"query": '{app="chat-api"} |= "ERROR"', "minutes": 30, "mode": "count"}),
+    "loki.patterns": ("loki_tool:LokiQueryTool",
+                      {"query": '{app="chat-api"}', "minutes": 30, "mode": "patterns", "limit": -1}),
+    "cloudflare.list": ("cloudflare_dns_tool:CloudflareDNSTool", {"op": "list"}),
+    "cloudflare.get": ("cloudflare_dns_tool:CloudflareDNSTool", {"op": "get", "name": "api"}),
+    "openrouter.models": ("openrouter_health_tool:OpenRouterHealthTool", {"op": "models"}),
+    "flow.infra-health": ("", {}),
+}
+
+# metric -> absolute change below which a relative jump is noise
+COMPARED = {"seconds": 0.05, "peak_rss_mb": 5.0, "output_tokens_est": 50, "prompt_tokens": 200}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- child side --------------------------------------------------------------------
+def _tool_case(name: str, repeat: int, loki_lines: int) -> Dict[str, Any]:
+    import importlib
+
+    spec, args = CASES[name]
+    module, cls = spec.split(":")
+    tool = getattr(importlib.import_module(f"auto_k8s_pilot.tools.{module}"), cls)()
+    if args.get("limit") == -1:
+        args = {**args, "limit": loki_lines}  # scan the whole stream
+    base_rss = _peak_rss_mb()
+
+    times, out = [], ""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = tool.run(**args)
+        times.append(time.perf_counter() - t0)
+    return {
+        "ok": not str(out).startswith("ERROR"),
+        "seconds": round(statistics.median(times), 4),
+        "cold_s": round(times[0], 4),
+        "min_s": round(min(times), 4),
+        "max_s": round(max(times), 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - base_rss, 1),
+        "output_chars": len(str(out)),
+        "output_tokens_est": len(str(out)) // 4,
+        "head": str(out)[:160],
+    }
+
+
+def _flow_case(repeat: int) -> Dict[str, Any]:
+    from auto_k8s_pilot.flow import FlowExecutor
+    from auto_k8s_pilot.telemetry import recording
+
+    inputs = {"namespace": "all", "current_year": str(dt.date.today().year)}
+    base_rss = _peak_rss_mb()
+    times, runs, results = [], [], []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        with recording(f"bench-{i}") as run:
+            results.append(FlowExecutor().run(FLOW, inputs=inputs))
+        times.append(time.perf_counter() - t0)
+        runs.append(run)
+
+    last, run = results[-1], runs[-1]
+    llm, tools = run.of("llm"), run.of("tool")
+    chars = sum(len(o.raw or "") for o in last.outputs.values())
+    return {
+        "ok": last.ok,
+        "seconds": round(statistics.median(times), 4),
+        "cold_s": round(times[0], 4),
+        "min_s": round(min(times), 4),
+        "max_s": round(max(times), 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - base_rss, 1),
+        "output_chars": chars,
+        "output_tokens_est": chars // 4,
+        "llm_calls": len(llm),
+        "prompt_tokens": sum(t.prompt_tokens for t in llm),
+        "completion_tokens": sum(t.completion_tokens for t in llm),
+        "tool_calls": len(tools),
+        "tool_seconds": round(sum(t.seconds for t in tools), 4),
+        "tasks": {sid: round(s, 4) for sid, s in sorted(last.timings.items())},
+        "errors": last.errors,
+    }
+
+
+def child(name: str, repeat: int, loki_lines: int) -> None:
+    result = _flow_case(repeat) if name == "flow.infra-health" else _tool_case(name, repeat, loki_lines)
+    print("BENCH_RESULT " + json.dumps(result))
+
+
+# --- parent side -------------------------------------------------------------------
+def _env(stub_url: str, bin_dir: Path, workdir: Path) -> Dict[str, str]:
+    from benchmarks.fixtures import ZONE_ID
+
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("OPENAI_", "ARGOCD_", "LOKI_", "CLOUDFLARE_"))}
+    env.update({
+        "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), str(ROOT)]),
+        "PATH": os.pathsep.join([str(bin_dir), env.get("PATH", "")]),
+        "KUBECONFIG": str(workdir / "kubeconfig"),
+        "KUBECTL_BACKEND": "subprocess",
+        "KUBECTL_TIMEOUT": "120",
+        "ARGOCD_BASE_URL": stub_url,
+        "ARGOCD_API_TOKEN": "bench",
+        "ARGOCD_CACHE_ENABLED": "false",
+        "LOKI_URL": stub_url,
+        "LOKI_CURSOR_FILE": str(workdir / "loki_cursors.json"),
+        "CLOUDFLARE_API_URL": f"{stub_url}/client/v4",
+        "CLOUDFLARE_API_TOKEN": "bench",
+        "CLOUDFLARE_ZONE_ID": ZONE_ID,
+        "OPENROUTER_BASE_URL": f"{stub_url}/api/v1",
+        "MCP_K8S_CMD": "mcp-server-kubernetes",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_API_BASE": f"{stub_url}/v1",
+        "OPENAI_BASE_URL": f"{stub_url}/v1",
+        "GITHUB_TOKEN": "",
+        # measure the work, not a warm cache
+        "TOOL_CACHE_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "false",
+        "TELEMETRY_DIR": str(workdir),
+        # nothing leaves the machine
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "CREWAI_TRACING_ENABLED": "false",
+        "OTEL_SDK_DISABLED": "true",
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+    })
+    return env
+
+
+def run_case(name: str, env: Dict[str, str], workdir: Path, repeat: int, loki_lines: int,
+             timeout: int) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "benchmarks.run", "--child", name, "--repeat", str(repeat),
+           "--loki-lines", str(loki_lines)]
+    t0 = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"ok": False, "error": f"timed out after {timeout}s"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("BENCH_RESULT "):
+            result = json.loads(line[len("BENCH_RESULT "):])
+            result["process_s"] = round(time.perf_counter() - t0, 3)
+            return result
+    return {"ok": False, "error": f"exit {proc.returncode}: {(proc.stderr or proc.stdout).strip()[-800:]}"}
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+    except Exception:
+        return ""
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def compare(current: Dict[str, Any], previous: Optional[Dict[str, Any]], threshold: float) -> List[str]:
+    """One line per case; changes past `threshold` (and past the metric's noise floor) are REGRESSION."""
+    lines = []
+    prev = (previous or {}).get("results", {})
+    for name, res in current["results"].items():
+        if not res.get("ok"):
+            lines.append(f"FAILED      {name}: {res.get('error') or res.get('errors') or res.get('head')}")
+            continue
+        parts, regressed = [], False
+        for metric, floor in COMPARED.items():
+            if metric not in res:
+                continue
+            now, before = res[metric], (prev.get(name) or {}).get(metric)
+            if before is None:
+                parts.append(f"{metric}={now}")
+                continue
+            delta = now - before
+            rel = delta / before if before else 0.0
+            bad = rel > threshold and delta > floor
+            regressed |= bad
+            parts.append(f"{metric}={now} ({rel:+.0%})" + (" !" if bad else ""))
+        lines.append(f"{'REGRESSION' if regressed else 'ok':<11} {name}: " + ", ".join(parts))
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", help="comma-separated case name prefixes, e.g. kubectl,loki.count")
+    parser.add_argument("--scale", type=float, default=1.0, help="fixture size factor (1.0 = 10k pods, 1M log lines)")
+    parser.add_argument("--repeat", type=int, default=3, help="calls per case (the flow runs once per repeat)")
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded fixtures to replay instead")
+    parser.add_argument("--results", type=Path, default=DEFAULT_RESULTS, help="JSONL history to append to")
+    parser.add_argument("--no-save", action="store_true", help="compare only, do not append to the history")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--timeout", type=int, default=600, help="seconds per case")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--loki-lines", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.repeat, args.loki_lines)
+        return 0
+
+    sys.path.insert(0, str(ROOT / "src"))
+    from benchmarks.fixtures import LOKI_LINES, write_fixtures
+    from benchmarks.stubs import StubServer, write_fake_kubectl
+
+    names = [n for n in CASES if not args.only or any(n.startswith(p.strip()) for p in args.only.split(","))]
+    if not names:
+        parser.error(f"no case matches {args.only!r}; cases: {', '.join(CASES)}")
+    fixtures = args.fixtures or write_fixtures(DEFAULT_FIXTURES / f"scale-{args.scale:g}", args.scale)
+    loki_lines = max(1, int(LOKI_LINES * args.scale))
+
+    record: Dict[str, Any] = {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "date": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {os.cpu_count()} cpu",
+        "scale": args.scale,
+        "fixtures": "recorded" if args.fixtures else "synthetic",
+        "repeat": args.repeat,
+        "results": {},
+    }
+    stub = StubServer(fixtures, loki_lines)
+    try:
+        with tempfile.TemporaryDirectory(prefix="autok8s-bench-") as tmp:
+            workdir = Path(tmp)
+            (workdir / "kubeconfig").write_text("apiVersion: v1\nkind: Config\n")
+            write_fake_kubectl(workdir / "bin", fixtures)
+            env = _env(stub.url, workdir / "bin", workdir)
+            for name in names:
+                stub.reanchor()
+                res = run_case(name, env, workdir, args.repeat, loki_lines, args.timeout)
+                record["results"][name] = res
+                status = f"{res['seconds']:.3f}s, {res['peak_rss_mb']} MB" if res.get("ok") else "FAILED"
+                print(f"{name:<24} {status}", flush=True)
+    finally:
+        stub.close()
+
+    history = load_history(args.results)
+    previous = next((r for r in reversed(history) if r.get("scale") == args.scale), None)
+    if previous:
+        print(f"\nvs {previous['commit']}{' (dirty)' if previous.get('dirty') else ''} from {previous['date']}:")
+    report = compare(record, previous, args.threshold)
+    print("\n".join(report))
+    if not args.no_save:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with args.results.open("a") as f:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+        print(f"Results appended to {args.results}")
+    failed = any(line.startswith("FAILED") for line in report)
+    regressed = args.fail_on_regression and any(line.startswith("REGRESSION") for line in report)
+    return 1 if failed or regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Local stand-ins for everything the tools talk to.
+
+One threaded HTTP server answers the Argo CD, Loki, Cloudflare and
+OpenRouter routes the tools call, plus an OpenAI-compatible
+`/v1/chat/completions` that plays a scripted ReAct agent: for each task it
+issues the tool calls the task description asks for, then returns the last
+observation as the final answer. `write_fake_kubectl` puts a `kubectl` on
+PATH that prints the file fixtures.
+"""
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.fixtures import NS, ZONE_ID, ZONE_NAME, LokiStream
+
+Response = Tuple[int, Any]
+
+# --- scripted agent ---------------------------------------------------------
+# (substring of the task description, [(tool, arguments), ...]); first match wins
+SCRIPT: List[Tuple[str, List[Tuple[str, Dict[str, Any]]]]] = [
+    ('action="top", kind="nodes"', [("kubectl_tool", {"action": "top", "kind": "nodes", "namespace": "all"})]),
+    ('action="top", kind="pods"', [("kubectl_tool", {"action": "top", "kind": "pods", "namespace": "default"})]),
+    ('kind="pods", output="digest"',
+     [("kubectl_tool", {"action": "get", "kind": "pods", "output": "digest", "namespace": "all"})]),
+    ('kind="events", output="digest"',
+     [("kubectl_tool", {"action": "get", "kind": "events", "output": "digest", "namespace": "all"})]),
+    ('op="list_apps"', [("argocd_tool", {"op": "list_apps"})]),
+    ('op="app_status"', [("argocd_tool", {"op": "app_status", "app": "chat-api"})]),
+    ('mode="count"', [
+        ("loki_query", {"query": '{app="chat-api"} |= "ERROR"', "minutes": 30, "mode": "count"}),
+        ("loki_query", {"query": '{app="chat-api"} |= "ERROR"', "minutes": 30, "mode": "patterns", "limit": 20000}),
+    ]),
+    ("activity glimpse", [("loki_query", {"query": '{app="chat-api"} |= "HTTP"', "minutes": 30, "limit": 200})]),
+    ('op="list"', [("cloudflare_dns_tool", {"op": "list"})]),
+    ('op="get", name="api"', [("cloudflare_dns_tool", {"op": "get", "name": "api"})]),
+    ('op="models"', [("openrouter_health_tool", {"op": "models"})]),
+    ('op="env_check"', [("mcp_k8s_tool", {"op": "env_check"}), ("mcp_k8s_tool", {"op": "config_snippet"})]),
+]
+CONTEXT_MARKER = "This is the context you're working with"
+
+
+def _task_text(messages: List[Dict[str, Any]]) -> str:
+    """The current task's own description, without the upstream outputs crewAI appends to it."""
+    user = next((m.get("content") or "" for m in messages if m.get("role") == "user"), "")
+    if not isinstance(user, str):
+        user = json.dumps(user)
+    return user.split(CONTEXT_MARKER, 1)[0]
+
+
+def agent_reply(messages: List[Dict[str, Any]]) -> str:
+    """Next ReAct turn: a scripted Action, or the final answer once the script is used up."""
+    task = _task_text(messages)
+    calls = next((c for key, c in SCRIPT if key in task), [])
+    turns = [m for m in messages if m.get("role") == "assistant"]
+    if len(turns) < len(calls):
+        tool, args = calls[len(turns)]
+        return f"Thought: I should call {tool}.\nAction: {tool}\nAction Input: {json.dumps(args)}"
+    answer = "No incident filed"
+    if turns:
+        last = turns[-1].get("content") or ""
+        answer = last.split("\nObservation:", 1)[-1].strip() or answer
+    return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+
+def _chat_completion(body: Dict[str, Any]) -> Response:
+    messages = body.get("messages") or []
+    text = agent_reply(messages)
+    prompt_chars = sum(len(m.get("content") or "") if isinstance(m.get("content"), str)
+                       else len(json.dumps(m.get("content"))) for m in messages)
+    usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(text) // 4}
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    return 200, {
+        "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model") or "stub",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+# --- loki -------------------------------------------------------------------------
+SELECTOR = re.compile(r"\{([^}]*)\}")
+MATCHER = re.compile(r'(\w+)\s*=\s*"([^"]*)"')
+LINE_FILTER = re.compile(r'\|=\s*"((?:[^"\\]|\\.)*)"')
+RANGE = re.compile(r"\[(\d+)s\]")
+SUM_BY = re.compile(r"sum by \(([^)]*)\)")
+
+
+def _parse_logql(query: str) -> Tuple[Dict[str, str], List[str]]:
+    selector = SELECTOR.search(query)
+    labels = dict(MATCHER.findall(selector.group(1))) if selector else {}
+    return labels, [f.replace('\\"', '"') for f in LINE_FILTER.findall(query)]
+
+
+def _stream_matches(stream: LokiStream, labels: Dict[str, str]) -> Tuple[bool, Optional[int]]:
+    """Whether the selector can match the chat-api stream, and the pod it narrows to."""
+    sample = stream.labels(0)
+    for k, v in labels.items():
+        if k != "pod" and sample.get(k) != v:
+            return False, None
+    if "pod" in labels:
+        suffix = labels["pod"].rsplit("-", 1)[-1]
+        if not labels["pod"].startswith("chat-api-") or not suffix.isdigit():
+            return False, None
+        return True, int(suffix)
+    return True, None
+
+
+# --- server -------------------------------------------------------------------------
+class StubServer:
+    """
+    Argo CD, Loki, Cloudflare, OpenRouter and chat-completions stubs on one port.
+
+    Fixture payloads are loaded once and served from memory, so the server
+    side adds as little as possible to the measured latency. `loki` can be
+    replaced between cases to re-anchor the stream at the current time.
+    """
+
+    def __init__(self, fixtures: Path, loki_lines: int):
+        self.apps_raw = (fixtures / "apps.json").read_bytes()
+        self.apps = {a["metadata"]["name"]: a for a in json.loads(self.apps_raw)["items"]}
+        self.records = json.loads((fixtures / "dns_records.json").read_text())
+        self.loki_lines = loki_lines
+        self.loki = LokiStream(loki_lines, end_ns=time.time_ns())
+        self.requests = 0
+        routes: List[Tuple[str, re.Pattern, Callable[..., Response]]] = [
+            ("GET", re.compile(r"/api/v1/applications"), self._argo_list),
+            ("GET", re.compile(r"/api/v1/applications/([^/]+)"), self._argo_app),
+            ("GET", re.compile(r"/loki/api/v1/query_range"), self._loki_range),
+            ("GET", re.compile(r"/loki/api/v1/query"), self._loki_instant),
+            ("GET", re.compile(r"/client/v4/zones/([^/]+)"), self._cf_zone),
+            ("GET", re.compile(r"/client/v4/zones/([^/]+)/dns_records"), self._cf_records),
+            ("GET", re.compile(r"/api/v1/models"), self._models),
+            ("POST", re.compile(r"/v1/chat/completions"), lambda q, body: _chat_completion(body or {})),
+        ]
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                u = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                query = {k: v[0] for k, v in parse_qs(u.query).items()}
+                server.requests += 1
+                for method, pattern, handler in routes:
+                    m = pattern.fullmatch(u.path)
+                    if method == self.command and m:
+                        status, payload = handler(query, json.loads(raw) if raw else None, *m.groups())
+                        break
+                else:
+                    status, payload = 404, {"message": f"{u.path} not found"}
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def reanchor(self) -> None:
+        """Make the Loki stream end now, so a 30-minute lookback sees all of it."""
+        self.loki = LokiStream(self.loki_lines, end_ns=time.time_ns())
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # argo cd: field projection is ignored, the full documents are served
+    def _argo_list(self, query, body) -> Response:
+        return 200, self.apps_raw
+
+    def _argo_app(self, query, body, name) -> Response:
+        app = self.apps.get(name)
+        return (200, app) if app else (404, {"error": f"application {name} not found", "code": 5})
+
+    # loki
+    def _loki_range(self, query, body) -> Response:
+        labels, contains = _parse_logql(query.get("query", ""))
+        ok, pod = _stream_matches(self.loki, labels)
+        limit = int(query.get("limit", 100))
+        end = int(query.get("end", time.time_ns()))
+        start = int(query.get("start", end - 3600 * NS))
+        backward = query.get("direction", "backward") == "backward"
+        per_pod: Dict[int, List[List[str]]] = {}
+        if ok:
+            for n, i in enumerate(self.loki.select(start, end, contains, pod, backward)):
+                if n >= limit:
+                    break
+                per_pod.setdefault(i % 8, []).append([str(self.loki.ts(i)), self.loki.line(i)])
+        result = [{"stream": self.loki.labels(p), "values": v} for p, v in sorted(per_pod.items())]
+        return 200, {"status": "success", "data": {"resultType": "streams", "result": result}}
+
+    def _loki_instant(self, query, body) -> Response:
+        q = query.get("query", "")
+        labels, contains = _parse_logql(q)
+        ok, pod = _stream_matches(self.loki, labels)
+        at = int(query.get("time", time.time_ns()))
+        window = RANGE.search(q)
+        counts = self.loki.count(at - int(window.group(1)) * NS, at, contains) if ok and window else {}
+        by = SUM_BY.search(q)
+        series: Dict[Tuple[Tuple[str, str], ...], int] = {}
+        for pod_name, n in counts.items():
+            if pod is not None and pod_name != f"chat-api-{pod}":
+                continue
+            metric = self.loki.labels(int(pod_name.rsplit("-", 1)[1]))
+            if by:
+                keep = [k.strip() for k in by.group(1).split(",")]
+                metric = {k: v for k, v in metric.items() if k in keep}
+            key = tuple(sorted(metric.items()))
+            series[key] = series.get(key, 0) + n
+        result = [{"metric": dict(k), "value": [at / NS, str(n)]} for k, n in series.items() if n]
+        return 200, {"status": "success", "data": {"resultType": "vector", "result": result}}
+
+    # cloudflare
+    def _cf_zone(self, query, body, zone) -> Response:
+        if zone != ZONE_ID:
+            return 404, {"success": False, "errors": [{"code": 1001, "message": "zone not found"}]}
+        return 200, {"success": True, "result": {"id": ZONE_ID, "name": ZONE_NAME}}
+
+    def _cf_records(self, query, body, zone) -> Response:
+        per_page = int(query.get("per_page", 100))
+        page = int(query.get("page", 1))
+        chunk = self.records[(page - 1) * per_page: page * per_page]
+        pages = max(1, -(-len(self.records) // per_page))
+        return 200, {"success": True, "result": chunk,
+                     "result_info": {"page": page, "per_page": per_page, "count": len(chunk),
+                                     "total_count": len(self.records), "total_pages": pages}}
+
+    # openrouter
+    def _models(self, query, body) -> Response:
+        return 200, {"data": [{"id": f"vendor-{i % 12}/model-{i}", "context_length": 8192 * (1 + i % 16)}
+                              for i in range(320)]}
+
+
+# --- kubectl --------------------------------------------------------------------------
+FAKE_KUBECTL = '''#!{python}
+"""kubectl stand-in for benchmarks: prints recorded/synthetic fixtures."""
+import shutil
+import sys
+
+FIXTURES = {fixtures!r}
+VALUED = {{"-o", "-l", "-c", "-n", "--tail", "--field-selector", "--context", "--kubeconfig"}}
+FILES = {{
+    ("get", "pods", "json"): "pods.json",
+    ("get", "pods", "wide"): "pods_wide.txt",
+    ("get", "events", "json"): "events.json",
+    ("top", "nodes", None): "top_nodes.txt",
+    ("top", "pods", None): "top_pods.txt",
+}}
+
+args, output, i = [], None, 1
+while i < len(sys.argv):
+    a = sys.argv[i]
+    if a in VALUED:
+        output = sys.argv[i + 1] if a == "-o" else output
+        i += 2
+        continue
+    if not a.startswith("-"):
+        args.append(a)
+    i += 1
+
+verb, kind = (args + [None, None])[:2]
+name = FILES.get((verb, kind, output if verb == "get" else None))
+if name is None:
+    sys.stderr.write(f"error: the server doesn't have a resource type \\"{{kind}}\\"\\n")
+    sys.exit(1)
+try:
+    with open(f"{{FIXTURES}}/{{name}}", "rb") as f:
+        shutil.copyfileobj(f, sys.stdout.buffer, 65536)
+    sys.stdout.flush()
+except BrokenPipeError:  # the tool stops reading once its output budget is full
+    pass
+'''
+
+
+def write_fake_kubectl(bin_dir: Path, fixtures: Path) -> Path:
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    path = bin_dir / "kubectl"
+    path.write_text(FAKE_KUBECTL.format(python=sys.executable, fixtures=str(fixtures.resolve())))
+    path.chmod(0o755)
+    return path
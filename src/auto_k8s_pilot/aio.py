@@ -0,0 +1,88 @@
+"""
+Shared asyncio runtime for the tools' `_arun` implementations.
+
+One event loop runs on a daemon thread for the whole process. Blocking work
+(the pooled `requests` sessions, the Kubernetes API client) is offloaded to
+one bounded thread pool, so async calls keep using the same connection
+pools, retries, circuit breakers and result cache as the sync path.
+`run_sync` drives a coroutine on that loop from sync code, and
+`gather_calls` runs several tool calls at the same time, e.g. `top nodes`
+and `top pods` together.
+
+Tools whose I/O is the pooled sync HTTP client mix in `OffloadedTool`:
+their `_arun` runs `_run` on the pool rather than reimplementing it on the
+loop, so retries, the circuit breaker and the result cache stay in one place.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from auto_k8s_pilot.settings import get_settings
+
+T = TypeVar("T")
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_POOL: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide loop, started on first use."""
+    global _LOOP, _POOL
+    with _LOCK:
+        if _LOOP is None:
+            _POOL = ThreadPoolExecutor(max_workers=get_settings().ASYNC_IO_WORKERS, thread_name_prefix="aio-io")
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(_POOL)
+            threading.Thread(target=loop.run_forever, name="aio-loop", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+
+async def offload(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on the shared I/O pool, in the caller's context (current run and span)."""
+    loop = asyncio.get_running_loop()
+    executor = _POOL if loop is _LOOP else None
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Sync shim: run `coro` on the shared loop and wait for the result."""
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the shared loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+class OffloadedTool:
+    """Mixin (before `BaseTool`) for tools with only a blocking `_run`: `_arun` offloads it."""
+
+    async def _arun(self, **kwargs: Any) -> Any:
+        return await offload(self._run, **kwargs)
+
+
+def gather_calls(calls: Iterable[Tuple[Any, Dict[str, Any]]]) -> List[str]:
+    """
+    Run `(tool, kwargs)` pairs concurrently through each tool's `_arun` (the
+    pool for tools without one); failures come back as ERROR strings.
+    """
+    calls = list(calls)
+
+    def start(tool: Any, kwargs: Dict[str, Any]) -> Awaitable[Any]:
+        arun = getattr(tool, "_arun", None)
+        return arun(**kwargs) if arun is not None else offload(tool._run, **kwargs)
+
+    async def run_all() -> List[str]:
+        results = await asyncio.gather(*(start(tool, kwargs) for tool, kwargs in calls), return_exceptions=True)
+        return [f"ERROR: {r}" if isinstance(r, BaseException) else r for r in results]
+
+    return run_sync(run_all())
@@ -1,23 +1,60 @@
-from pathlib import Path
+import threading
+from typing import Any, Callable, Dict, List
 
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
 
-from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
-from auto_k8s_pilot.tools.argocd_tool import ArgoCDTool
-from auto_k8s_pilot.tools.loki_tool import LokiQueryTool
-from auto_k8s_pilot.tools.github_issue_tool import GitHubIssueTool
-from auto_k8s_pilot.tools.cloudflare_dns_tool import CloudflareDNSTool
-from auto_k8s_pilot.tools.openrouter_health_tool import OpenRouterHealthTool
-from auto_k8s_pilot.tools.mcp_k8s_tool import MCPK8sTool
+from auto_k8s_pilot.llm_cache import MemoTask, agent_llm
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-OUTPUT_DIR = PROJECT_ROOT / "output"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+class _LazyTaskConfig(dict):
+    """tasks.yaml entries whose agent, context and tools are resolved on first lookup."""
 
+    def __init__(self, data: Dict[str, Any], resolve: Callable[[str, Dict[str, Any]], None]):
+        super().__init__(data)
+        self._resolve = resolve
+        self._pending = set(data)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name: str) -> Any:
+        with self._lock:
+            if name in self._pending:
+                self._pending.discard(name)
+                self._resolve(name, super().__getitem__(name))
+        return super().__getitem__(name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self[name] if name in self else default
+
+
+def lazy_tasks(crew_cls):
+    """
+    Defer CrewBase's task mapping to the first time a task is built.
+
+    CrewBase resolves every task's agent (and with it the agent's tools) in
+    its constructor. With this, building the crew costs nothing and running
+    one flow only constructs the agents and tools its steps reference.
+    It overrides CrewBase internals, which tests/test_flow.py pins.
+    """
+
+    class LazyCrew(crew_cls):
+        def map_all_task_variables(self) -> None:
+            functions = self._get_all_functions()
+            lookups = [
+                self._filter_functions(functions, kind)
+                for kind in ("is_agent", "is_task", "is_output_json", "is_tool", "is_callback", "is_output_pydantic")
+            ]
+            self.tasks_config = _LazyTaskConfig(
+                self.tasks_config, lambda name, info: self._map_task_variables(name, info, *lookups)
+            )
+
+    LazyCrew.__name__ = LazyCrew.__qualname__ = crew_cls.__name__
+    LazyCrew.__doc__ = crew_cls.__doc__
+    return LazyCrew
+
+
+@lazy_tasks
 @CrewBase
 class AutoK8sPilot:
     """AutoK8sPilot crew"""
@@ -29,13 +66,17 @@ class AutoK8sPilot:
     def reporting_analyst(self) -> Agent:
         return Agent(
             config=self.agents_config['reporting_analyst'],
+            llm=agent_llm(self.agents_config['reporting_analyst']),
             verbose=True,
         )
 
     @agent
     def k8s_operator(self) -> Agent:
+        from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
+
         return Agent(
             config=self.agents_config['k8s_operator'],
+            llm=agent_llm(self.agents_config['k8s_operator']),
             verbose=True,
             tools=[KubectlTool()],
         )
@@ -44,53 +85,72 @@ class AutoK8sPilot:
     def infra_architect(self) -> Agent:
         return Agent(
             config=self.agents_config['infra_architect'],
+            llm=agent_llm(self.agents_config['infra_architect']),
             verbose=True,
         )
 
     @agent
     def argocd_observer(self) -> Agent:
+        from auto_k8s_pilot.tools.argocd_tool import ArgoCDTool
+
         return Agent(
             config=self.agents_config['argocd_observer'],
+            llm=agent_llm(self.agents_config['argocd_observer']),
             verbose=True,
             tools=[ArgoCDTool()],
         )
 
     @agent
     def loki_analyst(self) -> Agent:
+        from auto_k8s_pilot.tools.loki_tool import LokiQueryTool
+
         return Agent(
             config=self.agents_config['loki_analyst'],
+            llm=agent_llm(self.agents_config['loki_analyst']),
             verbose=True,
             tools=[LokiQueryTool()],
         )
 
     @agent
     def incident_triager(self) -> Agent:
+        from auto_k8s_pilot.tools.github_issue_tool import GitHubIssueTool
+
         return Agent(
             config=self.agents_config['incident_triager'],
+            llm=agent_llm(self.agents_config['incident_triager']),
             verbose=True,
             tools=[GitHubIssueTool()],
         )
 
     @agent
     def cloudflare_admin(self) -> Agent:
+        from auto_k8s_pilot.tools.cloudflare_dns_tool import CloudflareDNSTool
+
         return Agent(
             config=self.agents_config['cloudflare_admin'],
+            llm=agent_llm(self.agents_config['cloudflare_admin']),
             verbose=True,
             tools=[CloudflareDNSTool()],
         )
 
     @agent
     def llm_gateway_observer(self) -> Agent:
+        from auto_k8s_pilot.tools.openrouter_health_tool import OpenRouterHealthTool
+
         return Agent(
             config=self.agents_config['llm_gateway_observer'],
+            llm=agent_llm(self.agents_config['llm_gateway_observer']),
             verbose=True,
             tools=[OpenRouterHealthTool()],
         )
 
     @agent
     def mcp_bridge(self) -> Agent:
+        from auto_k8s_pilot.tools.mcp_k8s_tool import MCPK8sTool
+
         return Agent(
             config=self.agents_config['mcp_bridge'],
+            llm=agent_llm(self.agents_config['mcp_bridge']),
             verbose=True,
             tools=[MCPK8sTool()],
         )
@@ -104,14 +164,14 @@ class AutoK8sPilot:
 
     @task
     def explain_pods(self) -> Task:
-        return Task(
+        return MemoTask(
             config=self.tasks_config['explain_pods'],
             output_file="output/pods_explained.md",
         )
 
     @task
     def cluster_summary(self) -> Task:
-        return Task(
+        return MemoTask(
             config=self.tasks_config['cluster_summary'],
             output_file="output/cluster_summary.md",
         )
@@ -186,6 +246,13 @@ class AutoK8sPilot:
             output_file="output/dns_api_record.md",
         )
 
+    @task
+    def dns_audit_cluster(self) -> Task:
+        return Task(
+            config=self.tasks_config['dns_audit_cluster'],
+            output_file="output/dns_audit.md",
+        )
+
     @task
     def dns_upsert_record_api(self) -> Task:
         return Task(
@@ -0,0 +1,201 @@
+"""
+Resident service: keeps the tools, HTTP pools and caches warm and runs
+flow layers on per-flow intervals (config/schedule.yaml). Each run builds
+its own crew, since agents and tasks keep per-run state and flows overlap.
+
+A flow never overlaps with itself: a tick or trigger that finds it still
+running is skipped. A small local HTTP endpoint lists flow status and
+starts a flow on demand:
+
+    GET  /flows                 status of every scheduled flow
+    POST /flows/<flow>/run      start a flow now (202, or 409 if running)
+    GET  /metrics               run, task, tool and LLM metrics (Prometheus text)
+    GET  /healthz
+
+Settings are re-read on SIGHUP and whenever `.env` changes.
+"""
+import json
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from auto_k8s_pilot.flow import LAYERS_DIR, FlowExecutor
+from auto_k8s_pilot.rules import SEVERITIES, summarize
+from auto_k8s_pilot.settings import get_settings, reload_if_changed, reload_settings
+from auto_k8s_pilot.telemetry import install, recording, render_metrics
+
+SCHEDULE_FILE = Path(__file__).resolve().parent / "config" / "schedule.yaml"
+
+
+def load_schedule(path: Path = SCHEDULE_FILE) -> Dict[str, int]:
+    """Map flow name -> interval in seconds (0 = on demand only)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return {name: int((spec or {}).get("every") or 0) for name, spec in (data.get("flows") or {}).items()}
+
+
+@dataclass
+class FlowState:
+    every: int
+    next_due: float
+    running: bool = False
+    runs: int = 0
+    skipped: int = 0
+    last_started: Optional[str] = None
+    last_duration: Optional[float] = None
+    last_ok: Optional[bool] = None
+    last_errors: Dict[str, str] = field(default_factory=dict)
+    last_skipped_steps: List[str] = field(default_factory=list)  # steps whose `when:` was false
+    last_findings: Dict[str, int] = field(default_factory=dict)  # rule findings per severity
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "every": self.every, "running": self.running, "runs": self.runs, "skipped": self.skipped,
+            "last_started": self.last_started, "last_duration": self.last_duration,
+            "last_ok": self.last_ok, "last_errors": self.last_errors, "last_skipped_steps": self.last_skipped_steps,
+            "last_findings": self.last_findings,
+            "next_in": round(max(0.0, self.next_due - time.monotonic()), 1) if self.every else None,
+        }
+
+
+class Daemon:
+    def __init__(
+        self,
+        executor: Any = None,
+        schedule: Optional[Dict[str, int]] = None,
+        inputs: Optional[Dict[str, Any]] = None,
+    ):
+        self.executor = executor  # None: a fresh FlowExecutor (and crew) per run
+        self.inputs = inputs or {"namespace": "all", "current_year": str(datetime.now().year)}
+        now = time.monotonic()
+        self.flows: Dict[str, FlowState] = {
+            name: FlowState(every=every, next_due=now) for name, every in (schedule or load_schedule()).items()
+        }
+        # HTTP handler threads add on-demand flows while the service loop iterates
+        self._flows_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        if get_settings().TELEMETRY_ENABLED:
+            install()  # subscribe the run instrumentation before the first flow starts
+
+    # --- running flows ------------------------------------------------------
+    def trigger(self, flow: str, wait: bool = False) -> str:
+        """Start `flow` unless it is already running. Returns "started", "running" or "unknown"."""
+        with self._flows_lock:
+            state = self.flows.get(flow)
+            if state is None:
+                if not (LAYERS_DIR / f"{flow}.yaml").exists():
+                    return "unknown"
+                state = self.flows.setdefault(flow, FlowState(every=0, next_due=float("inf")))
+        if not state.lock.acquire(blocking=False):
+            state.skipped += 1
+            return "running"
+        state.running = True
+        if wait:
+            self._run(flow, state)
+        else:
+            threading.Thread(target=self._run, args=(flow, state), name=f"flow-{flow}", daemon=True).start()
+        return "started"
+
+    def _run(self, flow: str, state: FlowState) -> None:
+        t0 = time.monotonic()
+        state.last_started = datetime.now().isoformat(timespec="seconds")
+        try:
+            with recording(flow):
+                result = (self.executor or FlowExecutor()).run(flow, inputs=dict(self.inputs))
+            state.last_ok, state.last_errors = result.ok, dict(result.errors)
+            state.last_skipped_steps = list(result.skipped)
+            found = summarize(result.all_findings())
+            state.last_findings = {s: found[s] for s in SEVERITIES}
+        except Exception as e:
+            state.last_ok, state.last_errors = False, {"flow": str(e)}
+        finally:
+            state.last_duration = round(time.monotonic() - t0, 2)
+            state.runs += 1
+            state.running = False
+            state.lock.release()
+
+    def tick(self) -> float:
+        """Start every due flow; return seconds until the next one is due."""
+        now = time.monotonic()
+        with self._flows_lock:
+            flows = list(self.flows.items())
+        for name, state in flows:
+            if state.every and now >= state.next_due:
+                # schedule from the planned time so intervals don't drift with run length
+                state.next_due = max(state.next_due + state.every, now)
+                self.trigger(name)
+        due = [s.next_due for _, s in flows if s.every]
+        return max(0.0, min(due) - time.monotonic()) if due else 60.0
+
+    def status(self) -> Dict[str, Any]:
+        with self._flows_lock:
+            flows = list(self.flows.items())
+        return {name: state.as_dict() for name, state in flows}
+
+    # --- service loop -------------------------------------------------------
+    def serve_http(self, host: str, port: int) -> ThreadingHTTPServer:
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: Any, content_type: str = "application/json") -> None:
+                data = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/healthz":
+                    self._send(200, {"ok": True})
+                elif self.path == "/flows":
+                    self._send(200, daemon.status())
+                elif self.path == "/metrics":
+                    self._send(200, render_metrics(), "text/plain; version=0.0.4")
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 3 or parts[0] != "flows" or parts[2] != "run":
+                    self._send(404, {"error": "not found"})
+                    return
+                outcome = daemon.trigger(parts[1])
+                status = {"started": 202, "running": 409, "unknown": 404}[outcome]
+                self._send(status, {"flow": parts[1], "status": outcome})
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._httpd.serve_forever, name="daemon-http", daemon=True).start()
+        return self._httpd
+
+    def run_forever(self, host: Optional[str] = None, port: Optional[int] = None) -> None:
+        settings = get_settings()
+        if (port if port is not None else settings.DAEMON_PORT) > 0:
+            self.serve_http(host or settings.DAEMON_HOST, port if port is not None else settings.DAEMON_PORT)
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda *_: reload_settings())
+        try:
+            while not self._stop.is_set():
+                reload_if_changed()
+                self._stop.wait(min(self.tick(), 30.0))
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
@@ -0,0 +1,303 @@
+"""
+Structured facts from tool results, and the `when:` conditions of flow steps.
+
+Tool outputs have stable headers ("Pods: N total | ...", "App: x\\nSync: ..",
+"Matches: N ...", "DNS audit: ..."), so each one is parsed back into a
+small dict once per step. The text is cut to the output budget, so tools
+whose lists can overflow it (pod and event groups, fleet rows, log
+sources, Loki templates) return a `Reported` string that carries the full
+lists too, and those take the place of what the text still shows. Conditions are Python expressions over those
+facts, compiled once when the flow is planned and checked against a
+whitelist of AST nodes:
+
+    when: k8s_pods_overview.anomalies > 0 or argocd_app_status_chat_api.health != "Healthy"
+
+`<step>.<fact>` reads a fact of an earlier step, `inputs.<name>` a flow
+input (None when not given) and `findings.<severity>` the rule findings
+of the steps it waits for (see rules.py). A condition that needs a fact its step did
+not produce (failed, skipped, or an unrecognized output) is undecided and
+the step runs: a condition only ever skips work on positive evidence.
+"""
+import ast
+import re
+from typing import Any, Dict, List, Optional, Set
+
+INT = r"(\d+)"
+COUNTS = re.compile(r"([A-Za-z_][\w-]*) (\d+)")
+PODS_HEAD = re.compile(rf"^Pods: {INT} total")
+ANOMALIES = re.compile(rf"^Anomalies: {INT} pods in {INT} groups", re.MULTILINE)
+POD_GROUP = re.compile(r"^- \[([^\]]+)\] ([^/\s]+)/(\S+): (\d+) pod\(s\)(?:, restarts max (\d+))?", re.MULTILINE)
+EVENTS_HEAD = re.compile(rf"^Events: {INT} total")
+WARNING_GROUPS = re.compile(rf"^Warning groups: {INT}", re.MULTILINE)
+EVENT_GROUP = re.compile(r"^- \[([^\]]+)\] ([^/\s]+)/(\S+) x(\d+)(?: \(.*?\): (.*))?$", re.MULTILINE)
+APP_STATUS = re.compile(r"^App: (\S+)\nSync: (\S+)\nHealth: (\S+)")
+FLEET_HEAD = re.compile(rf"^Apps: {INT} total")
+NEEDS_ATTENTION = re.compile(rf"^Needs attention: {INT}", re.MULTILINE)
+MORE_TOTAL = re.compile(rf"\.\.\. \d+ more \({INT} total\)")
+MATCHES = re.compile(rf"^Matches: {INT}( \(exact)?", re.MULTILINE)
+STREAMS = re.compile(rf"^Streams: {INT}", re.MULTILINE)
+SCANNED = re.compile(rf"^Scanned: {INT} lines", re.MULTILINE)
+TEMPLATES = re.compile(rf"\| templates: {INT}")
+TEMPLATE = re.compile(r"^- x(\d+) (?:\[[^\]]*\] )?(.*)$", re.MULTILINE)
+RECORDS = re.compile(rf"^Records: {INT}")
+RECORD = re.compile(r"^(\S+) (\S+) (.*) proxied=(\S+) ttl=(\S+)(?: id=(\S+))?$")
+AUDIT = re.compile(rf"^DNS audit: {INT} records, {INT} cluster hosts \| missing {INT} \| "
+                   rf"wrong_target {INT} \| dangling {INT}")
+MODELS = re.compile(rf"^Models:{INT}")
+POD_LOGS = re.compile(rf"^Logs: {INT} pods, {INT} containers")
+LOG_SOURCE = re.compile(r"^- ([^/\s]+)/([^/\s]+)/(\S+): errors (\d+) \| warnings (\d+) \| matched (\d+) of (\d+)$",
+                        re.MULTILINE)
+
+
+class Reported(str):
+    """Tool output text plus the complete lists it was rendered from (the text may end in "... N more")."""
+
+    facts: Dict[str, Any]
+
+    def __new__(cls, text: str, facts: Dict[str, Any]):
+        obj = super().__new__(cls, text)
+        obj.facts = facts
+        return obj
+
+
+def _counts(line: str, skip: int = 1) -> Dict[str, int]:
+    """`Pods: 12 total | Running 10 | Pending 2` -> {"Running": 10, "Pending": 2}."""
+    return {k: int(v) for part in line.split(" | ")[skip:] for k, v in COUNTS.findall(part)}
+
+
+def _grouped(groups: List[Dict[str, Any]], count: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for g in groups:
+        out[g["reason"]] = out.get(g["reason"], 0) + g[count]
+    return out
+
+
+def _pod_groups(text: str) -> List[Dict[str, Any]]:
+    """`- [CrashLoopBackOff] chat/deployment/chat-api: 2 pod(s), restarts max 40; ...` lines."""
+    return [{"reason": r, "namespace": ns, "owner": owner, "pods": int(n), "restarts": int(rs or 0)}
+            for r, ns, owner, n, rs in POD_GROUP.findall(text)]
+
+
+def _event_groups(text: str) -> List[Dict[str, Any]]:
+    """`- [BackOff] chat/pod/chat-api-1 x12 (last ...): message` lines."""
+    return [{"reason": r, "namespace": ns, "object": obj, "count": int(n), "message": msg}
+            for r, ns, obj, n, msg in EVENT_GROUP.findall(text)]
+
+
+def _fleet_rows(text: str) -> List[Dict[str, Any]]:
+    """The NAME PROJECT SYNC HEALTH OPERATION MESSAGE table of apps that need attention."""
+    lines = text.split("\n")
+    start = next((i for i, line in enumerate(lines) if line.split()[:2] == ["NAME", "PROJECT"]), None)
+    rows = []
+    for line in lines[start + 1:] if start is not None else []:
+        cols = line.split(None, 5)
+        if len(cols) < 5 or line.startswith("..."):
+            break
+        app, project, sync, health, operation = cols[:5]
+        rows.append({"app": app, "project": project, "sync": sync, "health": health,
+                     "operation": operation, "message": cols[5] if len(cols) > 5 else ""})
+    return rows
+
+
+def parse_facts(text: str) -> Dict[str, Any]:
+    """
+    Facts from one tool output. Every result has `ok` and `chars`; the rest
+    depends on the output shape (unrecognized text only gets `lines`).
+    """
+    full = getattr(text, "facts", None) or {}
+    text = (text or "").strip()
+    facts: Dict[str, Any] = {"ok": not text.startswith("ERROR"), "chars": len(text)}
+    if not facts["ok"]:
+        facts["error"] = text[:500]
+        return facts
+    first = text.split("\n", 1)[0]
+
+    if PODS_HEAD.match(first):
+        m = ANOMALIES.search(text)
+        groups = full.get("groups", _pod_groups(text))
+        facts.update(kind="pods", pods=int(PODS_HEAD.match(first).group(1)), phases=_counts(first),
+                     anomalies=int(m.group(1)) if m else 0, anomaly_groups=int(m.group(2)) if m else 0,
+                     reasons=_grouped(groups, "pods"), groups=groups)
+    elif EVENTS_HEAD.match(first):
+        types = _counts(first)
+        m = WARNING_GROUPS.search(text)
+        groups = full.get("groups", _event_groups(text))
+        facts.update(kind="events", events=int(EVENTS_HEAD.match(first).group(1)), warnings=types.get("Warning", 0),
+                     warning_groups=int(m.group(1)) if m else 0, reasons=_grouped(groups, "count"), groups=groups)
+    elif APP_STATUS.match(text):
+        app, sync, health = APP_STATUS.match(text).groups()
+        facts.update(kind="argo_app", app=app, sync=sync, health=health,
+                     healthy=sync == "Synced" and health == "Healthy")
+    elif FLEET_HEAD.match(first):
+        m = NEEDS_ATTENTION.search(text)
+        health = text.split("\n")[1] if "\n" in text else ""
+        facts.update(kind="argo_fleet", apps=int(FLEET_HEAD.match(first).group(1)), sync=_counts(first),
+                     health=_counts(health, skip=0), needs_attention=int(m.group(1)) if m else 0,
+                     attention=full.get("attention", _fleet_rows(text)))
+    elif first == "Apps:":
+        m = MORE_TOTAL.search(text)
+        facts.update(kind="argo_apps", apps=int(m.group(1)) if m else len(text.split("\n")) - 1)
+    elif MATCHES.match(first) or SCANNED.match(first):
+        # a step may run count and patterns queries back to back; keep what each reported
+        facts["kind"] = "loki"
+        m = MATCHES.search(text)
+        if m:
+            facts.update(matches=int(m.group(1)), exact=bool(m.group(2)), capped="limit" in first)
+        if STREAMS.search(text):
+            facts["streams"] = int(STREAMS.search(text).group(1))
+        if SCANNED.search(text):
+            facts["scanned"] = int(SCANNED.search(text).group(1))
+            t = TEMPLATES.search(text)
+            facts["templates"] = int(t.group(1)) if t else 0
+            facts["patterns"] = full.get("patterns", [{"count": int(n), "template": tpl}
+                                                     for n, tpl in TEMPLATE.findall(text)])
+    elif RECORDS.match(first):
+        facts.update(kind="dns_records", records=int(RECORDS.match(first).group(1)))
+    elif first == "NOT FOUND":
+        facts.update(kind="dns_record", found=False)
+    elif RECORD.match(first):
+        type_, name, content, proxied, ttl, rid = RECORD.match(first).groups()
+        facts.update(kind="dns_record", found=True, type=type_, name=name, content=content,
+                     proxied=proxied == "True", ttl=int(ttl) if ttl.isdigit() else ttl, id=rid,
+                     count=len(text.split("\n")))
+    elif AUDIT.match(first):
+        records, hosts, missing, wrong, dangling = map(int, AUDIT.match(first).groups())
+        facts.update(kind="dns_audit", records=records, hosts=hosts, missing=missing, wrong_target=wrong,
+                     dangling=dangling, findings=missing + wrong + dangling)
+    elif MODELS.match(first):
+        facts.update(kind="models", models=int(MODELS.match(first).group(1)))
+    elif POD_LOGS.match(first):
+        pods, containers = map(int, POD_LOGS.match(first).groups())
+        sources = full.get("sources", [
+            {"namespace": ns, "pod": pod, "container": c, "errors": int(e), "warnings": int(w),
+             "matched": int(m), "lines": int(n)} for ns, pod, c, e, w, m, n in LOG_SOURCE.findall(text)])
+        facts.update(kind="pod_logs", pods=pods, containers=containers, **_counts(first), sources=sources)
+    else:
+        facts["lines"] = len(text.split("\n"))
+    return facts
+
+
+def merge_facts(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Facts of a step that made several tool calls: later keys win, `ok` only if every call was."""
+    merged: Dict[str, Any] = {}
+    for p in parts:
+        merged.update(p)
+    merged["ok"] = all(p.get("ok", True) for p in parts)
+    merged["chars"] = sum(p.get("chars", 0) for p in parts)
+    return merged
+
+
+# --- conditions -------------------------------------------------------------------
+ALLOWED = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.Compare,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.BinOp, ast.Add, ast.Sub, ast.Name, ast.Attribute, ast.Subscript, ast.Constant,
+    ast.List, ast.Tuple, ast.Load,
+)
+
+
+RESERVED = ("inputs", "findings", "True", "False", "None")
+
+
+class Undecided(Exception):
+    """A condition needs a fact that is not there."""
+
+
+class Condition:
+    """A compiled `when:` expression."""
+
+    def __init__(self, source: str):
+        self.source = " ".join(str(source).split())
+        try:
+            tree = ast.parse(self.source, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"invalid when: {self.source!r} ({e.msg})") from None
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED):
+                raise ValueError(f"invalid when: {self.source!r} ({type(node).__name__} is not allowed)")
+        self.steps: Set[str] = {
+            n.id for n in ast.walk(tree) if isinstance(n, ast.Name) and n.id not in RESERVED
+        }
+        self._tree = tree
+
+    def __repr__(self) -> str:
+        return f"Condition({self.source!r})"
+
+    def evaluate(self, facts: Dict[str, Dict[str, Any]], inputs: Optional[Dict[str, Any]] = None) -> bool:
+        """True or False; raises Undecided when a referenced fact is missing."""
+        return bool(self._eval(self._tree.body, facts, inputs or {}))
+
+    def _eval(self, node: ast.AST, facts: Dict[str, Dict[str, Any]], inputs: Dict[str, Any]) -> Any:
+        ev = lambda n: self._eval(n, facts, inputs)  # noqa: E731
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [ev(e) for e in node.elts]
+        if isinstance(node, ast.Name):
+            if node.id == "inputs":
+                return _Inputs(inputs)
+            if node.id not in facts:
+                raise Undecided(f"no facts from {node.id}")
+            return facts[node.id]
+        if isinstance(node, ast.Attribute):
+            return _lookup(ev(node.value), node.attr)
+        if isinstance(node, ast.Subscript):
+            return _lookup(ev(node.value), ev(node.slice))
+        if isinstance(node, ast.BoolOp):
+            if isinstance(node.op, ast.And):
+                return all(ev(v) for v in node.values)
+            return any(ev(v) for v in node.values)
+        if isinstance(node, ast.UnaryOp):
+            value = ev(node.operand)
+            return not value if isinstance(node.op, ast.Not) else -value
+        if isinstance(node, ast.BinOp):
+            left, right = ev(node.left), ev(node.right)
+            return left + right if isinstance(node.op, ast.Add) else left - right
+        if isinstance(node, ast.Compare):
+            left = ev(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = ev(comparator)
+                if not _compare(op, left, right):
+                    return False
+                left = right
+            return True
+        raise ValueError(f"unsupported expression in when: {self.source!r}")
+
+
+class _Inputs(dict):
+    pass
+
+
+def _lookup(container: Any, key: Any) -> Any:
+    if isinstance(container, _Inputs):
+        return container.get(key)
+    if isinstance(container, dict):
+        if key not in container:
+            raise Undecided(f"fact {key!r} not reported")
+        return container[key]
+    raise Undecided(f"cannot read {key!r} from {type(container).__name__}")
+
+
+def _compare(op: ast.cmpop, left: Any, right: Any) -> bool:
+    if isinstance(op, ast.Is):
+        return left is right
+    if isinstance(op, ast.IsNot):
+        return left is not right
+    if isinstance(op, ast.Eq):
+        return left == right
+    if isinstance(op, ast.NotEq):
+        return left != right
+    if isinstance(op, ast.In):
+        return left in right
+    if isinstance(op, ast.NotIn):
+        return left not in right
+    try:
+        if isinstance(op, ast.Lt):
+            return left < right
+        if isinstance(op, ast.LtE):
+            return left <= right
+        if isinstance(op, ast.Gt):
+            return left > right
+        return left >= right
+    except TypeError:
+        raise Undecided(f"cannot order {left!r} and {right!r}") from None
@@ -0,0 +1,261 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.formatter import aggregate_raw_outputs_from_task_outputs
+
+from auto_k8s_pilot.aio import gather_calls
+from auto_k8s_pilot.facts import Condition, Undecided, merge_facts, parse_facts
+from auto_k8s_pilot.rules import SEVERITIES, Finding, RuleSet, get_rules, render_findings, summarize
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import task_scope
+
+LAYERS_DIR = Path(__file__).resolve().parent / "config" / "layers"
+
+
+@dataclass
+class FlowResult:
+    """Outputs, facts, rule findings and per-step wall-clock timings of one flow run."""
+
+    flow: str
+    outputs: Dict[str, TaskOutput] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    skipped: Dict[str, str] = field(default_factory=dict)  # step -> the `when:` that was false
+    facts: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    findings: Dict[str, List[Finding]] = field(default_factory=dict)
+    wall_time: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def all_findings(self, steps: Optional[List[str]] = None) -> List[Finding]:
+        """Findings of `steps` (default: every step), most severe first."""
+        found = [f for sid in (self.findings if steps is None else steps) for f in self.findings.get(sid, [])]
+        return sorted(found, key=lambda f: SEVERITIES.index(f.severity))
+
+    def timings_table(self) -> str:
+        lines = [f"{step}\t{secs:.2f}s" for step, secs in sorted(self.timings.items(), key=lambda kv: -kv[1])]
+        lines += [f"{step}\tskipped" for step in self.skipped]
+        lines.append(f"total\t{self.wall_time:.2f}s")
+        return "\n".join(lines)
+
+
+def load_flow(flow: str) -> List[Dict[str, Any]]:
+    """Return the `steps:` of config/layers/<flow>.yaml."""
+    path = LAYERS_DIR / (flow if flow.endswith(".yaml") else f"{flow}.yaml")
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    steps = data.get("steps") or []
+    if not steps:
+        raise ValueError(f"Flow layer {path.name} has no steps")
+    return steps
+
+
+def plan_dependencies(steps: List[Dict[str, Any]], tasks: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Map every step to the steps it has to wait for.
+
+    Dependencies come from the task `context:` in tasks.yaml, an optional
+    per-step `needs:` list and the steps a `when:` reads facts from.
+    Dependencies on tasks outside the flow are dropped; a `when:` on a step
+    outside the flow is an error, since it could never be decided.
+    """
+    ids = [s["run"] for s in steps]
+    in_flow = set(ids)
+    deps: Dict[str, List[str]] = {}
+    for step in steps:
+        sid = step["run"]
+        needs = list(step.get("needs") or [])
+        context = getattr(tasks[sid], "context", None)
+        if isinstance(context, list):
+            needs += [t.name for t in context]
+        if step.get("when") is not None:
+            refs = Condition(step["when"]).steps
+            if refs - in_flow:
+                raise ValueError(f"{sid}: when: reads {', '.join(sorted(refs - in_flow))}, which this flow does not run")
+            needs += sorted(refs)
+        deps[sid] = [d for d in dict.fromkeys(needs) if d in in_flow and d != sid]
+
+    # Reject cycles early instead of deadlocking the pool.
+    state: Dict[str, int] = {}
+
+    def visit(node: str, chain: List[str]) -> None:
+        if state.get(node) == 2:
+            return
+        if state.get(node) == 1:
+            raise ValueError(f"Dependency cycle in flow: {' -> '.join(chain + [node])}")
+        state[node] = 1
+        for d in deps[node]:
+            visit(d, chain + [node])
+        state[node] = 2
+
+    for sid in ids:
+        visit(sid, [])
+    return deps
+
+
+class FlowExecutor:
+    """
+    Run a flow layer as a DAG instead of a sequential crew.
+
+    Independent branches (kubectl, Argo, Loki, DNS, LLM gateway) run at the
+    same time on a bounded pool. Steps that share an agent are serialized,
+    because a crewai Agent keeps per-execution state and is not thread-safe.
+    Every step's facts are checked against the anomaly rules; the findings
+    of its dependencies lead the context of an LLM step.
+    """
+
+    def __init__(self, pilot: Any = None, max_workers: Optional[int] = None, rules: Optional[RuleSet] = None):
+        if pilot is None:
+            from auto_k8s_pilot.crew import AutoK8sPilot
+            pilot = AutoK8sPilot()
+        self.pilot = pilot
+        self.max_workers = max_workers or get_settings().FLOW_MAX_WORKERS
+        self.rules = rules
+        self._agent_locks: Dict[int, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _agent_lock(self, agent: Any) -> threading.Lock:
+        with self._locks_guard:
+            return self._agent_locks.setdefault(id(agent), threading.Lock())
+
+    def run(
+        self,
+        flow: str = "flow-infra-health",
+        inputs: Optional[Dict[str, Any]] = None,
+        context: Optional[str] = None,
+    ) -> FlowResult:
+        """`context` is extra text handed to every step, e.g. the event that triggered the run."""
+        return self.run_steps(flow, load_flow(flow), inputs=inputs, context=context)
+
+    def run_steps(
+        self,
+        name: str,
+        steps: List[Dict[str, Any]],
+        inputs: Optional[Dict[str, Any]] = None,
+        context: Optional[str] = None,
+    ) -> FlowResult:
+        """Run `steps:` given inline; only the agents and tools these steps use are built."""
+        tasks = {s["run"]: getattr(self.pilot, s["run"])() for s in steps}
+        deps = plan_dependencies(steps, tasks)
+        conditions = {s["run"]: Condition(s["when"]) for s in steps if s.get("when") is not None}
+        direct = {s["run"]: self._tool_calls(s, tasks[s["run"]]) for s in steps if s.get("tool")}
+        rules = self.rules if self.rules is not None else get_rules()
+
+        inputs = inputs or {}
+        for t in tasks.values():
+            t.interpolate_inputs_and_add_conversation_history(inputs)
+            if t.agent is not None:
+                t.agent.interpolate_inputs(inputs)
+
+        result = FlowResult(flow=name)
+        pending = dict(deps)
+        running: Dict[Any, str] = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="flow") as pool:
+            while pending or running:
+                settled = set(result.outputs) | set(result.skipped)
+                for sid in [s for s, d in pending.items() if all(x in settled for x in d)]:
+                    del pending[sid]
+                    if sid in conditions and not self._should_run(conditions[sid], result, deps[sid], inputs):
+                        result.skipped[sid] = f"when: {conditions[sid].source}"
+                        continue
+                    ctx = aggregate_raw_outputs_from_task_outputs(
+                        [result.outputs[d] for d in deps[sid] if d in result.outputs]
+                    )
+                    found = result.all_findings(deps[sid])
+                    if found and sid not in direct:
+                        ctx = f"{render_findings(found)}\n\n{ctx}"
+                    if context:
+                        ctx = f"{context}\n\n{ctx}" if ctx else context
+                    # workers inherit the caller's context so their timings count towards its run
+                    if sid in direct:
+                        job = (self._call_tools, tasks[sid], *direct[sid])
+                    else:
+                        job = (self._execute, tasks[sid], ctx)
+                    running[pool.submit(contextvars.copy_context().run, *job)] = sid
+
+                for sid in [s for s, d in pending.items() if any(x in result.errors for x in d)]:
+                    del pending[sid]
+                    failed = ", ".join(x for x in deps[sid] if x in result.errors)
+                    result.errors[sid] = f"skipped: dependency failed ({failed})"
+
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    sid = running.pop(fut)
+                    try:
+                        output, elapsed, facts = fut.result()
+                        result.outputs[sid] = output
+                        result.timings[sid] = elapsed
+                        result.facts[sid] = facts
+                        result.findings[sid] = rules.evaluate(sid, facts)
+                    except Exception as e:
+                        result.errors[sid] = str(e)
+
+        result.wall_time = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _should_run(condition: Condition, result: FlowResult, deps: List[str], inputs: Dict[str, Any]) -> bool:
+        facts = result.facts
+        # `findings` is only decided when a dependency produced facts the rules know how to read
+        if any(result.facts.get(d, {}).get("kind") for d in deps):
+            facts = {**facts, "findings": summarize(result.all_findings(deps))}
+        try:
+            return condition.evaluate(facts, inputs)
+        except Undecided:
+            return True  # only skip on positive evidence
+
+    @staticmethod
+    def _tool_calls(step: Dict[str, Any], task: Any):
+        """
+        The tool and validated arguments of a `tool:` step. These steps call
+        the tool directly, without the agent's LLM; `args:` is one mapping or
+        a list of them for several calls, which run concurrently.
+        """
+        tools = {t.name: t for t in (getattr(task, "tools", None) or getattr(task.agent, "tools", None) or [])}
+        tool = tools.get(step["tool"])
+        if tool is None:
+            raise ValueError(f"{step['run']}: tool {step['tool']!r} is not one of its agent's tools")
+        calls = step.get("args") or {}
+        calls = calls if isinstance(calls, list) else [calls]
+        try:
+            return tool, [tool.args_schema(**args).model_dump() for args in calls]
+        except Exception as e:
+            raise ValueError(f"{step['run']}: invalid args for {tool.name} ({e})") from None
+
+    def _call_tools(self, task: Any, tool: Any, calls: List[Dict[str, Any]]):
+        with task_scope(task):
+            t0 = time.perf_counter()
+            # concurrently; a `Reported` result keeps its complete facts for the rules
+            outs = [out if isinstance(out, str) else str(out) for out in gather_calls((tool, args) for args in calls)]
+            elapsed = time.perf_counter() - t0
+        raw = "\n\n".join(outs)
+        output = TaskOutput(
+            name=task.name or task.description,
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=raw,
+            agent=getattr(task.agent, "role", ""),
+        )
+        task.output = output
+        if task.output_file:
+            task._save_file(raw)
+        return output, elapsed, merge_facts([parse_facts(o) for o in outs])
+
+    def _execute(self, task: Any, context: str):
+        with self._agent_lock(task.agent):
+            t0 = time.perf_counter()
+            output = task.execute_sync(agent=task.agent, context=context or None)
+            return output, time.perf_counter() - t0, parse_facts(getattr(output, "raw", "") or "")
@@ -0,0 +1,184 @@
+"""
+Shared HTTP client layer for the API tools.
+
+One `HttpClient` per integration (argocd, loki, cloudflare, openrouter,
+github) is reused across tool calls, so connections stay alive in a pooled
+`requests.Session` instead of paying DNS + TCP + TLS on every call. Each
+client has its own timeouts, bounded retries with jittered exponential
+backoff on 429/5xx, and a per-host circuit breaker that fails fast while an
+upstream is down.
+
+HTTP/2 is not used: `requests`/urllib3 only speak HTTP/1.1, and keep-alive
+pooling already removes the handshake cost this layer targets.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import HTTP_BYTES, HTTP_REQUESTS, HTTP_SECONDS, timed
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    timeout: Timeout = (3.05, 10)
+    retries: int = 2
+    backoff: float = 0.3
+
+
+# per-integration defaults; callers may still pass timeout= per request
+POLICIES: Dict[str, EndpointPolicy] = {
+    "argocd": EndpointPolicy(timeout=(3.05, 10)),
+    "loki": EndpointPolicy(timeout=(2, 8), retries=1),
+    "cloudflare": EndpointPolicy(timeout=(3.05, 10), retries=3),
+    "openrouter": EndpointPolicy(timeout=(3.05, 10)),
+    "github": EndpointPolicy(timeout=(3.05, 10)),
+}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one probe through after `cooldown` seconds."""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def before(self, host: str) -> None:
+        with self._lock:
+            if self.state == "open":
+                raise CircuitOpenError(f"circuit open for {host} after {self.failures} failures")
+            if self.state == "half-open":
+                # single probe: keep other callers out until it reports back
+                self.opened_at = time.monotonic()
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    def __init__(self, name: str, policy: Optional[EndpointPolicy] = None, pool_size: int = 10,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 30.0):
+        self.name = name
+        self.policy = policy or POLICIES.get(name, EndpointPolicy())
+        self._breaker_args = (breaker_threshold, breaker_cooldown)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=self.policy.retries,
+            connect=self.policy.retries,
+            read=0,
+            status=self.policy.retries,
+            status_forcelist=(429, 500, 502, 503, 504),
+            backoff_factor=self.policy.backoff,
+            backoff_jitter=self.policy.backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        self.session = s
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            b = self._breakers.get(host)
+            if b is None:
+                b = self._breakers[host] = CircuitBreaker(*self._breaker_args)
+            return b
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        breaker.before(host)
+        kwargs.setdefault("timeout", self.policy.timeout)
+        with timed(HTTP_SECONDS, f"HTTP {method}", client=self.name, method=method) as span:
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                breaker.failure()
+                HTTP_REQUESTS.inc(client=self.name, code="error")
+                raise
+            # streamed bodies (watches, tails) are read by the caller; count what the server announced
+            size = int(r.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(r.content)
+            if span is not None:
+                span.set_attribute("http.host", host)
+                span.set_attribute("http.status_code", r.status_code)
+        HTTP_REQUESTS.inc(client=self.name, code=r.status_code)
+        HTTP_BYTES.inc(size, client=self.name)
+        if r.status_code >= 500 or r.status_code == 429:
+            breaker.failure()
+        else:
+            breaker.success()
+        return r
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_CLIENTS: Dict[str, HttpClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_http(name: str) -> HttpClient:
+    """Return the process-wide client for an integration, creating it on first use."""
+    with _CLIENTS_LOCK:
+        c = _CLIENTS.get(name)
+        if c is None:
+            settings = get_settings()
+            c = _CLIENTS[name] = HttpClient(
+                name,
+                pool_size=settings.HTTP_POOL_SIZE,
+                breaker_threshold=settings.HTTP_BREAKER_THRESHOLD,
+                breaker_cooldown=settings.HTTP_BREAKER_COOLDOWN,
+            )
+        return c
+
+
+def reset_http() -> None:
+    with _CLIENTS_LOCK:
+        for c in _CLIENTS.values():
+            c.close()
+        _CLIENTS.clear()
@@ -0,0 +1,110 @@
+"""
+Response cache in front of the crew's LLM calls.
+
+`CachedLLM` reuses a completion when the exact same prompt was sent before
+and has not expired. The prompt already carries the agent's role, goal and
+backstory, the task description and every tool observation, so identical
+cluster state gives an identical key and changed state never hits.
+`MemoTask` goes one step further for pure summarizer tasks: if the task,
+its agent and the upstream context are unchanged, the previous output is
+returned without starting the agent at all.
+
+Entries are stored with the same LRU + SQLite store as tool results, in a
+separate file, so re-runs in `run`, `replay`, `test` and `run_flow` share
+them across processes.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from crewai import LLM, Task
+from crewai.tasks.output_format import OutputFormat
+from crewai.tasks.task_output import TaskOutput
+
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.tools.tool_cache import ToolResultCache
+
+_CACHE: Optional[ToolResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> ToolResultCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            settings = get_settings()
+            _CACHE = ToolResultCache(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_FILE)
+        return _CACHE
+
+
+def reset_llm_cache() -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is not None:
+            _CACHE.close()
+        _CACHE = None
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CachedLLM(LLM):
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None):
+        # native tool calls run functions inside the call; their results are not a pure function of the prompt
+        if tools or available_functions:
+            return super().call(messages, tools, callbacks, available_functions, from_task, from_agent)
+        cache = get_llm_cache()
+        key = _digest(self.model, self.temperature, self.stop, messages)
+        hit = cache.get("llm", key)
+        if hit is not None:
+            return hit
+        result = super().call(messages, tools, callbacks, available_functions, from_task, from_agent)
+        if isinstance(result, str) and result.strip():
+            cache.put("llm", key, result, get_settings().LLM_CACHE_TTL)
+        return result
+
+
+def agent_llm(config: Dict[str, Any]) -> Optional[LLM]:
+    """A CachedLLM for an agents.yaml entry, or None to keep crewAI's default handling."""
+    if not get_settings().LLM_CACHE_ENABLED or not isinstance(config.get("llm"), str):
+        return None
+    return CachedLLM(model=config["llm"], temperature=config.get("temperature"))
+
+
+class MemoTask(Task):
+    """A summarizer task that is skipped when its agent, prompt and context are unchanged."""
+
+    def _memo_key(self, agent: Any, context: Optional[str]) -> str:
+        profile: List[Any] = [getattr(agent, f, None) for f in ("role", "goal", "backstory")]
+        llm = getattr(agent, "llm", None)
+        profile.append(getattr(llm, "model", None))
+        return _digest(profile, self.description, self.expected_output, context or "")
+
+    def execute_sync(self, agent=None, context=None, tools=None) -> TaskOutput:
+        if not get_settings().LLM_CACHE_ENABLED:
+            return super().execute_sync(agent=agent, context=context, tools=tools)
+        agent = agent or self.agent
+        cache = get_llm_cache()
+        key = self._memo_key(agent, context)
+        raw = cache.get("task", key)
+        if raw is None:
+            output = super().execute_sync(agent=agent, context=context, tools=tools)
+            if output.raw:
+                cache.put("task", key, output.raw, get_settings().LLM_CACHE_TTL)
+            return output
+
+        output = TaskOutput(
+            name=self.name or self.description,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=raw,
+            agent=getattr(agent, "role", ""),
+            output_format=OutputFormat.RAW,
+        )
+        self.output = output
+        if self.output_file:
+            self._save_file(raw)
+        return output
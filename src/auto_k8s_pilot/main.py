@@ -1,9 +1,11 @@
 #!/usr/bin/env python
+import queue
 import sys
 import warnings
 from datetime import datetime
 
 from auto_k8s_pilot.crew import AutoK8sPilot
+from auto_k8s_pilot.settings import get_settings
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -17,6 +19,8 @@ def run():
     """
     Run the crew (sequential process by default).
     """
+    from auto_k8s_pilot.telemetry import recording
+
     # Example: you can override inputs here if needed
     inputs = {
         "namespace": "all",  # or "default"
@@ -24,9 +28,132 @@ def run():
     }
 
     try:
-        AutoK8sPilot().crew().kickoff(inputs=inputs)
+        with recording("crew"):
+            AutoK8sPilot().crew().kickoff(inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
+    _print_timings("crew")
+
+
+def _print_timings(name: str) -> None:
+    from auto_k8s_pilot.telemetry import summary_path
+
+    path = summary_path(name)
+    if get_settings().TELEMETRY_ENABLED and path.exists():
+        print(f"Timings: {path}")
+
+
+def run_flow():
+    """
+    Run a flow layer (config/layers/flow-*.yaml) as a parallel DAG.
+    """
+    from auto_k8s_pilot.flow import FlowExecutor
+    from auto_k8s_pilot.llm_cache import get_llm_cache
+    from auto_k8s_pilot.rules import render_findings
+    from auto_k8s_pilot.telemetry import recording
+    from auto_k8s_pilot.tools.tool_cache import get_tool_cache
+
+    flow = sys.argv[1] if len(sys.argv) > 1 else "flow-infra-health"
+    inputs = {
+        "namespace": "all",
+        "current_year": str(datetime.now().year),
+    }
+
+    try:
+        with recording(flow):
+            result = FlowExecutor().run(flow, inputs=inputs)
+    except Exception as e:
+        raise Exception(f"An error occurred while running the flow: {e}")
+
+    print(result.timings_table())
+    for step, err in result.errors.items():
+        print(f"ERROR {step}: {err}")
+    for step, why in result.skipped.items():
+        print(f"SKIPPED {step}: {why}")
+    found = result.all_findings()
+    if found:
+        print(render_findings(found))
+    print(get_tool_cache().stats_table())
+    if get_settings().LLM_CACHE_ENABLED:
+        print(get_llm_cache().stats_table())
+    _print_timings(flow)
+    return result
+
+
+def run_task():
+    """
+    Run a single task from tasks.yaml, e.g. `run_task k8s_top_nodes`.
+    """
+    from auto_k8s_pilot.flow import FlowExecutor
+    from auto_k8s_pilot.telemetry import recording
+
+    if len(sys.argv) < 2:
+        raise Exception("Usage: run_task <task_name>")
+    name = sys.argv[1]
+    inputs = {
+        "namespace": "all",
+        "current_year": str(datetime.now().year),
+    }
+
+    try:
+        with recording(name):
+            result = FlowExecutor().run_steps(name, [{"run": name}], inputs=inputs)
+    except Exception as e:
+        raise Exception(f"An error occurred while running the task: {e}")
+
+    for step, err in result.errors.items():
+        print(f"ERROR {step}: {err}")
+    _print_timings(name)
+    return result
+
+
+def serve():
+    """
+    Resident service: run the flows in config/schedule.yaml on their intervals
+    with warm tools and caches, and accept on-demand triggers on DAEMON_HOST:DAEMON_PORT.
+    """
+    from auto_k8s_pilot.daemon import Daemon
+
+    daemon = Daemon()
+    settings = get_settings()
+    print(f"Serving {', '.join(daemon.flows)} (trigger: POST http://{settings.DAEMON_HOST}:{settings.DAEMON_PORT}/flows/<flow>/run)")
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def watch_argo():
+    """
+    Follow the Argo CD application stream and run the incident flow
+    (config/layers/flow-argo-incident.yaml) whenever an app degrades.
+    """
+    from auto_k8s_pilot.flow import FlowExecutor
+    from auto_k8s_pilot.tools.argo_cache import get_app_store
+
+    settings = get_settings()
+    if not settings.ARGOCD_BASE_URL or not settings.ARGOCD_API_TOKEN:
+        raise Exception("Set ARGOCD_BASE_URL and ARGOCD_API_TOKEN")
+    store = get_app_store(settings.ARGOCD_BASE_URL, settings.ARGOCD_API_TOKEN, settings.ARGOCD_CACHE_FILE)
+    changes: "queue.Queue" = queue.Queue()
+    store.subscribe(lambda c: changes.put(c) if c.degraded else None)
+    store.ensure_fresh(settings.ARGOCD_CACHE_MAX_STALENESS)
+    print(f"Watching {len(store)} Argo CD applications")
+
+    inputs = {"namespace": "all", "current_year": str(datetime.now().year)}
+    executor = FlowExecutor()
+    try:
+        while True:
+            batch = [changes.get()]
+            while not changes.empty():  # one run for changes that arrived together
+                batch.append(changes.get_nowait())
+            context = "Argo CD state changes:\n" + "\n".join(c.describe() for c in batch)
+            print(context)
+            result = executor.run("flow-argo-incident", inputs=inputs, context=context)
+            for step, err in result.errors.items():
+                print(f"ERROR {step}: {err}")
+    except KeyboardInterrupt:
+        store.stop()
 
 
 def train():
@@ -0,0 +1,173 @@
+"""
+Deterministic anomaly rules over tool facts (config/rules.yaml).
+
+A CrashLoopBackOff pod, a Degraded or OutOfSync Argo application or a
+burst of Loki errors is already a fact of the tool output (see facts.py),
+so finding one does not need an LLM. A rule names the output `kind` it
+reads, optionally a list inside it to check item by item (`each:`), a
+`when:` expression and `match:` regexes over the item's fields:
+
+    - id: pod-crashloop
+      kind: pods
+      each: groups
+      when: reason == "CrashLoopBackOff"
+      severity: critical
+      subject: "{namespace}/{owner}"
+      message: "{pods} pod(s) in CrashLoopBackOff, restarts max {restarts}"
+
+Expressions and regexes are compiled once when the file is loaded, and
+rules are indexed by kind, so a step's facts are only checked against the
+rules for its output. A flow evaluates them after every step; its LLM
+steps get the findings to narrate and `when:` can test them
+(`findings.critical > 0`).
+"""
+import re
+import threading
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from auto_k8s_pilot.facts import Condition, Undecided
+from auto_k8s_pilot.settings import get_settings
+
+RULES_FILE = Path(__file__).resolve().parent / "config" / "rules.yaml"
+SEVERITIES = ("critical", "warning", "info")
+RULE_KEYS = {"id", "kind", "each", "steps", "when", "match", "severity", "subject", "message"}
+
+
+@dataclass(frozen=True)
+class Finding:
+    """One rule hit on one step's output (or one item of it)."""
+
+    rule: str
+    severity: str
+    step: str
+    subject: str
+    message: str
+
+    def render(self) -> str:
+        return f"- [{self.severity}] {self.subject}: {self.message} ({self.rule}, from {self.step})"
+
+
+class _Fields(dict):
+    def __missing__(self, key: str) -> str:
+        return "?"
+
+
+def _format(template: str, item: Dict[str, Any]) -> str:
+    try:
+        return template.format_map(_Fields(item))
+    except (ValueError, IndexError, AttributeError):
+        return template
+
+
+class Rule:
+    """One compiled entry of rules.yaml."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.id = str(spec.get("id") or "")
+        unknown = set(spec) - RULE_KEYS
+        if not self.id or not spec.get("kind"):
+            raise ValueError(f"rule {spec!r} needs an id and a kind")
+        if unknown:
+            raise ValueError(f"rule {self.id}: unknown keys {', '.join(sorted(unknown))}")
+        self.kind: str = spec["kind"]
+        self.each: Optional[str] = spec.get("each")
+        self.steps: List[str] = list(spec.get("steps") or [])
+        self.severity: str = spec.get("severity", "warning")
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"rule {self.id}: severity must be one of {', '.join(SEVERITIES)}")
+        self.when: Optional[Condition] = Condition(spec["when"]) if spec.get("when") is not None else None
+        try:
+            self.match = {name: re.compile(rx) for name, rx in (spec.get("match") or {}).items()}
+        except re.error as e:
+            raise ValueError(f"rule {self.id}: invalid match regex ({e})") from None
+        self.subject: str = spec.get("subject") or "{step}"
+        self.message: str = spec.get("message") or self.id
+
+    def __repr__(self) -> str:
+        return f"Rule({self.id!r})"
+
+    def evaluate(self, step: str, facts: Dict[str, Any]) -> List[Finding]:
+        if self.steps and not any(fnmatchcase(step, p) for p in self.steps):
+            return []
+        items = (facts.get(self.each) or []) if self.each else [facts]
+        return [
+            Finding(self.id, self.severity, step, _format(self.subject, {"step": step, **item}),
+                    _format(self.message, {"step": step, **item}))
+            for item in items if self._matches(item)
+        ]
+
+    def _matches(self, item: Dict[str, Any]) -> bool:
+        for name, rx in self.match.items():
+            if item.get(name) is None or not rx.search(str(item[name])):
+                return False
+        if self.when is None:
+            return True
+        try:
+            return self.when.evaluate(item)
+        except Undecided:
+            return False  # a rule only fires on positive evidence
+
+
+class RuleSet:
+    """Rules indexed by the output kind they read."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        self._by_kind: Dict[str, List[Rule]] = {}
+        for r in rules:
+            self._by_kind.setdefault(r.kind, []).append(r)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def evaluate(self, step: str, facts: Dict[str, Any]) -> List[Finding]:
+        """Findings for one step's facts, most severe first."""
+        found = [f for r in self._by_kind.get(facts.get("kind"), ()) for f in r.evaluate(step, facts)]
+        return sorted(found, key=lambda f: SEVERITIES.index(f.severity))
+
+
+def load_rules(path: Path = RULES_FILE) -> RuleSet:
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    rules = [Rule(spec) for spec in data.get("rules") or []]
+    ids = [r.id for r in rules]
+    dupes = sorted({i for i in ids if ids.count(i) > 1})
+    if dupes:
+        raise ValueError(f"{Path(path).name}: duplicate rule ids {', '.join(dupes)}")
+    return RuleSet(rules)
+
+
+_cache: Dict[str, Tuple[float, RuleSet]] = {}
+_lock = threading.Lock()
+
+
+def get_rules() -> RuleSet:
+    """The rules of RULES_FILE (or the packaged file), reloaded when the file changes."""
+    path = Path(get_settings().RULES_FILE or RULES_FILE)
+    mtime = path.stat().st_mtime
+    with _lock:
+        cached = _cache.get(str(path))
+        if cached is None or cached[0] != mtime:
+            cached = _cache[str(path)] = (mtime, load_rules(path))
+        return cached[1]
+
+
+def summarize(findings: List[Finding]) -> Dict[str, Any]:
+    """What `when:` sees as `findings`: counts per severity and per rule."""
+    summary: Dict[str, Any] = {"total": len(findings), **{s: 0 for s in SEVERITIES}, "rules": {}}
+    for f in findings:
+        summary[f.severity] += 1
+        summary["rules"][f.rule] = summary["rules"].get(f.rule, 0) + 1
+    return summary
+
+
+def render_findings(findings: List[Finding]) -> str:
+    """The findings block handed to the steps that narrate them."""
+    counts = summarize(findings)
+    head = f"Findings: {counts['total']} | " + " | ".join(f"{s} {counts[s]}" for s in SEVERITIES)
+    return "\n".join([head] + [f.render() for f in findings])
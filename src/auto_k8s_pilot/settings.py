@@ -1,4 +1,17 @@
-from typing import Optional
+"""
+Process-wide configuration.
+
+`get_settings()` returns one cached `Settings` instance, so looking up
+config on every tool call does not re-read the environment or `.env`.
+`reload_settings()` rebuilds it explicitly (the resident service calls it
+on SIGHUP and when `.env` changes). `get_settings(tool)` applies the
+per-tool overrides from `TOOL_OVERRIDES`, e.g.
+`{"loki_query": {"LOKI_URL": "http://loki-read:3100"}}`.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,20 +21,65 @@ class Settings(BaseSettings):
     ALLOW_MUTATING: bool = False
     KUBECONFIG: Optional[str] = None
     KUBECTL_TIMEOUT: int = 20
+    KUBECTL_FANOUT_PARALLEL: int = 4       # `contexts` fan-out: clusters queried at once
+    KUBECTL_LOGS_PARALLEL: int = 8         # logs output=digest: pod/container streams read at once
+    KUBECTL_LOGS_DEADLINE: int = 60        # logs output=digest: seconds for all streams together
+    KUBECTL_BACKEND: str = "subprocess"  # "subprocess" or "api" (pooled Kubernetes API client)
+    KUBE_CACHE_ENABLED: bool = False       # api backend: answer get from a watched snapshot
+    KUBE_CACHE_MAX_STALENESS: int = 30     # seconds before a snapshot is relisted
+    FLOW_MAX_WORKERS: int = 4
+    DAEMON_HOST: str = "127.0.0.1"         # `serve`: local trigger/status endpoint
+    DAEMON_PORT: int = 8787                # 0 disables the endpoint
+    RULES_FILE: Optional[str] = None       # anomaly rules; default config/rules.yaml
+
+    # Tool result cache (kubectl/argocd/loki/cloudflare reads)
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_MAX_ENTRIES: int = 512
+    TOOL_CACHE_FILE: Optional[str] = None      # optional SQLite file shared across processes
+    TOOL_CACHE_TTLS: Dict[str, int] = {}       # per-tool TTL overrides (seconds), JSON in env
+
+    # Run instrumentation: timings_<run>.md and metrics.prom are written to TELEMETRY_DIR after each run
+    TELEMETRY_ENABLED: bool = True
+    TELEMETRY_DIR: str = "output"
+    TELEMETRY_TRACES_FILE: Optional[str] = None    # OpenTelemetry spans as JSON lines
+    TELEMETRY_OTLP_ENDPOINT: Optional[str] = None  # OTLP/HTTP traces, e.g. http://otel-collector:4318/v1/traces
+
+    # Per-tool settings overrides, JSON in env: {"<tool name>": {"<SETTING>": value}}
+    TOOL_OVERRIDES: Dict[str, Dict[str, Any]] = {}
+
+    # LLM response cache (exact prompt match) + summarizer skip when inputs are unchanged
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_TTL: int = 3600
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_FILE: Optional[str] = ".cache/llm_cache.sqlite"
+
+    # Shared HTTP client (Argo, Loki, Cloudflare, OpenRouter, GitHub)
+    HTTP_POOL_SIZE: int = 10
+    HTTP_BREAKER_THRESHOLD: int = 5    # consecutive failures before a host is short-circuited
+    HTTP_BREAKER_COOLDOWN: int = 30    # seconds before a probe request is let through
+    ASYNC_IO_WORKERS: int = 16         # threads behind the tools' async (`_arun`) blocking I/O
 
     # ArgoCD
     ARGOCD_BASE_URL: Optional[str] = None
     ARGOCD_API_TOKEN: Optional[str] = None
+    ARGOCD_CACHE_ENABLED: bool = False         # answer reads from the application watch stream
+    ARGOCD_CACHE_MAX_STALENESS: int = 60       # seconds without stream activity before a relist
+    ARGOCD_CACHE_FILE: Optional[str] = None    # optional JSON snapshot for warm starts
 
     # Loki
     LOKI_URL: str = "http://loki:3100"
+    LOKI_SHARD_MINUTES: int = 60      # count mode: window is split into sub-ranges of this size
+    LOKI_MAX_PARALLEL: int = 4        # count mode: concurrent sub-range queries
+    LOKI_CURSOR_FILE: str = ".cache/loki_cursors.json"  # incremental=true: last entry read per query
 
     # GitHub
     GITHUB_TOKEN: Optional[str] = None
 
     # Cloudflare
+    CLOUDFLARE_API_URL: str = "https://api.cloudflare.com/client/v4"
     CLOUDFLARE_API_TOKEN: Optional[str] = None
     CLOUDFLARE_ZONE_ID: Optional[str] = None
+    CLOUDFLARE_SNAPSHOT_MAX_AGE: int = 300     # seconds list/get are served from the zone snapshot
 
     # OpenRouter (LLM Gateway)
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
@@ -40,5 +98,57 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-SETTINGS = Settings()
+_SETTINGS: Optional[Settings] = None
+_PER_TOOL: Dict[str, Settings] = {}
+_ENV_MTIME: Optional[float] = None
+_LOCK = threading.Lock()
+
+
+def _env_mtime() -> Optional[float]:
+    try:
+        return os.stat(Settings.Config.env_file).st_mtime
+    except OSError:
+        return None
+
+
+def get_settings(tool: Optional[str] = None) -> Settings:
+    """The cached settings, with `tool`'s overrides applied when given."""
+    global _SETTINGS, _ENV_MTIME
+    settings = _SETTINGS
+    if settings is None:
+        with _LOCK:
+            if _SETTINGS is None:
+                _ENV_MTIME = _env_mtime()
+                _SETTINGS = Settings()
+            settings = _SETTINGS
+    if tool is None or tool not in settings.TOOL_OVERRIDES:
+        return settings
+    scoped = _PER_TOOL.get(tool)
+    if scoped is None:
+        with _LOCK:
+            scoped = _PER_TOOL.setdefault(tool, Settings(**{**settings.model_dump(), **settings.TOOL_OVERRIDES[tool]}))
+    return scoped
+
+
+def reload_settings() -> None:
+    """Drop the cached settings; the next lookup re-reads the environment and `.env`."""
+    global _SETTINGS
+    with _LOCK:
+        _SETTINGS = None
+        _PER_TOOL.clear()
+
+
+def reload_if_changed() -> bool:
+    """Reload when `.env` was created, changed or removed since the last load."""
+    if _SETTINGS is None or _env_mtime() == _ENV_MTIME:
+        return False
+    reload_settings()
+    return True
+
+
+def __getattr__(name: str) -> Any:
+    # `SETTINGS` used to be a module-level instance built at import time
+    if name == "SETTINGS":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,647 @@
+"""
+Run instrumentation: where a crew or flow run spends its time.
+
+Three layers are measured:
+
+- tasks and LLM calls, from crewAI's event bus (latency per call, prompt and
+  completion tokens as the difference in the agent's token counter; a flow
+  never runs two tasks of one agent at once, so the difference is exact)
+- every tool call (`@instrumented` on `_run`/`_arun`): duration, response
+  bytes, ERROR results and truncated output
+- the I/O underneath: kubectl executions and requests on the shared HTTP
+  clients
+
+Everything lands in in-process Prometheus counters and histograms
+(`render_metrics()`, served on the resident service's `/metrics` and
+written to TELEMETRY_DIR/metrics.prom after each run) and, when
+TELEMETRY_TRACES_FILE or TELEMETRY_OTLP_ENDPOINT is set, in OpenTelemetry
+spans nested run > task > tool/LLM > kubectl/HTTP. `recording(name)` scopes
+one run and writes TELEMETRY_DIR/timings_<name>.md with tasks ranked by
+wall time.
+
+The Prometheus text format is rendered here; prometheus_client is not a
+dependency.
+"""
+import contextvars
+import inspect
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TRUNCATION_MARK = re.compile(r"^\.\.\. (\d+ more|truncated)", re.MULTILINE)
+
+
+# --- metrics ----------------------------------------------------------------
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY: List["Counter"] = []
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, key)) + ([extra] if extra else [])
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}" if pairs else ""
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(Counter):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def value(self, **labels: Any) -> Dict[str, Any]:
+        """{"buckets", "sum", "count"} for one label set (zeros if never observed)."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            if entry is None:
+                return {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            return {"buckets": list(entry["buckets"]), "sum": entry["sum"], "count": entry["count"]}
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, entry["buckets"]):
+                    lines.append(f"{self.name}_bucket{self._labels(key, ('le', _fmt(bound)))} {n}")
+                lines.append(f"{self.name}_bucket{self._labels(key, ('le', '+Inf'))} {entry['count']}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_fmt(entry['sum'])}")
+                lines.append(f"{self.name}_count{self._labels(key)} {entry['count']}")
+        return lines
+
+
+TASK_SECONDS = Histogram("autok8s_task_duration_seconds", "Wall time of a crew task", ("task", "status"))
+TOOL_SECONDS = Histogram("autok8s_tool_duration_seconds", "Wall time of a tool call", ("tool", "status"))
+TOOL_BYTES = Counter("autok8s_tool_response_bytes_total", "Characters returned by tool calls", ("tool",))
+TOOL_TRUNCATIONS = Counter("autok8s_tool_truncations_total", "Tool results cut at the output budget", ("tool",))
+KUBECTL_SECONDS = Histogram("autok8s_kubectl_duration_seconds", "kubectl executions", ("action", "backend"))
+HTTP_SECONDS = Histogram("autok8s_http_request_duration_seconds", "Shared HTTP client requests", ("client", "method"))
+HTTP_REQUESTS = Counter("autok8s_http_requests_total", "Shared HTTP client requests by status", ("client", "code"))
+HTTP_BYTES = Counter("autok8s_http_response_bytes_total", "Response body bytes", ("client",))
+LLM_SECONDS = Histogram("autok8s_llm_call_duration_seconds", "LLM call latency", ("model", "status"))
+LLM_TOKENS = Counter("autok8s_llm_tokens_total", "LLM tokens", ("model", "kind"))
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}"]
+        lines += metric.samples()
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str) -> None:
+    """Write the metrics atomically (node_exporter textfile collector friendly)."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    tmp.write_text(render_metrics(), encoding="utf-8")
+    tmp.replace(target)
+
+
+# --- tracing ----------------------------------------------------------------
+_PROVIDER: Any = None
+_TRACER: Any = None
+_TRACING_READY = False
+_LOCK = threading.Lock()
+
+
+def _build_provider(settings) -> Any:
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor, SimpleSpanProcessor, SpanExporter, SpanExportResult,
+        )
+    except ImportError:
+        return None
+
+    class JsonLinesExporter(SpanExporter):
+        def __init__(self, path: str):
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.path = path
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(span.to_json(indent=None) + "\n")
+            return SpanExportResult.SUCCESS
+
+    # a private provider: crewAI manages the global one for its own telemetry
+    provider = TracerProvider(resource=Resource.create({"service.name": "auto-k8s-pilot"}))
+    if settings.TELEMETRY_TRACES_FILE:
+        provider.add_span_processor(SimpleSpanProcessor(JsonLinesExporter(settings.TELEMETRY_TRACES_FILE)))
+    if settings.TELEMETRY_OTLP_ENDPOINT:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            pass
+        else:
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.TELEMETRY_OTLP_ENDPOINT)))
+    return provider
+
+
+def get_tracer() -> Any:
+    """The tracer, or None when no span exporter is configured."""
+    global _PROVIDER, _TRACER, _TRACING_READY
+    if _TRACING_READY:
+        return _TRACER
+    with _LOCK:
+        if not _TRACING_READY:
+            settings = get_settings()
+            if settings.TELEMETRY_ENABLED and (settings.TELEMETRY_TRACES_FILE or settings.TELEMETRY_OTLP_ENDPOINT):
+                _PROVIDER = _build_provider(settings)
+                _TRACER = _PROVIDER.get_tracer("auto_k8s_pilot") if _PROVIDER else None
+            _TRACING_READY = True
+    return _TRACER
+
+
+def _start_span(name: str, attributes: Dict[str, Any]) -> Any:
+    tracer = get_tracer()
+    if tracer is None:
+        return None
+    return tracer.start_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+
+
+def _end_span(span: Any, error: Optional[str] = None) -> None:
+    if span is None:
+        return
+    if error:
+        from opentelemetry.trace import Status, StatusCode
+
+        span.set_status(Status(StatusCode.ERROR, error[:200]))
+    span.end()
+
+
+@contextmanager
+def _current(span: Any) -> Iterator[None]:
+    """Make `span` the parent of spans started inside the block."""
+    if span is None:
+        yield
+        return
+    from opentelemetry import trace
+
+    with trace.use_span(span, end_on_exit=False):
+        yield
+
+
+def _attach(span: Any) -> Any:
+    if span is None:
+        return None
+    from opentelemetry import context, trace
+
+    return context.attach(trace.set_span_in_context(span))
+
+
+def _detach(token: Any) -> None:
+    if token is None:
+        return
+    from opentelemetry import context
+
+    try:
+        context.detach(token)
+    except Exception:
+        pass  # finished on another thread than it started; the span itself is still ended
+
+
+@contextmanager
+def timed(histogram: Histogram, span_name: Optional[str] = None, **labels: Any) -> Iterator[Any]:
+    """Observe the block's duration in `histogram`; yields the span (or None) for extra attributes."""
+    if not get_settings().TELEMETRY_ENABLED:
+        yield None
+        return
+    span = _start_span(span_name, labels) if span_name else None
+    t0 = time.perf_counter()
+    error = None
+    try:
+        with _current(span):
+            yield span
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - t0, **labels)
+        _end_span(span, error)
+
+
+# --- per-run records --------------------------------------------------------
+@dataclass
+class Timing:
+    kind: str  # task | tool | llm
+    name: str
+    seconds: float
+    task: Optional[str] = None
+    ok: bool = True
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    size: int = 0
+    truncated: bool = False
+
+
+@dataclass
+class RunTimings:
+    name: str
+    started: datetime = field(default_factory=datetime.now)
+    wall_time: float = 0.0
+    timings: List[Timing] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, timing: Timing) -> None:
+        with self._lock:
+            self.timings.append(timing)
+
+    def of(self, kind: str) -> List[Timing]:
+        with self._lock:
+            return [t for t in self.timings if t.kind == kind]
+
+    def summary(self) -> str:
+        """Markdown report: tasks ranked by wall time, then tools and models."""
+        tasks, tools, llms = self.of("task"), self.of("tool"), self.of("llm")
+        per_task: Dict[Optional[str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for t in tools + llms:
+            row = per_task[t.task]
+            row[f"{t.kind}_calls"] += 1
+            row[f"{t.kind}_s"] += t.seconds
+        prompt = sum(t.prompt_tokens for t in llms)
+        completion = sum(t.completion_tokens for t in llms)
+        lines = [
+            f"# Run timings: {self.name}",
+            "",
+            f"Started {self.started.isoformat(timespec='seconds')}, wall time {self.wall_time:.2f}s, "
+            f"{len(tasks)} tasks, {len(tools)} tool calls, {len(llms)} LLM calls "
+            f"({prompt} prompt / {completion} completion tokens)",
+            "",
+            "## Tasks",
+            "",
+            "| task | seconds | share | LLM calls | LLM s | tool calls | tool s | prompt tok | completion tok | status |",
+            "|---|---|---|---|---|---|---|---|---|---|",
+        ]
+        busy = sum(t.seconds for t in tasks) or 1.0
+        for t in sorted(tasks, key=lambda t: -t.seconds):
+            row = per_task[t.name]
+            lines.append(
+                f"| {t.name} | {t.seconds:.2f} | {100 * t.seconds / busy:.0f}% | {row['llm_calls']:.0f} | "
+                f"{row['llm_s']:.2f} | {row['tool_calls']:.0f} | {row['tool_s']:.2f} | {t.prompt_tokens} | "
+                f"{t.completion_tokens} | {'ok' if t.ok else 'FAILED'} |"
+            )
+
+        lines += ["", "## Tools", "", "| tool | calls | total s | max s | chars | errors | truncated |",
+                  "|---|---|---|---|---|---|---|"]
+        by_tool: Dict[str, List[Timing]] = defaultdict(list)
+        for t in tools:
+            by_tool[t.name].append(t)
+        for name, calls in sorted(by_tool.items(), key=lambda kv: -sum(t.seconds for t in kv[1])):
+            lines.append(
+                f"| {name} | {len(calls)} | {sum(t.seconds for t in calls):.2f} | {max(t.seconds for t in calls):.2f} | "
+                f"{sum(t.size for t in calls)} | {sum(not t.ok for t in calls)} | {sum(t.truncated for t in calls)} |"
+            )
+
+        lines += ["", "## LLM", "", "| model | calls | total s | max s | prompt tok | completion tok |",
+                  "|---|---|---|---|---|---|"]
+        by_model: Dict[str, List[Timing]] = defaultdict(list)
+        for t in llms:
+            by_model[t.name].append(t)
+        for name, calls in sorted(by_model.items()):
+            lines.append(
+                f"| {name} | {len(calls)} | {sum(t.seconds for t in calls):.2f} | {max(t.seconds for t in calls):.2f} | "
+                f"{sum(t.prompt_tokens for t in calls)} | {sum(t.completion_tokens for t in calls)} |"
+            )
+        return "\n".join(lines) + "\n"
+
+
+_RUN: contextvars.ContextVar[Optional[RunTimings]] = contextvars.ContextVar("autok8s_run", default=None)
+_TASK: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("autok8s_task", default=None)
+
+
+def current_run() -> Optional[RunTimings]:
+    return _RUN.get()
+
+
+def _record(timing: Timing) -> None:
+    run = _RUN.get()
+    if run is not None:
+        run.add(timing)
+
+
+def summary_path(name: str) -> Path:
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+    return Path(get_settings().TELEMETRY_DIR) / f"timings_{safe}.md"
+
+
+@contextmanager
+def recording(name: str) -> Iterator[RunTimings]:
+    """
+    Scope one run. Threads that should count towards it must run in a copy
+    of the caller's context (FlowExecutor does this for its workers). On exit
+    the run summary and metrics are written when anything was recorded.
+    """
+    run = RunTimings(name)
+    settings = get_settings()
+    if not settings.TELEMETRY_ENABLED:
+        yield run
+        return
+    install()
+    token = _RUN.set(run)
+    span = _start_span(f"run {name}", {"run": name})
+    t0 = time.perf_counter()
+    error = None
+    try:
+        with _current(span):
+            yield run
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        run.wall_time = time.perf_counter() - t0
+        _RUN.reset(token)
+        _end_span(span, error)
+        if run.timings:
+            path = summary_path(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(run.summary(), encoding="utf-8")
+            write_metrics(str(Path(settings.TELEMETRY_DIR) / "metrics.prom"))
+        flush()
+
+
+def flush() -> None:
+    if _PROVIDER is not None:
+        _PROVIDER.force_flush()
+
+
+# --- tools ------------------------------------------------------------------
+def _tool_done(tool: str, t0: float, span: Any, result: Any, error: Optional[str]) -> None:
+    seconds = time.perf_counter() - t0
+    text = result if isinstance(result, str) else ""
+    ok = error is None and not text.startswith("ERROR")
+    truncated = len(text) >= OUTPUT_BUDGET or bool(TRUNCATION_MARK.search(text))
+    TOOL_SECONDS.observe(seconds, tool=tool, status="ok" if ok else "error")
+    TOOL_BYTES.inc(len(text), tool=tool)
+    if truncated:
+        TOOL_TRUNCATIONS.inc(tool=tool)
+    if span is not None:
+        span.set_attribute("response.chars", len(text))
+        span.set_attribute("response.truncated", truncated)
+    _end_span(span, error or (text[:200] if not ok else None))
+    _record(Timing("tool", tool, seconds, task=_TASK.get(), ok=ok, size=len(text), truncated=truncated))
+
+
+def instrumented(run: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Time a tool's `_run` (or async `_arun`). Put it above `@cached_result`
+    so cache hits are counted too; `_arun`s that only offload `_run` need
+    no decorator of their own.
+    """
+    if inspect.iscoroutinefunction(run):
+
+        @wraps(run)
+        async def async_wrapper(self, *args, **kwargs):
+            if not get_settings().TELEMETRY_ENABLED:
+                return await run(self, *args, **kwargs)
+            span, t0 = _start_span(f"tool {self.name}", {"tool": self.name}), time.perf_counter()
+            try:
+                with _current(span):
+                    result = await run(self, *args, **kwargs)
+            except Exception as e:
+                _tool_done(self.name, t0, span, None, str(e) or type(e).__name__)
+                raise
+            _tool_done(self.name, t0, span, result, None)
+            return result
+
+        return async_wrapper
+
+    @wraps(run)
+    def wrapper(self, *args, **kwargs):
+        if not get_settings().TELEMETRY_ENABLED:
+            return run(self, *args, **kwargs)
+        span, t0 = _start_span(f"tool {self.name}", {"tool": self.name}), time.perf_counter()
+        try:
+            with _current(span):
+                result = run(self, *args, **kwargs)
+        except Exception as e:
+            _tool_done(self.name, t0, span, None, str(e) or type(e).__name__)
+            raise
+        _tool_done(self.name, t0, span, result, None)
+        return result
+
+    return wrapper
+
+
+# --- crewAI events: tasks and LLM calls --------------------------------------
+def _tokens(agent: Any) -> Tuple[int, int]:
+    counter = getattr(agent, "_token_process", None)
+    if counter is None:
+        return 0, 0
+    return counter.prompt_tokens, counter.completion_tokens
+
+
+@dataclass
+class _Open:
+    t0: float
+    tokens: Tuple[int, int]
+    span: Any = None
+    context_token: Any = None
+    task_token: Any = None
+
+
+_OPEN_TASKS: Dict[int, _Open] = {}
+_AGENTS: Dict[str, Any] = {}  # agent id -> agent; LLM events only carry the id
+_OPEN_LLM = threading.local()  # per-thread stack: LLM calls are synchronous inside a task's thread
+_INSTALLED = False
+
+
+def _task_name(task: Any) -> str:
+    return getattr(task, "name", None) or (getattr(task, "description", "") or "task")[:40]
+
+
+def on_task_started(source: Any, event: Any) -> None:
+    if event.task is not None and get_settings().TELEMETRY_ENABLED:
+        _task_started(event.task)
+
+
+def _task_started(task: Any) -> None:
+    name = _task_name(task)
+    span = _start_span(f"task {name}", {"task": name, "agent": getattr(task.agent, "role", None)})
+    entry = _Open(time.perf_counter(), _tokens(task.agent), span, _attach(span), _TASK.set(name))
+    with _LOCK:
+        _OPEN_TASKS[id(task)] = entry
+        if getattr(task.agent, "id", None) is not None:
+            _AGENTS[str(task.agent.id)] = task.agent
+
+
+def _task_finished(task: Any, error: Optional[str]) -> None:
+    with _LOCK:
+        entry = _OPEN_TASKS.pop(id(task), None)
+    if entry is None:
+        return
+    name = _task_name(task)
+    seconds = time.perf_counter() - entry.t0
+    prompt, completion = (after - before for after, before in zip(_tokens(task.agent), entry.tokens))
+    TASK_SECONDS.observe(seconds, task=name, status="error" if error else "ok")
+    if entry.span is not None:
+        entry.span.set_attribute("llm.prompt_tokens", prompt)
+        entry.span.set_attribute("llm.completion_tokens", completion)
+    _detach(entry.context_token)
+    try:
+        _TASK.reset(entry.task_token)
+    except ValueError:
+        pass  # finished in a different context than it started
+    _end_span(entry.span, error)
+    _record(Timing("task", name, seconds, ok=error is None, prompt_tokens=prompt, completion_tokens=completion))
+
+
+@contextmanager
+def task_scope(task: Any) -> Iterator[None]:
+    """Time a task that runs outside crewAI, e.g. a flow step that calls its tool directly."""
+    if not get_settings().TELEMETRY_ENABLED:
+        yield
+        return
+    _task_started(task)
+    try:
+        yield
+    except BaseException as e:
+        _task_finished(task, str(e) or type(e).__name__)
+        raise
+    _task_finished(task, None)
+
+
+def on_task_completed(source: Any, event: Any) -> None:
+    if event.task is not None:
+        _task_finished(event.task, None)
+
+
+def on_task_failed(source: Any, event: Any) -> None:
+    if event.task is not None:
+        _task_finished(event.task, event.error or "failed")
+
+
+def on_llm_started(source: Any, event: Any) -> None:
+    if not get_settings().TELEMETRY_ENABLED:
+        return
+    span = _start_span(f"llm {event.model}", {"llm.model": event.model, "task": event.task_name})
+    stack = getattr(_OPEN_LLM, "stack", None)
+    if stack is None:
+        stack = _OPEN_LLM.stack = []
+    stack.append(_Open(time.perf_counter(), _tokens(_AGENTS.get(str(event.agent_id))), span))
+
+
+def _llm_finished(event: Any, error: Optional[str]) -> None:
+    stack = getattr(_OPEN_LLM, "stack", None)
+    if not stack:
+        return
+    entry = stack.pop()
+    agent = _AGENTS.get(str(event.agent_id))
+    model = event.model or getattr(getattr(agent, "llm", None), "model", None) or "unknown"
+    seconds = time.perf_counter() - entry.t0
+    prompt, completion = (after - before for after, before in zip(_tokens(agent), entry.tokens))
+    LLM_SECONDS.observe(seconds, model=model, status="error" if error else "ok")
+    LLM_TOKENS.inc(prompt, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion, model=model, kind="completion")
+    if entry.span is not None:
+        entry.span.set_attribute("llm.prompt_tokens", prompt)
+        entry.span.set_attribute("llm.completion_tokens", completion)
+    _end_span(entry.span, error)
+    _record(Timing("llm", model, seconds, task=event.task_name or _TASK.get(), ok=error is None,
+                   prompt_tokens=prompt, completion_tokens=completion))
+
+
+def on_llm_completed(source: Any, event: Any) -> None:
+    _llm_finished(event, None)
+
+
+def on_llm_failed(source: Any, event: Any) -> None:
+    _llm_finished(event, event.error or "failed")
+
+
+def install() -> None:
+    """Subscribe the task and LLM handlers to crewAI's event bus (once per process)."""
+    global _INSTALLED
+    with _LOCK:
+        if _INSTALLED:
+            return
+        from crewai.events import (
+            LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent,
+            TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent, crewai_event_bus,
+        )
+
+        for event_type, handler in (
+            (TaskStartedEvent, on_task_started),
+            (TaskCompletedEvent, on_task_completed),
+            (TaskFailedEvent, on_task_failed),
+            (LLMCallStartedEvent, on_llm_started),
+            (LLMCallCompletedEvent, on_llm_completed),
+            (LLMCallFailedEvent, on_llm_failed),
+        ):
+            crewai_event_bus.register_handler(event_type, handler)
+        _INSTALLED = True
+
+
+def reset_telemetry() -> None:
+    """Zero every metric and drop the tracer (the next span re-reads the settings)."""
+    global _PROVIDER, _TRACER, _TRACING_READY
+    for metric in REGISTRY:
+        metric.clear()
+    with _LOCK:
+        if _PROVIDER is not None:
+            _PROVIDER.shutdown()
+        _PROVIDER, _TRACER, _TRACING_READY = None, None, False
+        _OPEN_TASKS.clear()
+        _AGENTS.clear()
@@ -1,13 +1,9 @@
-
-from . import (
-    kubectl_tool,
-    argocd_tool,
-    loki_tool,
-    github_issue_tool,
-    cloudflare_dns_tool,
-    openrouter_health_tool,
-    mcp_k8s_tool,
-)
+"""
+Tool modules are imported on first attribute access (PEP 562), so importing
+the package does not pull in every integration and a missing optional
+dependency only fails the tool that needs it.
+"""
+import importlib
 
 __all__ = [
     "kubectl_tool",
@@ -18,3 +14,9 @@ __all__ = [
     "openrouter_health_tool",
     "mcp_k8s_tool",
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
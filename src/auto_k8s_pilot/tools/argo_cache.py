@@ -0,0 +1,287 @@
+"""
+Local Argo CD application state, kept current by the application watch stream.
+
+The fleet is listed once (with the same field projection as fleet_status),
+then `/api/v1/stream/applications` is followed in a daemon thread so
+list_apps/app_status/fleet_status are answered from memory. The snapshot can
+be persisted to a JSON file so a fresh process starts warm. Every change of
+sync/health/operation phase is recorded as an `AppChange` and handed to
+subscribers, which lets a watcher react without a full crew run.
+A connected stream counts as fresh however quiet the fleet is; the fleet
+is only relisted when the stream is down and stale, or after it failed.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from auto_k8s_pilot.http_client import get_http
+from auto_k8s_pilot.tools.argocd_tool import FLEET_FIELDS, iter_apps, state_needs_attention
+
+LIST_FIELDS = FLEET_FIELDS + ",items.metadata.resourceVersion"
+STREAM_FIELDS = "result.type," + ",".join(
+    "result.application." + f[len("items."):] for f in LIST_FIELDS.split(",")
+)
+MAX_CHANGES = 500
+SAVE_INTERVAL = 5.0
+
+State = Tuple[str, str, str]  # (sync, health, operation phase)
+
+
+def app_state(app: Optional[Dict[str, Any]]) -> State:
+    if not app:
+        return ("Deleted", "Deleted", "-")
+    status = app.get("status", {})
+    return (
+        status.get("sync", {}).get("status") or "Unknown",
+        status.get("health", {}).get("status") or "Unknown",
+        (status.get("operationState") or {}).get("phase") or "-",
+    )
+
+
+@dataclass
+class AppChange:
+    seq: int
+    app: str
+    before: State
+    after: State
+    at: float
+
+    @property
+    def degraded(self) -> bool:
+        """True when the app moved into (or further within) a state the incident task cares about."""
+        if self.after[0] == "Deleted" or not state_needs_attention(*self.after):
+            return False
+        return not state_needs_attention(*self.before) or self.after[1] != self.before[1]
+
+    def describe(self) -> str:
+        b, a = self.before, self.after
+        return f"{self.app}: sync {b[0]} -> {a[0]}, health {b[1]} -> {a[1]}, operation {b[2]} -> {a[2]}"
+
+
+class AppStateStore:
+    def __init__(self, base: str, token: str, path: Optional[str] = None, watch_timeout: int = 300):
+        self.base = base.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.path = Path(path) if path else None
+        self.watch_timeout = watch_timeout
+        self.resource_version: Optional[str] = None
+        self.synced_at = 0.0
+        self.watching = False  # the application stream is connected
+        self.lists = 0
+        self.events = 0
+        self._apps: Dict[str, Dict[str, Any]] = {}
+        self._changes: Deque[AppChange] = deque(maxlen=MAX_CHANGES)
+        self._seq = 0
+        self._subscribers: List[Callable[[AppChange], None]] = []
+        self._saved_at = 0.0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if self.path and self.path.exists():
+            self._load()
+
+    # --- persistence --------------------------------------------------------
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        age = max(0.0, time.time() - float(data.get("saved_at") or 0))
+        self._apps = data.get("apps") or {}
+        self.resource_version = data.get("resourceVersion")
+        # monotonic clock equivalent of the snapshot's wall-clock age
+        self.synced_at = time.monotonic() - age
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "saved_at": time.time() - (time.monotonic() - self.synced_at),
+                "resourceVersion": self.resource_version,
+                "apps": self._apps,
+            }
+            self._saved_at = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    # --- change feed --------------------------------------------------------
+    def subscribe(self, callback: Callable[[AppChange], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def changes_since(self, seq: int = 0) -> List[AppChange]:
+        with self._lock:
+            return [c for c in self._changes if c.seq > seq]
+
+    def _record(self, name: str, before: State, after: State) -> Optional[AppChange]:
+        if before == after:
+            return None
+        self._seq += 1
+        change = AppChange(self._seq, name, before, after, time.time())
+        self._changes.append(change)
+        return change
+
+    def _notify(self, changes: List[AppChange]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for change in changes:
+            for cb in subscribers:
+                try:
+                    cb(change)
+                except Exception:
+                    pass  # a failing subscriber must not stop the watch
+
+    # --- list / watch -------------------------------------------------------
+    def relist(self) -> None:
+        apps = {a["metadata"]["name"]: a for a in iter_apps(self.base, self.headers, LIST_FIELDS)}
+        changes = []
+        with self._lock:
+            if self.lists or self._apps:
+                for name in set(self._apps) | set(apps):
+                    c = self._record(name, app_state(self._apps.get(name)), app_state(apps.get(name)))
+                    if c:
+                        changes.append(c)
+            self._apps = apps
+            versions = [a.get("metadata", {}).get("resourceVersion") for a in apps.values()]
+            self.resource_version = max((v for v in versions if v), key=_rv_key, default=None)
+            self.synced_at = time.monotonic()
+            self.lists += 1
+        self.save()
+        self._notify(changes)
+
+    def apply(self, event: Dict[str, Any]) -> Optional[AppChange]:
+        if "error" in event:
+            err = event["error"] or {}
+            raise RuntimeError(err.get("message") or "Argo stream error")
+        result = event.get("result") or event
+        etype, app = result.get("type"), result.get("application") or {}
+        name = app.get("metadata", {}).get("name")
+        if not name:
+            return None
+        with self._lock:
+            before = app_state(self._apps.get(name))
+            if etype == "DELETED":
+                self._apps.pop(name, None)
+            else:
+                self._apps[name] = app
+            rv = app.get("metadata", {}).get("resourceVersion")
+            if rv:
+                self.resource_version = rv
+            self.synced_at = time.monotonic()
+            self.events += 1
+            change = self._record(name, before, app_state(self._apps.get(name)))
+            due = time.monotonic() - self._saved_at > SAVE_INTERVAL
+        if due:
+            self.save()
+        if change:
+            self._notify([change])
+        return change
+
+    def watch_once(self) -> None:
+        """Follow the application stream until the server closes it."""
+        params = {"fields": STREAM_FIELDS}
+        if self.resource_version:
+            params["resourceVersion"] = self.resource_version
+        r = get_http("argocd").get(
+            f"{self.base}/api/v1/stream/applications", headers=self.headers, params=params,
+            verify=False, stream=True, timeout=(10, self.watch_timeout),
+        )
+        with r:
+            r.raise_for_status()
+            self.watching = True
+            try:
+                for line in r.iter_lines(decode_unicode=True):
+                    if self._stop.is_set():
+                        return
+                    if line and line.startswith("data:"):  # server-sent events framing
+                        line = line[5:].strip()
+                    if line:
+                        self.apply(json.loads(line))
+            finally:
+                self.watching = False
+            with self._lock:
+                self.synced_at = time.monotonic()  # current up to the server's close
+
+    def _watch_loop(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                started = time.monotonic()
+                self.watch_once()
+                if time.monotonic() - started > 1.0:
+                    backoff = 1.0
+                else:  # stream closed right away: don't spin on reconnects
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 30.0)
+            except Exception:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                if not self._stop.is_set():
+                    try:
+                        self.relist()  # resync anything missed while disconnected
+                    except Exception:
+                        pass
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="watch-argocd-apps", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.path and self._apps:
+            self.save()
+
+    def ensure_fresh(self, max_staleness: float) -> None:
+        with self._lock:
+            stale = not self._apps or (not self.watching and time.monotonic() - self.synced_at > max_staleness)
+        if stale:
+            self.relist()
+        self.start()
+
+    # --- queries ------------------------------------------------------------
+    def apps(self, project: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [a for _, a in sorted(self._apps.items())
+                    if not project or a.get("spec", {}).get("project") == project]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._apps.get(name)
+
+    def __len__(self) -> int:
+        return len(self._apps)
+
+
+def _rv_key(rv: str) -> Tuple[int, str]:
+    return (int(rv), rv) if rv.isdigit() else (0, rv)
+
+
+_STORES: Dict[str, AppStateStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_app_store(base: str, token: str, path: Optional[str] = None) -> AppStateStore:
+    """Return the shared store for this Argo CD server (one list+stream per process)."""
+    with _STORES_LOCK:
+        store = _STORES.get(base)
+        if store is None:
+            store = _STORES[base] = AppStateStore(base, token, path)
+        return store
+
+
+def reset_app_stores() -> None:
+    with _STORES_LOCK:
+        for s in _STORES.values():
+            s.stop()
+        _STORES.clear()
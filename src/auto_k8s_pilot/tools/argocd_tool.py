@@ -1,25 +1,95 @@
-import requests
-from typing import Type, Literal, Optional
+import codecs
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Type, Literal, Optional
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
-from auto_k8s_pilot.settings import Settings
+from auto_k8s_pilot.aio import OffloadedTool
+from auto_k8s_pilot.facts import Reported
+from auto_k8s_pilot.http_client import get_http
+from auto_k8s_pilot.settings import Settings, get_settings
+from auto_k8s_pilot.telemetry import instrumented
+from auto_k8s_pilot.tools.kube_printers import render_rows
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET, iter_items
+from auto_k8s_pilot.tools.tool_cache import cached_result
+
+# server-side projection: Argo only serializes these paths of each Application
+LIST_FIELDS = "items.metadata.name"
+FLEET_FIELDS = ",".join([
+    "items.metadata.name",
+    "items.spec.project",
+    "items.status.sync.status",
+    "items.status.health.status",
+    "items.status.operationState.phase",
+    "items.status.operationState.message",
+])
+# columns of a fleet row (see _app_row), as the rules read them
+FLEET_COLUMNS = ("app", "project", "sync", "health", "operation", "message")
 
 
 class ArgoInput(BaseModel):
-    op: Literal["list_apps", "app_status", "app_sync"] = Field(..., description="Operation")
+    op: Literal["list_apps", "app_status", "app_sync", "fleet_status"] = Field(..., description="Operation")
     app: Optional[str] = Field(None, description="Application name for status/sync")
+    project: Optional[str] = Field(None, description="fleet_status/list_apps: only apps in this Argo project")
+    selector: Optional[str] = Field(None, description="fleet_status/list_apps: label selector, e.g. team=chat")
+
+
+def _app_row(a: Dict[str, Any]) -> List[str]:
+    status = a.get("status", {})
+    op = status.get("operationState") or {}
+    msg = (op.get("message") or "").replace("\n", " ")
+    return [
+        a.get("metadata", {}).get("name", ""),
+        a.get("spec", {}).get("project") or "",
+        status.get("sync", {}).get("status") or "Unknown",
+        status.get("health", {}).get("status") or "Unknown",
+        op.get("phase") or "-",
+        msg[:80] + ("..." if len(msg) > 80 else ""),
+    ]
+
+
+def state_needs_attention(sync: str, health: str, phase: str) -> bool:
+    return sync != "Synced" or health not in ("Healthy", "Progressing") or phase in ("Failed", "Error")
+
+
+def _needs_attention(row: List[str]) -> bool:
+    return state_needs_attention(row[2], row[3], row[4])
 
 
-class ArgoCDTool(BaseTool):
+def iter_apps(base: str, headers: Dict[str, str], fields: str,
+              project: Optional[str] = None, selector: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the projected application list; items are parsed as they arrive."""
+    params: Dict[str, str] = {"fields": fields}
+    if project:
+        params["projects"] = project
+    if selector:
+        params["selector"] = selector
+    r = get_http("argocd").get(f"{base}/api/v1/applications", headers=headers, params=params,
+                               verify=False, stream=True)
+    with r:
+        r.raise_for_status()
+        yield from iter_items(codecs.iterdecode(r.iter_content(65536), "utf-8"))
+
+
+class ArgoCDTool(OffloadedTool, BaseTool):
     name: str = "argocd_tool"
     description: str = (
-        "Argo CD API wrapper. Read-only by default (list_apps, app_status). "
+        "Argo CD API wrapper. Read-only by default (list_apps, app_status, fleet_status). "
+        "fleet_status lists only the out-of-sync/degraded apps of the whole fleet in one call. "
         "app_sync requires ALLOW_MUTATING=true."
     )
     args_schema: Type[BaseModel] = ArgoInput
 
-    def _run(self, op: str, app: Optional[str] = None) -> str:
-        settings = Settings()
+    @instrumented
+    # reads the watched app store answers (see _run) are already local and fresher than a TTL copy
+    @cached_result(
+        scope=lambda s: s.ARGOCD_BASE_URL,
+        mutating=lambda a: a["op"] == "app_sync",
+        uncacheable=lambda a, s: s.ARGOCD_CACHE_ENABLED and not a["selector"]
+        and (a["op"] in ("list_apps", "fleet_status") or (a["op"] == "app_status" and a["app"])),
+    )
+    def _run(self, op: str, app: Optional[str] = None,
+             project: Optional[str] = None, selector: Optional[str] = None) -> str:
+        settings = get_settings(self.name)
         base = settings.ARGOCD_BASE_URL
         token = settings.ARGOCD_API_TOKEN
         if not base or not token:
@@ -27,17 +97,24 @@ class ArgoCDTool(BaseTool):
 
         headers = {"Authorization": f"Bearer {token}"}
         allow_mutating = settings.ALLOW_MUTATING
+        http = get_http("argocd")
 
         try:
+            # the snapshot only carries projected fields, so label selectors still go to the API
+            cacheable = op in ("list_apps", "fleet_status") or (op == "app_status" and app)
+            if settings.ARGOCD_CACHE_ENABLED and cacheable and not selector:
+                return self._cached(op, app, project, settings)
             if op == "list_apps":
-                r = requests.get(f"{base}/api/v1/applications", headers=headers, timeout=10, verify=False)
-                r.raise_for_status()
-                items = [a.get("metadata", {}).get("name") for a in r.json().get("items", [])]
-                return "Apps:\n" + "\n".join(items[:100])
+                names = [a.get("metadata", {}).get("name") for a in
+                         iter_apps(base, headers, LIST_FIELDS, project, selector)]
+                return self._list_text(names)
+            elif op == "fleet_status":
+                rows = [_app_row(a) for a in iter_apps(base, headers, FLEET_FIELDS, project, selector)]
+                return self._fleet_text(rows)
             elif op == "app_status":
                 if not app:
                     return "ERROR: 'app' required"
-                r = requests.get(f"{base}/api/v1/applications/{app}", headers=headers, timeout=10, verify=False)
+                r = http.get(f"{base}/api/v1/applications/{app}", headers=headers, verify=False)
                 r.raise_for_status()
                 data = r.json()
                 sync = data.get("status", {}).get("sync", {})
@@ -48,7 +125,7 @@ class ArgoCDTool(BaseTool):
                     return "ERROR: Mutating ops disabled (ALLOW_MUTATING=false)"
                 if not app:
                     return "ERROR: 'app' required"
-                r = requests.post(f"{base}/api/v1/applications/{app}/sync", headers=headers, timeout=10, verify=False)
+                r = http.post(f"{base}/api/v1/applications/{app}/sync", headers=headers, verify=False)
                 r.raise_for_status()
                 return f"Triggered sync for {app}"
             else:
@@ -56,3 +133,51 @@ class ArgoCDTool(BaseTool):
         except Exception as e:
             return f"ERROR: Argo API failed ({e})"
 
+    def _cached(self, op: str, app: Optional[str], project: Optional[str], settings: Settings) -> str:
+        from auto_k8s_pilot.tools.argo_cache import get_app_store  # argo_cache builds on this module
+
+        store = get_app_store(settings.ARGOCD_BASE_URL, settings.ARGOCD_API_TOKEN, settings.ARGOCD_CACHE_FILE)
+        store.ensure_fresh(settings.ARGOCD_CACHE_MAX_STALENESS)
+        if op == "app_status":
+            data = store.get(app)
+            if data is None:
+                return f"ERROR: Argo API failed (application {app} not found)"
+            return f"App: {app}\nSync: {data.get('status', {}).get('sync', {}).get('status')}\n" \
+                   f"Health: {data.get('status', {}).get('health', {}).get('status')}"
+        apps = store.apps(project)
+        if op == "list_apps":
+            return self._list_text([a["metadata"]["name"] for a in apps])
+        return self._fleet_text([_app_row(a) for a in apps])
+
+    @staticmethod
+    def _list_text(names: List[str], budget: int = OUTPUT_BUDGET) -> str:
+        lines, used = [], 0
+        for i, n in enumerate(names):
+            if used + len(n) + 1 > budget:
+                lines.append(f"... {len(names) - i} more ({len(names)} total)")
+                break
+            lines.append(n)
+            used += len(n) + 1
+        return "Apps:\n" + "\n".join(lines)
+
+    @staticmethod
+    def _fleet_text(rows: List[List[str]], budget: int = OUTPUT_BUDGET) -> Reported:
+        sync = Counter(r[2] for r in rows)
+        health = Counter(r[3] for r in rows)
+        bad = sorted((r for r in rows if _needs_attention(r)), key=lambda r: (r[3] == "Healthy", r[1], r[0]))
+        head = [
+            f"Apps: {len(rows)} total | " + " | ".join(f"{k} {v}" for k, v in sync.most_common()),
+            "Health: " + " | ".join(f"{k} {v}" for k, v in health.most_common()),
+            f"Needs attention: {len(bad)}",
+        ]
+        facts = {"attention": [dict(zip(FLEET_COLUMNS, r)) for r in bad]}
+        if not bad:
+            return Reported("\n".join(head), facts)
+        table = render_rows([["NAME", "PROJECT", "SYNC", "HEALTH", "OPERATION", "MESSAGE"]] + bad).split("\n")
+        text, kept = "\n".join(head), 0
+        for line in table:
+            if len(text) + len(line) + 1 > budget - 40:
+                return Reported(text + f"\n... {len(bad) - max(kept - 1, 0)} more apps need attention", facts)
+            text += "\n" + line
+            kept += 1
+        return Reported(text, facts)
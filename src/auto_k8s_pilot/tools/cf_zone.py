@@ -0,0 +1,200 @@
+"""
+Local snapshot of a Cloudflare zone's DNS records.
+
+The zone is paged through once (`per_page=PAGE_SIZE`) and indexed by
+(name, type), so `list` sees every record and `get` is answered from memory
+until the snapshot is older than CLOUDFLARE_SNAPSHOT_MAX_AGE. Upserts are
+diffed against the snapshot and only the differences are sent, in one call
+to the zone's batch endpoint when the account supports it, record by
+record otherwise. Applied changes are written back into the snapshot.
+"""
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from auto_k8s_pilot.http_client import get_http
+
+PAGE_SIZE = 5000
+COMPARED = ("content", "proxied", "ttl")
+
+Key = Tuple[str, str]  # (fqdn, TYPE)
+
+
+def norm_name(name: str) -> str:
+    return name.strip().rstrip(".").lower()
+
+
+def record_line(d: Dict[str, Any], with_id: bool = False) -> str:
+    line = f"{d.get('type')} {d.get('name')} {d.get('content')} proxied={d.get('proxied')} ttl={d.get('ttl')}"
+    return f"{line} id={d.get('id')}" if with_id else line
+
+
+@dataclass
+class ChangeSet:
+    posts: List[Dict[str, Any]] = field(default_factory=list)
+    patches: List[Dict[str, Any]] = field(default_factory=list)  # each carries the existing record's id
+    unchanged: List[Dict[str, Any]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.posts or self.patches)
+
+    def summary(self) -> str:
+        return f"created {len(self.posts)}, updated {len(self.patches)}, unchanged {len(self.unchanged)}"
+
+
+class ZoneSnapshot:
+    def __init__(self, api: str, zone: str, token: str):
+        self.zone = zone
+        self.base = f"{api.rstrip('/')}/zones/{zone}"
+        self.headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self.zone_name: Optional[str] = None
+        self.loaded_at = 0.0
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[Key, List[str]] = defaultdict(list)
+        self._batch_supported = True
+        self._lock = threading.RLock()
+
+    # --- loading ------------------------------------------------------------
+    def refresh(self) -> None:
+        http = get_http("cloudflare")
+        zone_name = self.zone_name
+        if zone_name is None:
+            r = http.get(self.base, headers=self.headers)
+            r.raise_for_status()
+            zone_name = norm_name(r.json().get("result", {}).get("name") or "")
+
+        records: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            r = http.get(f"{self.base}/dns_records", headers=self.headers,
+                         params={"page": page, "per_page": PAGE_SIZE})
+            r.raise_for_status()
+            data = r.json()
+            records += data.get("result") or []
+            info = data.get("result_info") or {}
+            if page >= int(info.get("total_pages") or 1) or not data.get("result"):
+                break
+            page += 1
+
+        with self._lock:
+            self.zone_name = zone_name or None
+            self._records, self._index = {}, defaultdict(list)
+            for d in records:
+                self._put(d)
+            self.loaded_at = time.time()
+
+    def ensure_fresh(self, max_age: float) -> None:
+        if time.time() - self.loaded_at > max_age:
+            self.refresh()
+
+    def _put(self, d: Dict[str, Any]) -> None:
+        old = self._records.get(d["id"])
+        if old is not None:
+            self._index[self._key(old["name"], old["type"])].remove(d["id"])
+        self._records[d["id"]] = d
+        self._index[self._key(d["name"], d["type"])].append(d["id"])
+
+    # --- lookups ------------------------------------------------------------
+    def fqdn(self, name: str) -> str:
+        name = norm_name(name)
+        if name == "@" and self.zone_name:
+            return self.zone_name
+        if self.zone_name and name != self.zone_name and not name.endswith("." + self.zone_name):
+            return f"{name}.{self.zone_name}"
+        return name
+
+    def _key(self, name: str, type: str) -> Key:
+        return (self.fqdn(name), type.upper())
+
+    def lookup(self, name: str, type: Optional[str] = None) -> List[Dict[str, Any]]:
+        fqdn = self.fqdn(name)
+        with self._lock:
+            if type:
+                ids = self._index.get((fqdn, type.upper()), [])
+            else:
+                ids = [i for (n, _), v in self._index.items() if n == fqdn for i in v]
+            return [self._records[i] for i in ids]
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self._records.values(), key=lambda d: (d.get("name", ""), d.get("type", "")))
+
+    # --- changes ------------------------------------------------------------
+    def plan(self, desired: List[Dict[str, Any]]) -> ChangeSet:
+        """
+        Diff wanted records against the snapshot. Records are matched on
+        (name, type, content); a wanted content that does not exist yet
+        reuses a leftover record of the same name and type before a new one
+        is created. Nothing is deleted.
+        """
+        changes = ChangeSet()
+        wanted: Dict[Key, List[Dict[str, Any]]] = defaultdict(list)
+        for rec in desired:
+            rec = {k: v for k, v in rec.items() if v is not None}
+            rec["name"], rec["type"] = self.fqdn(rec["name"]), rec["type"].upper()
+            wanted[(rec["name"], rec["type"])].append(rec)
+
+        for key, recs in wanted.items():
+            existing = self.lookup(*key)
+            by_content = {d.get("content"): d for d in existing}
+            spare = [d for d in existing if d.get("content") not in {r["content"] for r in recs}]
+            for rec in recs:
+                current = by_content.get(rec["content"]) or (spare.pop(0) if spare else None)
+                if current is None:
+                    changes.posts.append(rec)
+                elif all(rec.get(f, current.get(f)) == current.get(f) for f in COMPARED):
+                    changes.unchanged.append(current)
+                else:
+                    changes.patches.append({**rec, "id": current["id"]})
+        return changes
+
+    def apply(self, changes: ChangeSet) -> List[Dict[str, Any]]:
+        """Send the changes; returns the records as Cloudflare stored them."""
+        if not changes:
+            return []
+        http = get_http("cloudflare")
+        stored: List[Dict[str, Any]] = []
+        if self._batch_supported:
+            r = http.post(f"{self.base}/dns_records/batch", headers=self.headers,
+                          json={"posts": changes.posts, "patches": changes.patches})
+            if r.status_code in (404, 405, 501):
+                self._batch_supported = False
+            else:
+                r.raise_for_status()
+                result = r.json().get("result") or {}
+                stored = (result.get("posts") or []) + (result.get("patches") or [])
+        if not self._batch_supported:
+            for rec in changes.posts:
+                r = http.post(f"{self.base}/dns_records", headers=self.headers, json=rec)
+                r.raise_for_status()
+                stored.append(r.json().get("result") or {})
+            for rec in changes.patches:
+                body = {k: v for k, v in rec.items() if k != "id"}
+                r = http.patch(f"{self.base}/dns_records/{rec['id']}", headers=self.headers, json=body)
+                r.raise_for_status()
+                stored.append(r.json().get("result") or {})
+        with self._lock:
+            for d in stored:
+                if d.get("id"):
+                    self._put(d)
+        return stored
+
+
+_SNAPSHOTS: Dict[Tuple[str, str], ZoneSnapshot] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_zone_snapshot(api: str, zone: str, token: str) -> ZoneSnapshot:
+    """Return the shared snapshot for this zone (one full listing per process)."""
+    with _SNAPSHOTS_LOCK:
+        snap = _SNAPSHOTS.get((api, zone))
+        if snap is None:
+            snap = _SNAPSHOTS[(api, zone)] = ZoneSnapshot(api, zone, token)
+        return snap
+
+
+def reset_zone_snapshots() -> None:
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS.clear()
@@ -1,81 +1,157 @@
-import requests
-from typing import Type, Optional, Literal
+from typing import Any, Dict, List, Type, Optional, Literal
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
-from auto_k8s_pilot.settings import Settings
+from auto_k8s_pilot.aio import offload
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import instrumented
+from auto_k8s_pilot.tools.cf_zone import ZoneSnapshot, get_zone_snapshot, record_line
+from auto_k8s_pilot.tools.dns_audit import arun_audit, run_audit
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET
+from auto_k8s_pilot.tools.tool_cache import cached_result
+
+
+class CFRecord(BaseModel):
+    name: str = Field(..., description="Record name (relative or FQDN)")
+    type: str = Field(..., description="DNS type A/AAAA/CNAME/TXT etc.")
+    content: str = Field(..., description="IP/hostname/content")
+    proxied: Optional[bool] = Field(None, description="Proxy through Cloudflare")
+    ttl: Optional[int] = Field(None, description="TTL seconds")
 
 
 class CFInput(BaseModel):
-    op: Literal["list", "get", "upsert"] = Field(..., description="Operation")
+    op: Literal["list", "get", "upsert", "batch_upsert", "audit"] = Field(..., description="Operation")
     name: Optional[str] = Field(None, description="Record name (relative or FQDN)")
     type: Optional[str] = Field(None, description="DNS type A/AAAA/CNAME/TXT etc.")
     content: Optional[str] = Field(None, description="IP/hostname/content")
     proxied: Optional[bool] = Field(None, description="Proxy through Cloudflare")
     ttl: Optional[int] = Field(None, description="TTL seconds")
+    records: Optional[List[CFRecord]] = Field(
+        None, description="batch_upsert: desired records; only differences from the zone are sent"
+    )
+    dry_run: bool = Field(False, description="batch_upsert/upsert: report the planned changes without sending them")
+    context: Optional[str] = Field(
+        None, description="audit: kube context whose Ingress/Gateway/LoadBalancer hosts are checked against the zone"
+    )
+
+
+_CACHE_POLICY = dict(
+    scope=lambda s: (s.CLOUDFLARE_API_URL, s.CLOUDFLARE_ZONE_ID, s.KUBECONFIG),
+    mutating=lambda a: a["op"] in ("upsert", "batch_upsert"),
+)
 
 
 class CloudflareDNSTool(BaseTool):
     name: str = "cloudflare_dns_tool"
-    description: str = "Cloudflare DNS API wrapper (list/get). Upsert requires ALLOW_MUTATING=true."
+    description: str = (
+        "Cloudflare DNS API wrapper (list/get from a zone snapshot; audit = missing, dangling and "
+        "wrong-target records versus the cluster's Ingress/Gateway/LoadBalancer hosts). "
+        "upsert/batch_upsert send only the differences and require ALLOW_MUTATING=true."
+    )
     args_schema: Type[BaseModel] = CFInput
 
-    def _base(self):
-        settings = Settings()
-        token = settings.CLOUDFLARE_API_TOKEN
-        zone = settings.CLOUDFLARE_ZONE_ID
-        if not token or not zone:
-            return None, None, "ERROR: Set CLOUDFLARE_API_TOKEN and CLOUDFLARE_ZONE_ID"
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-        return headers, zone, None
-
+    @instrumented
+    @cached_result(**_CACHE_POLICY)
     def _run(self, op: str, name: Optional[str] = None, type: Optional[str] = None,
-             content: Optional[str] = None, proxied: Optional[bool] = None, ttl: Optional[int] = None) -> str:
-        headers, zone, err = self._base()
-        if err:
-            return err
-        base = f"https://api.cloudflare.com/client/v4/zones/{zone}/dns_records"
+             content: Optional[str] = None, proxied: Optional[bool] = None, ttl: Optional[int] = None,
+             records: Optional[List[Any]] = None, dry_run: bool = False, context: Optional[str] = None) -> str:
+        return self._call(op, name, type, content, proxied, ttl, records, dry_run, context)
 
+    @instrumented
+    @cached_result(**_CACHE_POLICY)
+    async def _arun(self, op: str, name: Optional[str] = None, type: Optional[str] = None,
+                    content: Optional[str] = None, proxied: Optional[bool] = None, ttl: Optional[int] = None,
+                    records: Optional[List[Any]] = None, dry_run: bool = False, context: Optional[str] = None) -> str:
+        """
+        Like `_run`, but the audit awaits its zone and cluster reads on the
+        loop; offloading it whole would park a pool thread on reads queued
+        behind it on the same pool.
+        """
+        if op != "audit":
+            return await offload(self._call, op, name, type, content, proxied, ttl, records, dry_run, context)
+        settings = get_settings(self.name)
+        zone = self._zone(settings)
+        if zone is None:
+            return "ERROR: Set CLOUDFLARE_API_TOKEN and CLOUDFLARE_ZONE_ID"
         try:
+            return await arun_audit(zone, *self._audit_args(settings, context))
+        except Exception as e:
+            return f"ERROR: Cloudflare API failed ({e})"
+
+    @staticmethod
+    def _zone(settings) -> Optional[ZoneSnapshot]:
+        if not settings.CLOUDFLARE_API_TOKEN or not settings.CLOUDFLARE_ZONE_ID:
+            return None
+        return get_zone_snapshot(settings.CLOUDFLARE_API_URL, settings.CLOUDFLARE_ZONE_ID, settings.CLOUDFLARE_API_TOKEN)
+
+    @staticmethod
+    def _audit_args(settings, context: Optional[str]):
+        return (settings.CLOUDFLARE_SNAPSHOT_MAX_AGE, settings.KUBECONFIG or "~/.kube/config",
+                context, int(settings.KUBECTL_TIMEOUT))
+
+    def _call(self, op, name, type, content, proxied, ttl, records, dry_run, context) -> str:
+        settings = get_settings(self.name)
+        zone = self._zone(settings)
+        if zone is None:
+            return "ERROR: Set CLOUDFLARE_API_TOKEN and CLOUDFLARE_ZONE_ID"
+
+        try:
+            if op in ("upsert", "batch_upsert"):
+                if op == "upsert":
+                    if not all([name, type, content]):
+                        return "ERROR: name/type/content required"
+                    desired = [{"name": name, "type": type, "content": content, "proxied": proxied, "ttl": ttl}]
+                else:
+                    if not records:
+                        return "ERROR: 'records' required for batch_upsert"
+                    desired = [r.model_dump() if isinstance(r, BaseModel) else dict(r) for r in records]
+                    if any(not all(r.get(f) for f in ("name", "type", "content")) for r in desired):
+                        return "ERROR: every record needs name/type/content"
+                if not dry_run and not settings.ALLOW_MUTATING:
+                    return "ERROR: Mutating ops disabled (ALLOW_MUTATING=false)"
+                # always diff against current state before writing
+                zone.refresh()
+                return self._upsert(zone, op, desired, dry_run)
+
+            if op == "audit":
+                return run_audit(zone, *self._audit_args(settings, context))
+
+            zone.ensure_fresh(settings.CLOUDFLARE_SNAPSHOT_MAX_AGE)
             if op == "list":
-                r = requests.get(base, headers=headers, timeout=10)
-                r.raise_for_status()
-                data = r.json().get("result", [])
-                lines = [f"{d.get('type')} {d.get('name')} {d.get('content')} proxied={d.get('proxied')} ttl={d.get('ttl')}" for d in data[:100]]
-                return "Records:\n" + "\n".join(lines)
+                return self._list_text(zone.records())
             elif op == "get":
                 if not name:
                     return "ERROR: 'name' required"
-                r = requests.get(base, headers=headers, params={"name": name}, timeout=10)
-                r.raise_for_status()
-                rs = r.json().get("result", [])
+                rs = zone.lookup(name, type)
                 if not rs:
                     return "NOT FOUND"
-                d = rs[0]
-                return f"{d.get('type')} {d.get('name')} {d.get('content')} proxied={d.get('proxied')} ttl={d.get('ttl')} id={d.get('id')}"
-            elif op == "upsert":
-                if not settings.ALLOW_MUTATING:
-                    return "ERROR: Mutating ops disabled (ALLOW_MUTATING=false)"
-                if not all([name, type, content]):
-                    return "ERROR: name/type/content required"
-                r = requests.get(base, headers=headers, params={"name": name, "type": type}, timeout=10)
-                r.raise_for_status()
-                rs = r.json().get("result", [])
-                payload = {"type": type, "name": name, "content": content}
-                if proxied is not None:
-                    payload["proxied"] = proxied
-                if ttl:
-                    payload["ttl"] = ttl
-                if rs:
-                    rec_id = rs[0]["id"]
-                    r = requests.put(f"{base}/{rec_id}", headers=headers, json=payload, timeout=10)
-                    r.raise_for_status()
-                    return f"UPSERT OK: {rec_id}"
-                else:
-                    r = requests.post(base, headers=headers, json=payload, timeout=10)
-                    r.raise_for_status()
-                    return f"UPSERT OK: {r.json().get('result', {}).get('id')}"
+                return "\n".join(record_line(d, with_id=True) for d in rs)
             else:
                 return "ERROR: unsupported op"
         except Exception as e:
             return f"ERROR: Cloudflare API failed ({e})"
 
+    @staticmethod
+    def _upsert(zone: ZoneSnapshot, op: str, desired: List[Dict[str, Any]], dry_run: bool) -> str:
+        changes = zone.plan(desired)
+        if dry_run:
+            lines = [f"PLAN: {changes.summary()}"]
+            lines += [f"+ {record_line(r)}" for r in changes.posts]
+            lines += [f"~ {record_line(r, with_id=True)}" for r in changes.patches]
+            return "\n".join(lines)
+        stored = zone.apply(changes)
+        if op == "upsert":
+            rec = (stored or changes.unchanged)[0]
+            return f"UPSERT OK: {rec.get('id')}" + ("" if stored else " (unchanged)")
+        return f"BATCH OK: {changes.summary()}"
+
+    @staticmethod
+    def _list_text(records: List[Dict[str, Any]], budget: int = OUTPUT_BUDGET) -> str:
+        lines, used = [f"Records: {len(records)}"], 0
+        for i, d in enumerate(records):
+            line = record_line(d)
+            if used + len(line) + 1 > budget:
+                lines.append(f"... {len(records) - i} more ({len(records)} total)")
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
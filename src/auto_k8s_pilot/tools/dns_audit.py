@@ -0,0 +1,258 @@
+"""
+DNS-to-cluster consistency audit.
+
+Collects every host the cluster serves (Ingress rules and TLS hosts,
+Gateway listeners and HTTPRoute hostnames, LoadBalancer Services annotated
+for external-dns) with the addresses it is exposed on, and joins that
+host index against the Cloudflare zone snapshot in one pass:
+
+- missing: a served host inside the zone has no A/AAAA/CNAME record,
+  neither its own nor a covering wildcard (`*.<parent>`)
+- wrong target: the record (after following CNAMEs inside the zone) does
+  not resolve to any address the host is exposed on
+- dangling: a record resolves to a cluster address but nothing in the
+  cluster serves that name (CNAME targets inside the zone are exempt)
+
+Wildcard hosts (`*.apps.<zone>`) are audited like any other name: they
+match a record of the same wildcard name or a wider one, and a served
+wildcard host covers the records below it.
+
+Both sides are fetched concurrently.
+"""
+import asyncio
+import json
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from auto_k8s_pilot.aio import offload, run_sync
+from auto_k8s_pilot.tools.cf_zone import ZoneSnapshot, norm_name
+from auto_k8s_pilot.tools.kube_api import BackendUnavailable, KubeApiError, get_client, resource_path
+from auto_k8s_pilot.tools.kube_printers import render_rows
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET
+
+EXTERNAL_DNS_ANNOTATION = "external-dns.alpha.kubernetes.io/hostname"
+ADDRESS_TYPES = ("A", "AAAA", "CNAME")
+MAX_CNAME_DEPTH = 8
+
+
+@dataclass
+class ClusterHosts:
+    hosts: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))  # host -> addresses
+    sources: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))  # host -> "ingress ns/name"
+    addresses: Set[str] = field(default_factory=set)
+
+    def add(self, host: str, addresses: Iterable[str], source: str) -> None:
+        host = norm_name(host)
+        if not host:
+            return
+        addrs = {norm_name(a) for a in addresses if a}
+        self.hosts[host] |= addrs
+        self.sources[host].add(source)
+        self.addresses |= addrs
+
+
+def _lb_addresses(obj: Dict[str, Any]) -> List[str]:
+    ingress = ((obj.get("status") or {}).get("loadBalancer") or {}).get("ingress") or []
+    return [i.get("ip") or i.get("hostname") for i in ingress]
+
+
+def _ref(obj: Dict[str, Any]) -> str:
+    meta = obj.get("metadata") or {}
+    return f"{meta.get('namespace', '')}/{meta.get('name', '')}"
+
+
+def collect_hosts(objects: Dict[str, List[Dict[str, Any]]]) -> ClusterHosts:
+    """Build the host index from listed ingresses, services, gateways and httproutes."""
+    out = ClusterHosts()
+    for ing in objects.get("ingresses", []):
+        spec, addrs = ing.get("spec") or {}, _lb_addresses(ing)
+        hosts = [r.get("host") for r in spec.get("rules") or []]
+        hosts += [h for t in spec.get("tls") or [] for h in t.get("hosts") or []]
+        for h in hosts:
+            if h:
+                out.add(h, addrs, f"ingress {_ref(ing)}")
+
+    for svc in objects.get("services", []):
+        if (svc.get("spec") or {}).get("type") != "LoadBalancer":
+            continue
+        addrs = _lb_addresses(svc)
+        out.addresses |= {norm_name(a) for a in addrs if a}
+        annotation = ((svc.get("metadata") or {}).get("annotations") or {}).get(EXTERNAL_DNS_ANNOTATION, "")
+        for h in annotation.split(","):
+            if h.strip():
+                out.add(h, addrs, f"service {_ref(svc)}")
+
+    gateways: Dict[str, List[str]] = {}
+    for gw in objects.get("gateways", []):
+        addrs = [a.get("value") for a in (gw.get("status") or {}).get("addresses") or []]
+        gateways[_ref(gw)] = addrs
+        out.addresses |= {norm_name(a) for a in addrs if a}
+        for listener in (gw.get("spec") or {}).get("listeners") or []:
+            if listener.get("hostname"):
+                out.add(listener["hostname"], addrs, f"gateway {_ref(gw)}")
+
+    for route in objects.get("httproutes", []):
+        ns = (route.get("metadata") or {}).get("namespace", "")
+        spec = route.get("spec") or {}
+        addrs = [
+            a for p in spec.get("parentRefs") or []
+            for a in gateways.get(f"{p.get('namespace') or ns}/{p.get('name')}", [])
+        ]
+        for h in spec.get("hostnames") or []:
+            out.add(h, addrs, f"httproute {_ref(route)}")
+    return out
+
+
+def _covering(name: str, zone_name: str) -> Iterable[str]:
+    """`name` itself, then the wildcard names that cover it, closest first, up to the zone apex."""
+    yield name
+    labels = name.split(".")
+    for i in range(1, len(labels)):
+        parent = ".".join(labels[i:])
+        if zone_name and parent != zone_name and not parent.endswith("." + zone_name):
+            break
+        yield "*." + parent
+
+
+@dataclass
+class Finding:
+    kind: str  # missing | wrong_target | dangling
+    name: str
+    record: str
+    expected: str
+    source: str
+
+    def row(self) -> List[str]:
+        return [self.kind, self.name, self.record or "-", self.expected or "-", self.source or "-"]
+
+
+def audit(zone: ZoneSnapshot, cluster: ClusterHosts) -> List[Finding]:
+    """Join the zone's address records against the cluster host index."""
+    records: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for d in zone.records():
+        if d.get("type") in ADDRESS_TYPES:
+            records[norm_name(d["name"])].append(d)
+
+    def resolve(name: str) -> Set[str]:
+        """Final targets of a name, following CNAMEs that stay inside the zone."""
+        seen: Set[str] = set()
+        frontier, final = [name], set()
+        while frontier and len(seen) < MAX_CNAME_DEPTH:
+            n = frontier.pop()
+            if n in seen:
+                continue
+            seen.add(n)
+            for d in records.get(n, []):
+                target = norm_name(d.get("content") or "")
+                final.add(target)
+                if d["type"] == "CNAME" and target in records:
+                    frontier.append(target)
+        return final
+
+    def shown(name: str) -> str:
+        return ", ".join(f"{d['type']} {d.get('content')}" for d in records.get(name, []))
+
+    findings: List[Finding] = []
+    in_zone = zone.zone_name or ""
+    answered: Set[str] = set()  # record names some served host resolves through
+    for host, addrs in sorted(cluster.hosts.items()):
+        if in_zone and host != in_zone and not host.endswith("." + in_zone):
+            continue
+        source = ", ".join(sorted(cluster.sources[host]))
+        name = next((n for n in _covering(host, in_zone) if n in records), None)
+        if name is None:
+            findings.append(Finding("missing", host, "", ", ".join(sorted(addrs)), source))
+            continue
+        answered.add(name)
+        if addrs and not resolve(name) & addrs:
+            findings.append(Finding("wrong_target", host, shown(name), ", ".join(sorted(addrs)), source))
+
+    # names other records alias to (e.g. a shared lb.<zone>) are plumbing, not dangling
+    aliased = {norm_name(d.get("content") or "") for recs in records.values() for d in recs if d["type"] == "CNAME"}
+    for name in sorted(records):
+        if name in answered or name in aliased or any(n in cluster.hosts for n in _covering(name, in_zone)):
+            continue
+        hits = resolve(name) & cluster.addresses
+        if hits:
+            source = f"points at cluster address {', '.join(sorted(hits))}"
+            findings.append(Finding("dangling", name, shown(name), "", source))
+    return findings
+
+
+def render_findings(findings: List[Finding], zone: ZoneSnapshot, cluster: ClusterHosts,
+                    budget: int = OUTPUT_BUDGET) -> str:
+    counts = {k: sum(f.kind == k for f in findings) for k in ("missing", "wrong_target", "dangling")}
+    head = (
+        f"DNS audit: {len(zone.records())} records, {len(cluster.hosts)} cluster hosts | "
+        + " | ".join(f"{k} {v}" for k, v in counts.items())
+    )
+    if not findings:
+        return head + "\nOK: DNS and cluster agree"
+    table = render_rows([["KIND", "NAME", "RECORD", "EXPECTED", "SOURCE"]] + [f.row() for f in findings]).split("\n")
+    lines, used = [head], len(head)
+    for i, line in enumerate(table):
+        if used + len(line) + 1 > budget - 40:
+            lines.append(f"... {len(table) - i} more findings")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+# --- fetching ---------------------------------------------------------------
+AUDITED = {
+    "ingresses": resource_path("ingresses"),
+    "services": resource_path("services"),
+    "gateways": resource_path("gateways"),
+    "httproutes": resource_path("httproutes"),
+}
+# kubectl resolves a bare `gateways` to whichever group it finds first (Istio has one too)
+KUBECTL_KINDS = {
+    "gateways": "gateways.gateway.networking.k8s.io",
+    "httproutes": "httproutes.gateway.networking.k8s.io",
+}
+
+
+def _list_kubectl(kind: str, kubeconfig: str, context: Optional[str], timeout: int) -> List[Dict[str, Any]]:
+    resource = KUBECTL_KINDS.get(kind, kind)
+    cmd = ["kubectl", f"--kubeconfig={kubeconfig}", "get", resource, "-A", "-o", "json", "--ignore-not-found=true"]
+    if context:
+        cmd.insert(2, f"--context={context}")
+    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if proc.returncode != 0:
+        if "the server doesn't have a resource type" in proc.stderr:
+            return []
+        raise RuntimeError(f"kubectl get {resource} exited {proc.returncode}: {proc.stderr.strip()[:500]}")
+    return json.loads(proc.stdout or "{}").get("items") or []
+
+
+def _list(kind: str, kubeconfig: str, context: Optional[str], timeout: int) -> List[Dict[str, Any]]:
+    try:
+        client = get_client(kubeconfig, context)
+    except BackendUnavailable:
+        return _list_kubectl(kind, kubeconfig, context, timeout)
+    try:
+        return client.get_json(AUDITED[kind], timeout=timeout).get("items") or []
+    except KubeApiError as e:
+        if e.status == 404 and kind in ("gateways", "httproutes"):
+            return []  # Gateway API is not installed
+        raise
+
+
+async def arun_audit(zone: ZoneSnapshot, zone_max_age: float, kubeconfig: str,
+                     context: Optional[str] = None, timeout: int = 20) -> str:
+    """Refresh the zone and list every audited kind concurrently, then audit the hosts found."""
+    lists = await asyncio.gather(
+        offload(zone.ensure_fresh, zone_max_age),
+        *(offload(_list, kind, kubeconfig, context, timeout) for kind in AUDITED),
+    )
+    cluster = collect_hosts(dict(zip(AUDITED, lists[1:])))
+    return render_findings(audit(zone, cluster), zone, cluster)
+
+
+def run_audit(zone: ZoneSnapshot, zone_max_age: float, kubeconfig: str,
+              context: Optional[str] = None, timeout: int = 20) -> str:
+    """Sync `arun_audit`; from a coroutine, await `arun_audit` instead."""
+    return run_sync(arun_audit(zone, zone_max_age, kubeconfig, context, timeout))
@@ -1,8 +1,9 @@
-import requests
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 from typing import Type
-from auto_k8s_pilot.settings import Settings
+from auto_k8s_pilot.http_client import get_http
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import instrumented
 
 
 class GitHubIssueInput(BaseModel):
@@ -16,8 +17,9 @@ class GitHubIssueTool(BaseTool):
     description: str = "Create a GitHub issue in a given repository."
     args_schema: Type[BaseModel] = GitHubIssueInput
 
+    @instrumented
     def _run(self, repo: str, title: str, body: str) -> str:
-        settings = Settings()
+        settings = get_settings(self.name)
         token = settings.GITHUB_TOKEN
         if not token:
             return "ERROR: GITHUB_TOKEN is not set."
@@ -25,7 +27,7 @@ class GitHubIssueTool(BaseTool):
         headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
         payload = {"title": title, "body": body}
         try:
-            r = requests.post(url, headers=headers, json=payload, timeout=10)
+            r = get_http("github").post(url, headers=headers, json=payload)
             r.raise_for_status()
             num = r.json().get("number")
             return f"Created issue #{num} in {repo}"
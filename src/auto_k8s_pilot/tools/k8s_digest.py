@@ -0,0 +1,248 @@
+"""
+Fixed-size digests of pod and event lists.
+
+Items are folded in one pass (memory grows with the number of namespaces
+and anomaly groups, not with the number of pods), then rendered into a
+character budget. Anomalies come first: pods with the same
+namespace/owner/reason collapse into one ranked line, the healthy-side
+aggregates only get the room left, and groups that still do not fit are
+counted in a final "... N more groups" line (the header counts them all).
+The rendered text carries every group as facts for the anomaly rules.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from auto_k8s_pilot.facts import Reported
+from auto_k8s_pilot.tools.kube_printers import pod_restarts, pod_status
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET
+
+# reason -> severity used for ranking (higher first)
+SEVERITY = {
+    "OOMKilled": 100,
+    "CrashLoopBackOff": 95,
+    "CreateContainerConfigError": 85,
+    "ImagePullBackOff": 80,
+    "ErrImagePull": 80,
+    "InvalidImageName": 80,
+    "Error": 75,
+    "Failed": 70,
+    "Evicted": 65,
+    "Pending": 60,
+    "NotReady": 50,
+    "Unknown": 50,
+    "HighRestarts": 30,
+}
+RESTART_THRESHOLD = 5
+SAMPLES = 3
+MAX_TRACKED_NAMES = 1000
+
+
+def pod_owner(pod: Dict[str, Any]) -> str:
+    meta = pod.get("metadata", {})
+    refs = meta.get("ownerReferences") or []
+    if not refs:
+        return f"pod/{meta.get('name')}"
+    kind, name = refs[0].get("kind", ""), refs[0].get("name", "")
+    pth = (meta.get("labels") or {}).get("pod-template-hash")
+    if kind == "ReplicaSet" and pth and name.endswith("-" + pth):
+        return f"deployment/{name[: -len(pth) - 1]}"
+    return f"{kind.lower()}/{name}"
+
+
+def pod_anomaly(pod: Dict[str, Any]) -> Optional[str]:
+    """Return the anomaly reason for a pod, or None if it looks healthy."""
+    status = pod.get("status", {})
+    phase = status.get("phase")
+    if phase == "Succeeded":
+        return None
+    for c in status.get("containerStatuses") or []:
+        if (c.get("lastState") or {}).get("terminated", {}).get("reason") == "OOMKilled":
+            return "OOMKilled"
+    reason = pod_status(pod)
+    if reason.startswith("Init:"):
+        reason = reason[5:]
+    if reason in SEVERITY and reason not in ("HighRestarts", "NotReady"):
+        return reason
+    if phase == "Failed":
+        return status.get("reason") or "Failed"
+    if phase == "Running":
+        statuses = status.get("containerStatuses") or []
+        if statuses and not all(c.get("ready") for c in statuses):
+            return "NotReady"
+    if pod_restarts(pod) >= RESTART_THRESHOLD:
+        return "HighRestarts"
+    return None
+
+
+@dataclass
+class _Group:
+    count: int = 0
+    max_restarts: int = 0
+    samples: List[str] = field(default_factory=list)
+    nodes: Counter = field(default_factory=Counter)
+
+
+class PodDigest:
+    def __init__(self):
+        self.total = 0
+        self.phases: Counter = Counter()
+        self.namespaces: Counter = Counter()
+        self.ns_anomalous: Counter = Counter()
+        self.owners: Counter = Counter()
+        self.groups: Dict[Tuple[str, str, str], _Group] = {}
+
+    def add(self, pod: Dict[str, Any]) -> None:
+        meta = pod.get("metadata", {})
+        ns = meta.get("namespace", "")
+        self.total += 1
+        self.phases[pod.get("status", {}).get("phase") or "Unknown"] += 1
+        self.namespaces[ns] += 1
+        owner = pod_owner(pod)
+        self.owners[(ns, owner)] += 1
+
+        reason = pod_anomaly(pod)
+        if reason is None:
+            return
+        self.ns_anomalous[ns] += 1
+        g = self.groups.setdefault((ns, owner, reason), _Group())
+        g.count += 1
+        g.max_restarts = max(g.max_restarts, pod_restarts(pod))
+        if len(g.samples) < SAMPLES:
+            g.samples.append(meta.get("name", ""))
+        node = pod.get("spec", {}).get("nodeName")
+        if node:
+            g.nodes[node] += 1
+
+    def ranked(self) -> List[Tuple[Tuple[str, str, str], _Group]]:
+        return sorted(
+            self.groups.items(),
+            key=lambda kv: (-SEVERITY.get(kv[0][2], 40), -kv[1].count, -kv[1].max_restarts, kv[0]),
+        )
+
+    @property
+    def anomalies(self) -> int:
+        return sum(g.count for g in self.groups.values())
+
+    def facts(self) -> Dict[str, Any]:
+        return {"groups": [{"reason": reason, "namespace": ns, "owner": owner, "pods": g.count,
+                            "restarts": g.max_restarts} for (ns, owner, reason), g in self.ranked()]}
+
+    def render(self, budget: int = OUTPUT_BUDGET) -> str:
+        head = [
+            f"Pods: {self.total} total | " + " | ".join(f"{p} {n}" for p, n in self.phases.most_common()),
+            f"Anomalies: {self.anomalies} pods in {len(self.groups)} groups",
+        ]
+        lines = []
+        for (ns, owner, reason), g in self.ranked():
+            where = ""
+            if g.nodes:
+                top = ", ".join(n for n, _ in g.nodes.most_common(2))
+                where = f" on {top}" + (" +more" if len(g.nodes) > 2 else "")
+            lines.append(
+                f"- [{reason}] {ns}/{owner}: {g.count} pod(s), restarts max {g.max_restarts}{where}; "
+                f"e.g. {', '.join(g.samples)}"
+            )
+
+        text = "\n".join(head + _groups_within(lines, budget - len("\n".join(head))))
+        ns_lines = [f"{ns}: {n} pods, {self.ns_anomalous[ns]} anomalous" for ns, n in self.namespaces.most_common()]
+        owner_lines = [f"{ns}/{o}: {n}" for (ns, o), n in self.owners.most_common()]
+        text = _append_within(text, "Namespaces:", ns_lines, budget)
+        return _append_within(text, "Top owners (pods):", owner_lines, budget)
+
+
+_POD_SUFFIX = re.compile(r"-(?:[a-z0-9]{6,10}-)?[a-z0-9]{5}$")
+
+
+@dataclass
+class _EventGroup:
+    count: int = 0
+    last: str = ""
+    message: str = ""
+    samples: List[str] = field(default_factory=list)
+    names: set = field(default_factory=set)
+
+
+class EventDigest:
+    def __init__(self):
+        self.total = 0
+        self.types: Counter = Counter()
+        self.normal_reasons: Counter = Counter()
+        self.groups: Dict[Tuple[str, str, str, str], _EventGroup] = {}
+
+    def add(self, ev: Dict[str, Any]) -> None:
+        self.total += 1
+        etype = ev.get("type") or "Normal"
+        self.types[etype] += 1
+        if etype == "Normal":
+            self.normal_reasons[ev.get("reason") or ""] += 1
+            return
+        obj = ev.get("involvedObject", {})
+        kind, name = (obj.get("kind") or "").lower(), obj.get("name", "")
+        base = _POD_SUFFIX.sub("-*", name) if kind == "pod" else name
+        key = (ev.get("reason") or "", ev.get("metadata", {}).get("namespace", ""), f"{kind}/{base}", etype)
+        g = self.groups.setdefault(key, _EventGroup())
+        g.count += int(ev.get("count") or 1)
+        if len(g.names) < MAX_TRACKED_NAMES:
+            g.names.add(name)
+        if name not in g.samples and len(g.samples) < SAMPLES:
+            g.samples.append(name)
+        last = ev.get("lastTimestamp") or ev.get("eventTime") or ""
+        if last >= g.last:
+            g.last = last
+            g.message = (ev.get("message") or "").strip().replace("\n", " ")[:160]
+
+    def ranked(self) -> List[Tuple[Tuple[str, str, str, str], _EventGroup]]:
+        return sorted(self.groups.items(), key=lambda kv: (-kv[1].count, kv[0]))
+
+    def facts(self) -> Dict[str, Any]:
+        return {"groups": [{"reason": reason, "namespace": ns, "object": obj, "count": g.count,
+                            "message": g.message} for (reason, ns, obj, _), g in self.ranked()]}
+
+    def render(self, budget: int = OUTPUT_BUDGET) -> str:
+        head = [
+            f"Events: {self.total} total | " + " | ".join(f"{t} {n}" for t, n in self.types.most_common()),
+            f"Warning groups: {len(self.groups)}",
+        ]
+        lines = []
+        for (reason, ns, obj, _), g in self.ranked():
+            n = f"{len(g.names)}+" if len(g.names) >= MAX_TRACKED_NAMES else str(len(g.names))
+            objs = f", {n} objects e.g. {', '.join(g.samples)}" if len(g.names) > 1 else ""
+            lines.append(f"- [{reason}] {ns}/{obj} x{g.count} (last {g.last or '?'}{objs}): {g.message}")
+        normal = [f"{r}: {n}" for r, n in self.normal_reasons.most_common()]
+        text = "\n".join(head + _groups_within(lines, budget - len("\n".join(head))))
+        return _append_within(text, "Normal reasons:", normal, budget)
+
+
+def _groups_within(lines: List[str], room: int) -> List[str]:
+    """The ranked group lines that fit in `room`, then how many more there are."""
+    if sum(len(line) + 1 for line in lines) <= room:
+        return lines
+    room -= 30  # the "... N more groups" line
+    for i, line in enumerate(lines):
+        room -= len(line) + 1
+        if room < 0:
+            return lines[:i] + [f"... {len(lines) - i} more groups"]
+    return lines
+
+
+def _append_within(text: str, title: str, lines: List[str], budget: int) -> str:
+    room = budget - len(text) - len(title) - 2
+    kept = []
+    for line in lines:
+        if room - len(line) - 1 < 0:
+            kept.append(f"... {len(lines) - len(kept)} more")
+            break
+        kept.append(line)
+        room -= len(line) + 1
+    if not kept or kept[0].startswith("... "):
+        return text
+    return text + f"\n{title}\n" + "\n".join(kept)
+
+
+def digest_items(kind: str, items: Iterable[Dict[str, Any]], budget: int = OUTPUT_BUDGET) -> Reported:
+    d = EventDigest() if kind.lower() in ("events", "event", "ev") else PodDigest()
+    for item in items:
+        d.add(item)
+    return Reported(d.render(budget), d.facts())
@@ -0,0 +1,449 @@
+"""
+Native Kubernetes API backend for KubectlTool.
+
+Keeps one authenticated, connection-pooled HTTP session per (kubeconfig, context)
+instead of forking `kubectl` for every call. Credentials are resolved with the
+official `kubernetes` client (optional dependency); requests go through a pooled
+`requests.Session`. Anything the backend does not cover raises
+`BackendUnavailable` so the caller can fall back to the kubectl subprocess.
+"""
+import codecs
+import datetime as dt
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+
+from auto_k8s_pilot.tools.k8s_digest import digest_items
+from auto_k8s_pilot.tools.kube_printers import ROW_PRINTERS, render_objects, render_rows
+from auto_k8s_pilot.tools.kube_stream import iter_items, project_item, render_records, strip_item
+from auto_k8s_pilot.tools.pod_logs import parse_duration
+
+try:  # optional: pip install kubernetes
+    from kubernetes import client as k8s_client, config as k8s_config
+    from kubernetes.utils import parse_quantity
+except ImportError:  # pragma: no cover - exercised only without the extra
+    k8s_client = k8s_config = parse_quantity = None
+
+
+class BackendUnavailable(Exception):
+    """The API backend cannot serve this request; use the kubectl subprocess."""
+
+
+class KubeApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+# plural -> (group, version, namespaced, singular)
+RESOURCES: Dict[str, Tuple[str, str, bool, str]] = {
+    "pods": ("", "v1", True, "pod"),
+    "services": ("", "v1", True, "service"),
+    "configmaps": ("", "v1", True, "configmap"),
+    "secrets": ("", "v1", True, "secret"),
+    "events": ("", "v1", True, "event"),
+    "endpoints": ("", "v1", True, "endpoints"),
+    "persistentvolumeclaims": ("", "v1", True, "persistentvolumeclaim"),
+    "serviceaccounts": ("", "v1", True, "serviceaccount"),
+    "nodes": ("", "v1", False, "node"),
+    "namespaces": ("", "v1", False, "namespace"),
+    "persistentvolumes": ("", "v1", False, "persistentvolume"),
+    "deployments": ("apps", "v1", True, "deployment"),
+    "statefulsets": ("apps", "v1", True, "statefulset"),
+    "daemonsets": ("apps", "v1", True, "daemonset"),
+    "replicasets": ("apps", "v1", True, "replicaset"),
+    "jobs": ("batch", "v1", True, "job"),
+    "cronjobs": ("batch", "v1", True, "cronjob"),
+    "ingresses": ("networking.k8s.io", "v1", True, "ingress"),
+    "horizontalpodautoscalers": ("autoscaling", "v2", True, "horizontalpodautoscaler"),
+    "gateways": ("gateway.networking.k8s.io", "v1", True, "gateway"),
+    "httproutes": ("gateway.networking.k8s.io", "v1", True, "httproute"),
+}
+
+ALIASES = {
+    "po": "pods", "svc": "services", "cm": "configmaps", "ev": "events", "ep": "endpoints",
+    "pvc": "persistentvolumeclaims", "sa": "serviceaccounts", "no": "nodes", "ns": "namespaces",
+    "pv": "persistentvolumes", "deploy": "deployments", "sts": "statefulsets", "ds": "daemonsets",
+    "rs": "replicasets", "cj": "cronjobs", "ing": "ingresses", "hpa": "horizontalpodautoscalers",
+    "gtw": "gateways",
+}
+ALIASES.update({singular: plural for plural, (_, _, _, singular) in RESOURCES.items()})
+
+# outputs that consume the item stream instead of a whole document
+STREAM_OUTPUTS = ("json", "compact", "digest")
+TABLE_ACCEPT = "application/json;as=Table;v=v1;g=meta.k8s.io,application/json"
+RESTART_ANNOTATION = "kubectl.kubernetes.io/restartedAt"
+
+
+def resolve_kind(kind: str) -> str:
+    plural = kind.lower()
+    plural = ALIASES.get(plural, plural)
+    if plural not in RESOURCES:
+        raise BackendUnavailable(f"kind '{kind}' is not mapped for the API backend")
+    return plural
+
+
+def all_namespaces(namespace: Optional[str]) -> bool:
+    return namespace in (None, "", "all")
+
+
+def render_list(kind: str, output: str, items: Iterable[Dict[str, Any]]) -> str:
+    """Consume a (possibly lazy) stream of list items for one of STREAM_OUTPUTS."""
+    if output == "digest":
+        return digest_items(kind, items)
+    return render_records(items, project=project_item if output == "compact" else strip_item)
+
+
+class KubeApiClient:
+    """Pooled HTTP session bound to one kubeconfig context."""
+
+    def __init__(self, kubeconfig: Optional[str], context: Optional[str] = None, pool_size: int = 16):
+        if k8s_config is None:
+            raise BackendUnavailable("python 'kubernetes' package is not installed")
+        cfg = k8s_client.Configuration()
+        try:
+            k8s_config.load_kube_config(
+                config_file=kubeconfig, context=context,
+                client_configuration=cfg, persist_config=False,
+            )
+        except Exception as e:
+            raise BackendUnavailable(f"cannot load kubeconfig ({e})")
+        self._cfg = cfg
+        self.host = cfg.host.rstrip("/")
+
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        if cfg.verify_ssl:
+            s.verify = cfg.ssl_ca_cert or True
+        else:
+            s.verify = False
+        if cfg.cert_file:
+            s.cert = (cfg.cert_file, cfg.key_file) if cfg.key_file else cfg.cert_file
+        self.session = s
+
+    def _headers(self, accept: str, content_type: Optional[str]) -> Dict[str, str]:
+        h = {"Accept": accept}
+        token = self._cfg.get_api_key_with_prefix("BearerToken", alias="authorization")
+        if token:
+            h["Authorization"] = token
+        elif self._cfg.username:
+            h["Authorization"] = self._cfg.get_basic_auth_token()
+        if content_type:
+            h["Content-Type"] = content_type
+        return h
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Any = None,
+        accept: str = "application/json",
+        content_type: Optional[str] = None,
+        timeout: Optional[float] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        data = json.dumps(body) if body is not None else None
+        r = self.session.request(
+            method, self.host + path, params=params, data=data,
+            headers=self._headers(accept, content_type), timeout=timeout, stream=stream,
+        )
+        if r.status_code >= 400:
+            try:
+                message = r.json().get("message") or r.reason
+            except ValueError:
+                message = r.text[:500] or r.reason
+            r.close()
+            raise KubeApiError(r.status_code, message)
+        return r
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, **kw) -> Dict[str, Any]:
+        return self.request("GET", path, params=params, **kw).json()
+
+
+_CLIENTS: Dict[Tuple[str, Optional[str]], KubeApiClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(kubeconfig: Optional[str], context: Optional[str] = None) -> KubeApiClient:
+    """Return the shared client for (kubeconfig, context), creating it once."""
+    path = os.path.expanduser(kubeconfig) if kubeconfig else None
+    key = (path or "", context)
+    with _CLIENTS_LOCK:
+        c = _CLIENTS.get(key)
+        if c is None:
+            c = _CLIENTS[key] = KubeApiClient(path, context)
+        return c
+
+
+def list_contexts(kubeconfig: Optional[str]) -> List[str]:
+    """Context names in a kubeconfig (or an os.pathsep-separated list of them)."""
+    names: List[str] = []
+    for path in (kubeconfig or "~/.kube/config").split(os.pathsep):
+        try:
+            with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except OSError:
+            continue
+        names += [c["name"] for c in data.get("contexts") or [] if c.get("name") not in names]
+    return names
+
+
+def reset_clients() -> None:
+    with _CLIENTS_LOCK:
+        for c in _CLIENTS.values():
+            c.session.close()
+        _CLIENTS.clear()
+
+
+def resource_path(plural: str, namespace: Optional[str] = None, name: Optional[str] = None,
+                  subresource: Optional[str] = None) -> str:
+    group, version, namespaced, _ = RESOURCES[plural]
+    p = f"/api/{version}" if not group else f"/apis/{group}/{version}"
+    if namespaced and namespace:
+        p += f"/namespaces/{namespace}"
+    p += f"/{plural}"
+    if name:
+        p += f"/{name}"
+    if subresource:
+        p += f"/{subresource}"
+    return p
+
+
+def _cell(v: Any) -> str:
+    if v is None or v == "":
+        return "<none>"
+    if isinstance(v, list):
+        return ",".join(str(x) for x in v) or "<none>"
+    return str(v)
+
+
+def render_table(table: Dict[str, Any], with_namespace: bool) -> str:
+    """Render a meta.k8s.io Table like `kubectl get -o wide --no-headers`."""
+    rows = []
+    for row in table.get("rows", []):
+        cells = [_cell(c) for c in row.get("cells", [])]
+        if with_namespace:
+            ns = (row.get("object") or {}).get("metadata", {}).get("namespace", "")
+            cells.insert(0, ns)
+        rows.append(cells)
+    return render_rows(rows)
+
+
+def _strip_managed(obj: Dict[str, Any]) -> Dict[str, Any]:
+    obj.get("metadata", {}).pop("managedFields", None)
+    for item in obj.get("items", []) or []:
+        item.get("metadata", {}).pop("managedFields", None)
+    return obj
+
+
+class KubeApiBackend:
+    """Serves KubectlTool actions through the Kubernetes API."""
+
+    def __init__(self, client: KubeApiClient, timeout: Optional[float] = None,
+                 cache_staleness: Optional[float] = None):
+        self.client = client
+        self.timeout = timeout
+        # seconds a cached snapshot may lag behind the server; None disables the cache
+        self.cache_staleness = cache_staleness
+
+    def run(self, action: str, kind: Optional[str] = None, name: Optional[str] = None,
+            namespace: Optional[str] = None, selector: Optional[str] = None,
+            container: Optional[str] = None, tail: int = 200, output: str = "wide",
+            node: Optional[str] = None, since: Optional[str] = None, previous: bool = False) -> str:
+        try:
+            if action == "get":
+                return self.get(kind, name, namespace, selector, output, node)
+            if action == "describe":
+                return self.describe(kind, name, namespace, selector)
+            if action == "top":
+                return self.top(kind, name, namespace, selector)
+            if action == "logs":
+                return self.logs(name, namespace, selector, container, tail, since, previous)
+            if action == "rollout_restart":
+                return self.rollout_restart(kind, name, namespace)
+            if action in ("cordon", "uncordon"):
+                return self.cordon(name, action == "cordon")
+        except KubeApiError as e:
+            return f"ERROR: kubernetes API {e.status}: {e.message[:4000]}"
+        except requests.RequestException as e:
+            return f"ERROR: execution failed ({e})"
+        raise BackendUnavailable(f"action '{action}' is not served by the API backend")
+
+    def _list_params(self, selector: Optional[str]) -> Dict[str, Any]:
+        return {"labelSelector": selector} if selector else {}
+
+    def get(self, kind, name, namespace, selector, output, node=None) -> str:
+        plural = resolve_kind(kind)
+        namespaced = RESOURCES[plural][2]
+        ns = None if all_namespaces(namespace) else namespace
+        if name and namespaced and ns is None:
+            ns = "default"
+
+        if self.cache_staleness is not None and plural in ROW_PRINTERS:
+            return self._get_cached(plural, name, ns, selector, output, node)
+
+        path = resource_path(plural, ns, name)
+        params = {} if name else self._list_params(selector)
+        if node and not name:
+            params["fieldSelector"] = f"spec.nodeName={node}"
+
+        if output == "wide":
+            try:
+                table = self.client.get_json(path, params, accept=TABLE_ACCEPT, timeout=self.timeout)
+            except KubeApiError as e:
+                if e.status == 404 and name:
+                    return ""
+                raise
+            return render_table(table, with_namespace=namespaced and ns is None)
+
+        if output in STREAM_OUTPUTS and not name:
+            with self.client.request("GET", path, params, timeout=self.timeout, stream=True) as r:
+                chunks = codecs.iterdecode(r.iter_content(65536), "utf-8")
+                return render_list(plural, output, iter_items(chunks))
+
+        try:
+            data = self.client.get_json(path, params, timeout=self.timeout)
+        except KubeApiError as e:
+            if e.status == 404 and name:
+                return ""
+            raise
+        if output == "compact":
+            return json.dumps(project_item(data), ensure_ascii=False)
+        if output == "name":
+            group, _, _, singular = RESOURCES[plural]
+            prefix = f"{singular}.{group}" if group else singular
+            items = [data] if name else data.get("items", [])
+            return "\n".join(f"{prefix}/{i['metadata']['name']}" for i in items)
+        data = _strip_managed(data)
+        if output == "yaml":
+            return yaml.safe_dump(data, sort_keys=False)
+        return json.dumps(data, ensure_ascii=False)
+
+    def _get_cached(self, plural, name, ns, selector, output, node) -> str:
+        from auto_k8s_pilot.tools.kube_cache import get_store  # kube_cache builds on this module
+
+        store = get_store(self.client, plural)
+        store.ensure_fresh(self.cache_staleness)
+        objs = store.select(namespace=ns, name=name, selector=selector, node=node)
+        namespaced = RESOURCES[plural][2]
+        if output == "wide":
+            return render_objects(plural, objs, with_namespace=namespaced and ns is None)
+        if output == "name":
+            group, _, _, singular = RESOURCES[plural]
+            prefix = f"{singular}.{group}" if group else singular
+            return "\n".join(f"{prefix}/{o['metadata']['name']}" for o in objs)
+        if name and not objs:
+            return ""
+        if output in STREAM_OUTPUTS:
+            if name:
+                return json.dumps(project_item(objs[0]) if output == "compact" else objs[0], ensure_ascii=False)
+            return render_list(plural, output, objs)
+        data = objs[0] if name else {"kind": "List", "apiVersion": "v1", "items": objs}
+        if output == "yaml":
+            return yaml.safe_dump(data, sort_keys=False)
+
+    def describe(self, kind, name, namespace, selector) -> str:
+        """YAML rendering of the object(s) followed by their recent events."""
+        plural = resolve_kind(kind)
+        namespaced = RESOURCES[plural][2]
+        ns = None if all_namespaces(namespace) else namespace
+        if name:
+            objs = [self.client.get_json(resource_path(plural, ns or ("default" if namespaced else None), name),
+                                         timeout=self.timeout)]
+        else:
+            objs = self.client.get_json(resource_path(plural, ns), self._list_params(selector),
+                                        timeout=self.timeout).get("items", [])
+        blocks = []
+        for obj in objs:
+            meta = _strip_managed(obj).get("metadata", {})
+            field_sel = f"involvedObject.name={meta.get('name')}"
+            if meta.get("namespace"):
+                field_sel += f",involvedObject.namespace={meta['namespace']}"
+            events = self.client.get_json(resource_path("events", meta.get("namespace")),
+                                          {"fieldSelector": field_sel}, timeout=self.timeout).get("items", [])
+            ev_rows = [[e.get("type") or "", e.get("reason") or "", str(e.get("count") or 1),
+                        (e.get("message") or "").strip()] for e in events[-20:]]
+            blocks.append(yaml.safe_dump(obj, sort_keys=False).rstrip()
+                          + "\nEvents:\n" + (render_rows(ev_rows) or "<none>"))
+        return "\n---\n".join(blocks)
+
+    def top(self, kind, name, namespace, selector) -> str:
+        if parse_quantity is None:
+            raise BackendUnavailable("python 'kubernetes' package is not installed")
+        base = "/apis/metrics.k8s.io/v1beta1"
+        if kind == "nodes":
+            path = f"{base}/nodes" + (f"/{name}" if name else "")
+            data = self.client.get_json(path, timeout=self.timeout)
+            metrics = [data] if name else data.get("items", [])
+            nodes = self.client.get_json(resource_path("nodes"), timeout=self.timeout).get("items", [])
+            alloc = {n["metadata"]["name"]: n.get("status", {}).get("allocatable", {}) for n in nodes}
+            rows = [["NAME", "CPU(cores)", "CPU%", "MEMORY(bytes)", "MEMORY%"]]
+            for m in metrics:
+                n = m["metadata"]["name"]
+                cpu = parse_quantity(m["usage"]["cpu"])
+                mem = parse_quantity(m["usage"]["memory"])
+                a = alloc.get(n, {})
+                cpu_pct = f"{int(cpu * 100 / parse_quantity(a['cpu']))}%" if a.get("cpu") else "<unknown>"
+                mem_pct = f"{int(mem * 100 / parse_quantity(a['memory']))}%" if a.get("memory") else "<unknown>"
+                rows.append([n, f"{int(cpu * 1000)}m", cpu_pct, f"{int(mem / 1024 ** 2)}Mi", mem_pct])
+            return render_rows(rows)
+
+        ns = None if all_namespaces(namespace) else namespace
+        path = f"{base}" + (f"/namespaces/{ns}" if ns else "") + "/pods" + (f"/{name}" if name else "")
+        data = self.client.get_json(path, {} if name else self._list_params(selector), timeout=self.timeout)
+        metrics = [data] if name else data.get("items", [])
+        rows = [(["NAMESPACE"] if ns is None else []) + ["NAME", "CPU(cores)", "MEMORY(bytes)"]]
+        for m in metrics:
+            cpu = sum(parse_quantity(c["usage"]["cpu"]) for c in m.get("containers", []))
+            mem = sum(parse_quantity(c["usage"]["memory"]) for c in m.get("containers", []))
+            row = [m["metadata"]["name"], f"{int(cpu * 1000)}m", f"{int(mem / 1024 ** 2)}Mi"]
+            if ns is None:
+                row.insert(0, m["metadata"].get("namespace", ""))
+            rows.append(row)
+        return render_rows(rows)
+
+    def logs(self, name, namespace, selector, container, tail, since=None, previous=False) -> str:
+        ns = None if all_namespaces(namespace) else namespace
+        if name:
+            targets = [(ns or "default", name)]
+        else:
+            pods = self.client.get_json(resource_path("pods", ns), self._list_params(selector),
+                                        timeout=self.timeout).get("items", [])
+            targets = [(p["metadata"]["namespace"], p["metadata"]["name"]) for p in pods]
+        params = {"tailLines": tail}
+        if container:
+            params["container"] = container
+        if since:
+            params["sinceSeconds"] = parse_duration(since)
+        if previous:
+            params["previous"] = "true"
+        out = []
+        for pod_ns, pod in targets:
+            r = self.client.request("GET", resource_path("pods", pod_ns, pod, "log"), params,
+                                    accept="*/*", timeout=self.timeout)
+            out.append(r.text)
+        return "".join(out)
+
+    def rollout_restart(self, kind, name, namespace) -> str:
+        plural = resolve_kind(kind)
+        ns = "default" if all_namespaces(namespace) else namespace
+        now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat()
+        patch = {"spec": {"template": {"metadata": {"annotations": {RESTART_ANNOTATION: now}}}}}
+        self.client.request("PATCH", resource_path(plural, ns, name), body=patch,
+                            content_type="application/strategic-merge-patch+json", timeout=self.timeout)
+        group, _, _, singular = RESOURCES[plural]
+        return f"{singular}.{group}/{name} restarted"
+
+    def cordon(self, name, unschedulable: bool) -> str:
+        self.client.request("PATCH", resource_path("nodes", name=name), body={"spec": {"unschedulable": unschedulable}},
+                            content_type="application/strategic-merge-patch+json", timeout=self.timeout)
+        return f"node/{name} {'cordoned' if unschedulable else 'uncordoned'}"
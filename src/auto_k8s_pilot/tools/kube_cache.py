@@ -0,0 +1,324 @@
+"""
+Informer-style snapshot cache for the Kubernetes API backend.
+
+Each resource kind is listed once (paged), then kept current with a
+resourceVersion watch running in a daemon thread. Objects are indexed by
+namespace, node (pods) and label so `get` calls are answered locally.
+A connected watch counts as fresh, however quiet the cluster is; once it
+is down and the last event is older than the staleness bound, the next
+read relists synchronously. A relist supersedes the watch stream opened
+before it: that stream's remaining events are dropped and the watch
+resumes from the relisted resourceVersion.
+"""
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from auto_k8s_pilot.tools.kube_api import KubeApiClient, KubeApiError, resource_path
+
+Key = Tuple[str, str]  # (namespace, name)
+
+_REQ = re.compile(
+    r"^\s*(?P<neg>!)?(?P<key>[A-Za-z0-9_./-]+)\s*"
+    r"(?:(?P<op>==|=|!=)\s*(?P<val>[A-Za-z0-9_.-]*)|\s+(?P<setop>in|notin)\s*\((?P<vals>[^)]*)\))?\s*$"
+)
+
+
+def _split_selector(selector: str) -> List[str]:
+    parts, depth, cur = [], 0, ""
+    for ch in selector:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(cur)
+            cur = ""
+        else:
+            cur += ch
+    if cur.strip():
+        parts.append(cur)
+    return parts
+
+
+def parse_selector(selector: Optional[str]) -> Tuple[Callable[[Dict[str, str]], bool], List[Tuple[str, str]]]:
+    """
+    Compile a label selector (=, ==, !=, in, notin, key, !key).
+
+    Returns the matcher plus the equality requirements, which the store
+    uses to narrow candidates through its label index.
+    """
+    if not selector:
+        return (lambda labels: True), []
+    checks: List[Callable[[Dict[str, str]], bool]] = []
+    equals: List[Tuple[str, str]] = []
+    for part in _split_selector(selector):
+        m = _REQ.match(part)
+        if not m:
+            raise ValueError(f"invalid label selector: {part.strip()!r}")
+        key, op, val, setop = m.group("key"), m.group("op"), m.group("val"), m.group("setop")
+        if m.group("neg"):
+            checks.append(lambda l, k=key: k not in l)
+        elif op in ("=", "=="):
+            equals.append((key, val))
+            checks.append(lambda l, k=key, v=val: l.get(k) == v)
+        elif op == "!=":
+            checks.append(lambda l, k=key, v=val: l.get(k) != v)
+        elif setop:
+            vals = {v.strip() for v in m.group("vals").split(",") if v.strip()}
+            if setop == "in":
+                checks.append(lambda l, k=key, vs=vals: l.get(k) in vs)
+            else:
+                checks.append(lambda l, k=key, vs=vals: l.get(k) not in vs)
+        else:
+            checks.append(lambda l, k=key: k in l)
+    return (lambda labels: all(c(labels) for c in checks)), equals
+
+
+class Gone(Exception):
+    """The watch resourceVersion is too old (HTTP 410); a relist is needed."""
+
+
+class ResourceStore:
+    def __init__(self, client: KubeApiClient, plural: str, page_size: int = 500, watch_timeout: int = 60):
+        self.client = client
+        self.plural = plural
+        self.page_size = page_size
+        self.watch_timeout = watch_timeout
+        self.resource_version: Optional[str] = None
+        self.synced_at = 0.0
+        self.watching = False  # a watch stream is connected
+        self.generation = 0    # bumped by relist; older watch streams are stale
+        self._response: Any = None
+        self.lists = 0
+        self.events = 0
+        self._items: Dict[Key, Dict[str, Any]] = {}
+        self._by_ns: Dict[str, Set[Key]] = {}
+        self._by_node: Dict[str, Set[Key]] = {}
+        self._by_label: Dict[Tuple[str, str], Set[Key]] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- index maintenance --------------------------------------------------
+    @staticmethod
+    def _key(obj: Dict[str, Any]) -> Key:
+        meta = obj.get("metadata", {})
+        return meta.get("namespace", ""), meta["name"]
+
+    def _index(self, key: Key, obj: Dict[str, Any], add: bool) -> None:
+        def upd(index: Dict[Any, Set[Key]], k: Any) -> None:
+            if add:
+                index.setdefault(k, set()).add(key)
+            elif k in index:
+                index[k].discard(key)
+                if not index[k]:
+                    del index[k]
+
+        upd(self._by_ns, key[0])
+        node = obj.get("spec", {}).get("nodeName")
+        if node:
+            upd(self._by_node, node)
+        for lk, lv in (obj.get("metadata", {}).get("labels") or {}).items():
+            upd(self._by_label, (lk, lv))
+
+    def _put(self, obj: Dict[str, Any]) -> None:
+        obj.get("metadata", {}).pop("managedFields", None)
+        key = self._key(obj)
+        old = self._items.get(key)
+        if old is not None:
+            self._index(key, old, add=False)
+        self._items[key] = obj
+        self._index(key, obj, add=True)
+
+    def _delete(self, obj: Dict[str, Any]) -> None:
+        key = self._key(obj)
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._index(key, old, add=False)
+
+    # --- list / watch -------------------------------------------------------
+    def relist(self) -> None:
+        items: List[Dict[str, Any]] = []
+        params: Dict[str, Any] = {"limit": self.page_size}
+        while True:
+            page = self.client.get_json(resource_path(self.plural), params)
+            items.extend(page.get("items", []))
+            cont = page.get("metadata", {}).get("continue")
+            if not cont:
+                break
+            params = {"limit": self.page_size, "continue": cont}
+        with self._lock:
+            self._items.clear()
+            self._by_ns.clear()
+            self._by_node.clear()
+            self._by_label.clear()
+            for obj in items:
+                self._put(obj)
+            self.resource_version = page.get("metadata", {}).get("resourceVersion")
+            self.synced_at = time.monotonic()
+            self.generation += 1
+            self.watching = False
+            self.lists += 1
+            superseded, self._response = self._response, None
+        if superseded is not None:
+            superseded.close()  # unblocks the watch thread, which resumes from the new resourceVersion
+
+    def apply(self, event: Dict[str, Any], generation: Optional[int] = None) -> None:
+        """Apply one watch event; events of a stream opened before the last relist are dropped."""
+        etype, obj = event.get("type"), event.get("object") or {}
+        if etype == "ERROR":
+            if obj.get("code") == 410:
+                raise Gone(obj.get("message", "resourceVersion too old"))
+            raise KubeApiError(obj.get("code") or 500, obj.get("message", "watch error"))
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if etype in ("ADDED", "MODIFIED"):
+                self._put(obj)
+            elif etype == "DELETED":
+                self._delete(obj)
+            rv = obj.get("metadata", {}).get("resourceVersion")
+            if rv:
+                self.resource_version = rv
+            self.synced_at = time.monotonic()
+            self.events += 1
+
+    def watch_once(self) -> None:
+        """
+        Stream watch events from the current resourceVersion until the server
+        closes it, or until a relist makes this stream's position stale.
+        """
+        with self._lock:
+            generation = self.generation
+            params = {
+                "watch": "1", "resourceVersion": self.resource_version,
+                "allowWatchBookmarks": "true", "timeoutSeconds": self.watch_timeout,
+            }
+        try:
+            r = self.client.request("GET", resource_path(self.plural), params, stream=True,
+                                    timeout=(10, self.watch_timeout + 10))
+        except KubeApiError as e:
+            if e.status == 410:
+                raise Gone(e.message)
+            raise
+        with r:
+            with self._lock:
+                if generation != self.generation:
+                    return
+                self.watching, self._response = True, r
+            try:
+                for line in r.iter_lines():
+                    if self._stop.is_set() or generation != self.generation:
+                        return
+                    if line:
+                        self.apply(json.loads(line), generation)
+            except Exception:
+                if generation != self.generation:
+                    return  # closed by a relist
+                raise
+            finally:
+                with self._lock:
+                    if generation == self.generation:
+                        self.watching, self._response = False, None
+        with self._lock:
+            if generation == self.generation:
+                self.synced_at = time.monotonic()
+
+    def _watch_loop(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self.watch_once()
+                backoff = 1.0
+            except Gone:
+                try:
+                    self.relist()
+                except Exception:
+                    self._stop.wait(backoff)
+            except Exception:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name=f"watch-{self.plural}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self.watching = False
+
+    def ensure_fresh(self, max_staleness: float) -> None:
+        with self._lock:
+            stale = self.resource_version is None or (
+                not self.watching and time.monotonic() - self.synced_at > max_staleness
+            )
+        if stale:
+            self.relist()
+        self.start()
+
+    # --- queries ------------------------------------------------------------
+    def select(
+        self,
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        selector: Optional[str] = None,
+        node: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        match, equals = parse_selector(selector)
+        with self._lock:
+            if name is not None:
+                if namespace is not None:
+                    obj = self._items.get((namespace, name))
+                    candidates = {(namespace, name)} if obj is not None else set()
+                else:
+                    candidates = {k for k in self._items if k[1] == name}
+            else:
+                candidates = None
+                narrowing = []
+                if namespace is not None:
+                    narrowing.append(self._by_ns.get(namespace, set()))
+                if node is not None:
+                    narrowing.append(self._by_node.get(node, set()))
+                narrowing += [self._by_label.get(eq, set()) for eq in equals]
+                for s in sorted(narrowing, key=len):
+                    candidates = set(s) if candidates is None else candidates & s
+                if candidates is None:
+                    candidates = set(self._items)
+            out = []
+            for key in sorted(candidates):
+                obj = self._items[key]
+                if node is not None and obj.get("spec", {}).get("nodeName") != node:
+                    continue
+                if match(obj.get("metadata", {}).get("labels") or {}):
+                    out.append(obj)
+            return out
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_STORES: Dict[Tuple[int, str], ResourceStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(client: KubeApiClient, plural: str) -> ResourceStore:
+    """Return the shared store for this client and kind (one list+watch per process)."""
+    with _STORES_LOCK:
+        store = _STORES.get((id(client), plural))
+        if store is None:
+            store = _STORES[(id(client), plural)] = ResourceStore(client, plural)
+        return store
+
+
+def reset_stores() -> None:
+    with _STORES_LOCK:
+        for s in _STORES.values():
+            s.stop()
+        _STORES.clear()
@@ -0,0 +1,142 @@
+"""
+Helpers that turn raw Kubernetes objects into kubectl-like text.
+
+Shared by the API backend and the snapshot cache; the latter cannot use the
+server-side Table rendering because it only holds raw objects.
+"""
+import datetime as dt
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def render_rows(rows: Iterable[List[str]]) -> str:
+    rows = list(rows)
+    if not rows:
+        return ""
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    return "\n".join("   ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip() for r in rows)
+
+
+def _parse_ts(ts: Optional[str]) -> Optional[dt.datetime]:
+    if not ts:
+        return None
+    try:
+        return dt.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def age(ts: Optional[str], now: Optional[dt.datetime] = None) -> str:
+    t = _parse_ts(ts)
+    if t is None:
+        return "<unknown>"
+    now = now or dt.datetime.now(dt.timezone.utc)
+    secs = max(0, int((now - t).total_seconds()))
+    if secs < 120:
+        return f"{secs}s"
+    if secs < 7200:
+        return f"{secs // 60}m"
+    if secs < 48 * 3600:
+        return f"{secs // 3600}h"
+    return f"{secs // 86400}d"
+
+
+def pod_restarts(pod: Dict[str, Any]) -> int:
+    return sum(int(c.get("restartCount") or 0) for c in pod.get("status", {}).get("containerStatuses") or [])
+
+
+def pod_ready(pod: Dict[str, Any]) -> str:
+    statuses = pod.get("status", {}).get("containerStatuses") or []
+    total = len(pod.get("spec", {}).get("containers") or []) or len(statuses)
+    ready = sum(1 for c in statuses if c.get("ready"))
+    return f"{ready}/{total}"
+
+
+def pod_status(pod: Dict[str, Any]) -> str:
+    """The STATUS column of `kubectl get pods` (waiting/terminated reason wins over phase)."""
+    if pod.get("metadata", {}).get("deletionTimestamp"):
+        return "Terminating"
+    status = pod.get("status", {})
+    reason = status.get("reason") or status.get("phase") or "Unknown"
+    for c in status.get("initContainerStatuses") or []:
+        state = c.get("state") or {}
+        if state.get("terminated", {}).get("exitCode", 0) != 0:
+            return "Init:" + (state["terminated"].get("reason") or "Error")
+        if state.get("waiting", {}).get("reason") not in (None, "PodInitializing"):
+            return "Init:" + state["waiting"]["reason"]
+    for c in status.get("containerStatuses") or []:
+        state = c.get("state") or {}
+        if state.get("waiting", {}).get("reason"):
+            reason = state["waiting"]["reason"]
+        elif state.get("terminated", {}).get("reason"):
+            reason = state["terminated"]["reason"]
+    return reason
+
+
+def _pod_row(p: Dict[str, Any]) -> List[str]:
+    return [
+        p["metadata"]["name"], pod_ready(p), pod_status(p), str(pod_restarts(p)),
+        age(p["metadata"].get("creationTimestamp")),
+        p.get("status", {}).get("podIP") or "<none>",
+        p.get("spec", {}).get("nodeName") or "<none>",
+    ]
+
+
+def _event_row(e: Dict[str, Any]) -> List[str]:
+    obj = e.get("involvedObject", {})
+    last = e.get("lastTimestamp") or e.get("eventTime") or e["metadata"].get("creationTimestamp")
+    return [
+        age(last), e.get("type") or "", e.get("reason") or "",
+        f"{(obj.get('kind') or '').lower()}/{obj.get('name', '')}",
+        (e.get("message") or "").strip().replace("\n", " "),
+    ]
+
+
+def _node_row(n: Dict[str, Any]) -> List[str]:
+    conds = {c["type"]: c["status"] for c in n.get("status", {}).get("conditions") or []}
+    status = "Ready" if conds.get("Ready") == "True" else "NotReady"
+    if n.get("spec", {}).get("unschedulable"):
+        status += ",SchedulingDisabled"
+    labels = n["metadata"].get("labels") or {}
+    roles = ",".join(sorted(k.split("/", 1)[1] for k in labels if k.startswith("node-role.kubernetes.io/"))) or "<none>"
+    addrs = {a["type"]: a["address"] for a in n.get("status", {}).get("addresses") or []}
+    return [
+        n["metadata"]["name"], status, roles, age(n["metadata"].get("creationTimestamp")),
+        n.get("status", {}).get("nodeInfo", {}).get("kubeletVersion", ""),
+        addrs.get("InternalIP", "<none>"),
+    ]
+
+
+def _deployment_row(d: Dict[str, Any]) -> List[str]:
+    st = d.get("status", {})
+    return [
+        d["metadata"]["name"],
+        f"{st.get('readyReplicas') or 0}/{d.get('spec', {}).get('replicas', 0)}",
+        str(st.get("updatedReplicas") or 0), str(st.get("availableReplicas") or 0),
+        age(d["metadata"].get("creationTimestamp")),
+    ]
+
+
+def _generic_row(o: Dict[str, Any]) -> List[str]:
+    return [o["metadata"]["name"], age(o["metadata"].get("creationTimestamp"))]
+
+
+ROW_PRINTERS: Dict[str, Callable[[Dict[str, Any]], List[str]]] = {
+    "pods": _pod_row,
+    "events": _event_row,
+    "nodes": _node_row,
+    "deployments": _deployment_row,
+}
+
+
+def render_objects(plural: str, objs: List[Dict[str, Any]], with_namespace: bool) -> str:
+    """Render objects like `kubectl get <plural> -o wide --no-headers`."""
+    printer = ROW_PRINTERS.get(plural, _generic_row)
+    if plural == "events":
+        objs = sorted(objs, key=lambda e: e.get("lastTimestamp") or e.get("eventTime") or "")
+    rows = []
+    for o in objs:
+        row = printer(o)
+        if with_namespace:
+            row.insert(0, o["metadata"].get("namespace", ""))
+        rows.append(row)
+    return render_rows(rows)
@@ -0,0 +1,202 @@
+"""
+Incremental parsing of large Kubernetes list documents.
+
+`ItemScanner` pulls the entries of the top-level `items` array out of a
+JSON list as chunks arrive (kubectl stdout or an API response body), so the
+whole document never has to sit in memory. `render_records` writes items
+into a character budget and tells the caller when to stop reading.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from auto_k8s_pilot.tools.kube_printers import pod_restarts, pod_status
+
+OUTPUT_BUDGET = 4000
+
+_WS = re.compile(r"[\s,]*")
+_TOKEN = re.compile(r'[{}\[\]"]')
+_STR_TOKEN = re.compile(r'["\\]')
+_DECODER = json.JSONDecoder()
+
+
+class ItemScanner:
+    """Feed text chunks, get back the complete `items[]` entries seen so far."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._top_array = False
+        # (start, resume at, depth, in string) of a value that did not decode yet
+        self._scan: Optional[Tuple[int, int, int, bool]] = None
+
+    def _skip(self) -> None:
+        self._pos = _WS.match(self._buf, self._pos).end()
+
+    def _decode(self) -> Tuple[bool, Any]:
+        pending = self._scan is not None and self._scan[0] == self._pos
+        if pending and not self._complete():
+            return False, None  # still incomplete: only the new data was scanned
+        try:
+            value, end = _DECODER.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if self._buf[self._pos] not in '{["':
+                return False, None  # a literal cut by the chunk: wait for more data
+            if pending or self._complete():
+                raise ValueError(f"invalid JSON at offset {e.pos}") from None
+            return False, None  # incomplete: wait for more data
+        self._pos = end
+        return True, value
+
+    def _complete(self) -> bool:
+        """
+        Whether the object, array or string at `_pos` has fully arrived. The
+        scan resumes where the last call stopped, so a value spread over many
+        chunks is scanned once instead of re-decoded from its start per chunk.
+        """
+        if self._scan is not None and self._scan[0] == self._pos:
+            start, i, depth, in_str = self._scan
+        else:
+            start, i, depth, in_str = self._pos, self._pos, 0, False
+        while True:
+            m = (_STR_TOKEN if in_str else _TOKEN).search(self._buf, i)
+            if m is None:
+                self._scan = (start, max(i, len(self._buf)), depth, in_str)
+                return False
+            c, i = m.group(), m.end()
+            if in_str:
+                if c == "\\":
+                    i += 1  # skip the escaped character
+                    continue
+                in_str = False
+                if depth == 0:
+                    break
+            elif c == '"':
+                in_str = True
+            elif c in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+        self._scan = None
+        return True
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buf += chunk
+        items: List[Dict[str, Any]] = []
+        while True:
+            self._skip()
+            if self._pos >= len(self._buf):
+                break
+            ch = self._buf[self._pos]
+            if self._state == "start":
+                if ch == "{":
+                    self._state = "key"
+                elif ch == "[":
+                    self._state, self._top_array = "array", True
+                else:
+                    raise ValueError("expected a JSON object or array")
+                self._pos += 1
+            elif self._state == "key":
+                if ch == "}":
+                    self._state = "done"
+                    self._pos += 1
+                    continue
+                mark = self._pos
+                ok, key = self._decode()
+                if not ok:
+                    break
+                self._skip()
+                if self._pos >= len(self._buf):
+                    self._pos = mark
+                    break
+                if self._buf[self._pos] != ":":
+                    raise ValueError("expected ':' after object key")
+                self._pos += 1
+                self._state = "items" if key == "items" else "value"
+            elif self._state == "items":
+                if ch != "[":
+                    self._state = "value"
+                    continue
+                self._state = "array"
+                self._pos += 1
+            elif self._state == "value":
+                ok, _ = self._decode()
+                if not ok:
+                    break
+                self._state = "key"
+            elif self._state == "array":
+                if ch == "]":
+                    self._state = "done" if self._top_array else "key"
+                    self._pos += 1
+                    continue
+                ok, item = self._decode()
+                if not ok:
+                    break
+                items.append(item)
+            else:  # done
+                self._pos = len(self._buf)
+        if self._pos > 65536:
+            if self._scan is not None:
+                start, i, depth, in_str = self._scan
+                self._scan = (start - self._pos, i - self._pos, depth, in_str)
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        return items
+
+
+def iter_items(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    scanner = ItemScanner()
+    for chunk in chunks:
+        yield from scanner.feed(chunk)
+
+
+def _false_conditions(obj: Dict[str, Any]) -> List[str]:
+    return [c.get("type") for c in obj.get("status", {}).get("conditions") or [] if c.get("status") != "True"]
+
+
+def project_item(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact record with only the fields the health tasks read."""
+    meta = obj.get("metadata", {})
+    rec: Dict[str, Any] = {"name": meta.get("name")}
+    if meta.get("namespace"):
+        rec["namespace"] = meta["namespace"]
+    if "containers" in obj.get("spec", {}):  # pod
+        status = pod_status(obj)
+        rec["phase"] = obj.get("status", {}).get("phase")
+        if status != rec["phase"]:
+            rec["reason"] = status
+        rec["restarts"] = pod_restarts(obj)
+        rec["node"] = obj.get("spec", {}).get("nodeName")
+    rec["conditions"] = _false_conditions(obj)
+    return rec
+
+
+def strip_item(obj: Dict[str, Any]) -> Dict[str, Any]:
+    obj.get("metadata", {}).pop("managedFields", None)
+    return obj
+
+
+def render_records(
+    items: Iterable[Dict[str, Any]],
+    budget: int = OUTPUT_BUDGET,
+    project: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = project_item,
+) -> str:
+    """
+    One JSON record per line until `budget` characters are used.
+
+    Stops consuming `items` as soon as the budget is full, so callers that
+    pass a lazy stream stop reading from the source at the same point.
+    """
+    lines: List[str] = []
+    used = 0
+    for n, item in enumerate(items):
+        line = json.dumps(project(item) if project else item, ensure_ascii=False, separators=(",", ":"))
+        if used + len(line) + 1 > budget:
+            lines.append(f"... truncated: output budget reached after {n} items")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
@@ -1,8 +1,17 @@
-import subprocess, json
-from typing import Type, Optional, Literal
+import asyncio, subprocess, json, tempfile, threading, time
+from fnmatch import fnmatchcase
+from typing import Dict, List, Type, Optional, Literal
 from pydantic import BaseModel, Field, validator
 from crewai.tools import BaseTool
-from auto_k8s_pilot.settings import Settings
+from auto_k8s_pilot.aio import offload, run_sync
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import KUBECTL_SECONDS, instrumented, timed
+from auto_k8s_pilot.tools.kube_api import (
+    STREAM_OUTPUTS, BackendUnavailable, KubeApiBackend, get_client, list_contexts, render_list,
+)
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET, iter_items, project_item
+from auto_k8s_pilot.tools.pod_logs import MAX_SOURCES, LogFilter, collect, log_sources, parse_duration, render
+from auto_k8s_pilot.tools.tool_cache import cached_result
 
 
 class KubectlInput(BaseModel):
@@ -14,14 +23,109 @@ class KubectlInput(BaseModel):
     namespace: Optional[str] = Field(None, description="Kubernetes namespace, defaults to env DEFAULT_NAMESPACE")
     selector: Optional[str] = Field(None, description='Label selector, e.g. app=web')
     container: Optional[str] = Field(None, description='Container name for logs')
-    tail: int = Field(200, description="Lines for logs")
-    output: Literal["wide", "yaml", "json", "name"] = Field("wide", description="kubectl -o format")
+    tail: int = Field(200, description="Lines for logs (per pod/container with output=digest)")
+    since: Optional[str] = Field(None, description="logs: only lines newer than this duration, e.g. 10m or 1h")
+    previous: bool = Field(False, description="logs: the previous (crashed) container instance")
+    grep: Optional[str] = Field(None, description="logs: keep only lines matching this regex")
+    level: Optional[Literal["error", "warn"]] = Field(
+        None, description="logs: keep only error lines ('warn' = warnings and errors)"
+    )
+    output: Literal["wide", "yaml", "json", "name", "compact", "digest"] = Field(
+        "wide",
+        description="kubectl -o format; 'compact' = one JSON record per item "
+                    "(name, namespace, phase, restarts, node, conditions); "
+                    "'digest' = aggregated pods/events summary that ranks anomalies first and counts them all; "
+                    "for logs, 'digest' = read every matching pod and container concurrently and report "
+                    "per-pod error counts plus the latest lines merged by time",
+    )
     limit: int = Field(200, description="Max items for get (server-side)")
     context: Optional[str] = Field(None, description="Kube context override")
+    contexts: Optional[List[str]] = Field(
+        None,
+        description="Fan out a read action to several kube contexts at once; names or globs, e.g. ['prod-*']. "
+                    "Results are merged and tagged by cluster",
+    )
+    node: Optional[str] = Field(None, description="Only pods scheduled on this node (get pods)")
 
     @validator("namespace", always=True)
     def default_ns(cls, v):
-        return v or SETTINGS.DEFAULT_NAMESPACE
+        return v or get_settings().DEFAULT_NAMESPACE
+
+
+MUTATING_ACTIONS = ("rollout_restart", "cordon", "uncordon")
+ROW_OUTPUTS = ("wide", "name")
+
+
+def match_contexts(patterns: List[str], available: List[str]) -> List[str]:
+    """Contexts matching any of the names or globs, in kubeconfig order."""
+    return [c for c in available if any(fnmatchcase(c, p) for p in patterns)]
+
+
+def merge_cluster_outputs(results: Dict[str, str], tabular: bool, budget: int = OUTPUT_BUDGET) -> str:
+    """
+    One report for a fan-out: rows prefixed with a CLUSTER column (sections
+    for non-tabular output) cut to the output budget, then a summary and
+    every cluster that failed, which are always kept.
+    """
+    ok = {c: out for c, out in results.items() if not out.startswith("ERROR")}
+    failed = {c: out for c, out in results.items() if c not in ok}
+    # a cluster's output at the per-call cap ends mid-row; drop that row and say so
+    cut = [c for c, out in ok.items() if len(out) >= OUTPUT_BUDGET]
+    footer = [f"Clusters: {len(ok)}/{len(results)} ok"]
+    if cut:
+        footer.append(f"Cut at the per-cluster limit: {', '.join(cut)}")
+    footer += [f"FAILED {ctx}: {err.removeprefix('ERROR: ')[:300]}" for ctx, err in failed.items()]
+    room = budget - sum(len(line) + 1 for line in footer) - 40
+
+    lines: List[str] = []
+    if tabular:
+        width = max([len("CLUSTER")] + [len(c) for c in ok])
+        header, rows = None, []
+        for ctx, out in ok.items():
+            own = [r for r in out.splitlines() if r.strip()]
+            if ctx in cut:
+                own = own[:-1]
+            if own and own[0].split()[0] in ("NAME", "NAMESPACE"):
+                header = header or own[0]
+                own = own[1:]
+            rows += [f"{ctx.ljust(width)}   {r}" for r in own]
+        if header:
+            lines.append(f"{'CLUSTER'.ljust(width)}   {header}")
+            room -= len(lines[0]) + 1
+        for i, row in enumerate(rows):
+            if room - len(row) - 1 < 0:
+                lines.append(f"... {len(rows) - i} more rows")
+                break
+            lines.append(row)
+            room -= len(row) + 1
+    else:
+        sections = [f"=== {ctx} ===\n" + (out.strip() or "(no output)") for ctx, out in ok.items()]
+        for i, section in enumerate(sections):
+            if room - len(section) - 1 < 0:
+                if not lines:  # always show the first cluster, cut to the room left
+                    lines.append(section[:max(0, room)])
+                    i += 1
+                if i < len(sections):
+                    lines.append(f"... {len(sections) - i} more clusters")
+                break
+            lines.append(section)
+            room -= len(section) + 1
+    text = "\n".join(lines + footer)
+    return text if ok else f"ERROR: all {len(results)} clusters failed\n{text}"
+
+
+_CACHE_POLICY = dict(
+    scope=lambda s: (s.KUBECONFIG, s.KUBECTL_BACKEND),
+    mutating=lambda a: a["action"] in MUTATING_ACTIONS,
+    # the watched snapshot is already local and fresher than a TTL copy of it;
+    # a fan-out is cached per cluster by the calls it makes
+    uncacheable=lambda a, s: bool(a["contexts"])
+    or (a["action"] == "get" and s.KUBECTL_BACKEND == "api" and s.KUBE_CACHE_ENABLED),
+)
+
+
+def _kubeconfig(settings) -> str:
+    return settings.KUBECONFIG or "~/.kube/config"
 
 
 class KubectlTool(BaseTool):
@@ -33,6 +137,8 @@ class KubectlTool(BaseTool):
     )
     args_schema: Type[BaseModel] = KubectlInput
 
+    @instrumented
+    @cached_result(**_CACHE_POLICY)
     def _run(
         self,
         action: str,
@@ -45,30 +151,138 @@ class KubectlTool(BaseTool):
         output: str = "wide",
         limit: int = 200,
         context: Optional[str] = None,
+        node: Optional[str] = None,
+        contexts: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        previous: bool = False,
+        grep: Optional[str] = None,
+        level: Optional[str] = None,
     ) -> str:
-        settings = Settings()
-        allow_mutating = settings.ALLOW_MUTATING
-        mutating_actions = {"rollout_restart", "cordon", "uncordon"}
-        if action in mutating_actions and not allow_mutating:
-            return "ERROR: Mutating actions are disabled. Set ALLOW_MUTATING=true to enable."
+        call = dict(action=action, kind=kind, name=name, namespace=namespace, selector=selector,
+                    container=container, tail=tail, output=output, limit=limit, context=context, node=node,
+                    since=since, previous=previous, grep=grep, level=level)
+        settings = get_settings(self.name)
+        if contexts:
+            return run_sync(self._fan_out(call, contexts, settings))
+        cmd = self._command(settings, **call)
+        if isinstance(cmd, str):
+            return cmd
+        return self._execute(cmd, settings, call)
 
-        kubeconfig = settings.KUBECONFIG or "~/.kube/config"
-        base = ["kubectl", f"--kubeconfig={kubeconfig}"]
+    @instrumented
+    @cached_result(**_CACHE_POLICY)
+    async def _arun(
+        self,
+        action: str,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        selector: Optional[str] = None,
+        container: Optional[str] = None,
+        tail: int = 200,
+        output: str = "wide",
+        limit: int = 200,
+        context: Optional[str] = None,
+        node: Optional[str] = None,
+        contexts: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        previous: bool = False,
+        grep: Optional[str] = None,
+        level: Optional[str] = None,
+    ) -> str:
+        """Like `_run`, but kubectl runs as an asyncio subprocess so several calls overlap."""
+        call = dict(action=action, kind=kind, name=name, namespace=namespace, selector=selector,
+                    container=container, tail=tail, output=output, limit=limit, context=context, node=node,
+                    since=since, previous=previous, grep=grep, level=level)
+        settings = get_settings(self.name)
+        if contexts:
+            return await self._fan_out(call, contexts, settings)
+        cmd = self._command(settings, **call)
+        if isinstance(cmd, str):
+            return cmd
+        if settings.KUBECTL_BACKEND == "api" or self._streams(call) or self._multiplexed(call):
+            # pooled API client / incremental JSON parsing / the log pool are blocking; keep them off the loop
+            return await offload(self._execute, cmd, settings, call)
+
+        timeout = int(settings.KUBECTL_TIMEOUT)
+        with timed(KUBECTL_SECONDS, f"kubectl {action}", action=action, backend="subprocess"):
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+            except Exception as e:
+                return f"ERROR: execution failed ({e})"
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return f"ERROR: execution failed (kubectl timed out after {timeout}s)"
+        return self._finish(proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace"),
+                            _kubeconfig(settings), output, self._log_filter(call))
+
+    @staticmethod
+    def _streams(call: Dict) -> bool:
+        return call["action"] == "get" and call["output"] in STREAM_OUTPUTS and not call["name"]
+
+    @staticmethod
+    def _multiplexed(call: Dict) -> bool:
+        return call["action"] == "logs" and call["output"] == "digest"
+
+    @staticmethod
+    def _log_filter(call: Dict) -> Optional[LogFilter]:
+        if call["action"] != "logs" or not (call["grep"] or call["level"]):
+            return None
+        return LogFilter(call["grep"], call["level"])
+
+    @staticmethod
+    def _base(settings, context: Optional[str] = None) -> List[str]:
+        base = ["kubectl", f"--kubeconfig={_kubeconfig(settings)}"]
         if context:
             base += [f"--context={context}"]
+        return base
+
+    @staticmethod
+    def _command(
+        settings,
+        action: str,
+        kind: Optional[str] = None,
+        name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        selector: Optional[str] = None,
+        container: Optional[str] = None,
+        tail: int = 200,
+        output: str = "wide",
+        limit: int = 200,
+        context: Optional[str] = None,
+        node: Optional[str] = None,
+        since: Optional[str] = None,
+        previous: bool = False,
+        grep: Optional[str] = None,
+        level: Optional[str] = None,
+    ):
+        """The kubectl argv for a call, or an ERROR string if the call is not allowed."""
+        if action in MUTATING_ACTIONS and not settings.ALLOW_MUTATING:
+            return "ERROR: Mutating actions are disabled. Set ALLOW_MUTATING=true to enable."
+
+        base = KubectlTool._base(settings, context)
 
         ns_flag = ["-A"] if namespace in (None, "", "all") else ["-n", namespace]
         cmd = base[:]
         if action == "get":
             if not kind:
                 return "ERROR: 'kind' is required for action=get"
+            if output == "digest" and (name or kind not in ("pods", "pod", "po", "events", "event", "ev")):
+                return "ERROR: output=digest needs a pods or events list (no 'name')"
             cmd += ["get", kind]
             if name:
                 cmd += [name]
             if selector:
                 cmd += ["-l", selector]
-            cmd += ["--chunk-size=0", "-o", output]
-            if output not in ("yaml", "json"):
+            if node and not name:
+                cmd += ["--field-selector", f"spec.nodeName={node}"]
+            cmd += ["--chunk-size=0", "-o", "json" if output in STREAM_OUTPUTS else output]
+            if output not in ("yaml",) + STREAM_OUTPUTS:
                 cmd += ["--no-headers=true"]
             cmd += ["--ignore-not-found=true"]
             cmd += ns_flag
@@ -79,6 +293,17 @@ class KubectlTool(BaseTool):
                 return "ERROR: logs currently supports 'pod(s)' kind only"
             if not name and not selector:
                 return "ERROR: provide 'name' or 'selector' for logs"
+            if since and parse_duration(since) is None:
+                return f"ERROR: since must be a duration like 30s, 10m or 1h (got {since!r})"
+            if grep:
+                try:
+                    LogFilter(grep)
+                except ValueError as e:
+                    return f"ERROR: {e}"
+            if output == "digest":
+                # one `kubectl logs` per pod/container, see _log_fan_out; this lists the pods
+                cmd += ["get", "pods"] + ([name] if name else []) + (["-l", selector] if selector else [])
+                return cmd + ["-o", "json"] + ns_flag
             cmd += ["logs"]
             if name:
                 cmd += [name]
@@ -87,6 +312,10 @@ class KubectlTool(BaseTool):
             if container:
                 cmd += ["-c", container]
             cmd += ["--tail", str(tail)]
+            if since:
+                cmd += ["--since", since]
+            if previous:
+                cmd += ["--previous"]
             cmd += ns_flag
         elif action == "describe":
             if not kind:
@@ -120,28 +349,210 @@ class KubectlTool(BaseTool):
             cmd += [action, name]
         else:
             return f"ERROR: unsupported action '{action}'"
+        return cmd
+
+    def _execute(self, cmd: List[str], settings, call: Dict) -> str:
+        """Blocking execution: API backend when enabled, else the kubectl subprocess."""
+        kubeconfig = _kubeconfig(settings)
+        action, kind, output = call["action"], call["kind"], call["output"]
+        if self._multiplexed(call):
+            with timed(KUBECTL_SECONDS, "kubectl logs", action=action, backend="subprocess"):
+                return self._log_fan_out(cmd, settings, call)
+        if settings.KUBECTL_BACKEND == "api":
+            try:
+                backend = KubeApiBackend(
+                    get_client(kubeconfig, call["context"]), timeout=settings.KUBECTL_TIMEOUT,
+                    cache_staleness=settings.KUBE_CACHE_MAX_STALENESS if settings.KUBE_CACHE_ENABLED else None,
+                )
+                with timed(KUBECTL_SECONDS, f"kubectl {action}", action=action, backend="api"):
+                    out = backend.run(action, kind=kind, name=call["name"], namespace=call["namespace"],
+                                      selector=call["selector"], container=call["container"], tail=call["tail"],
+                                      output=output, node=call["node"], since=call["since"],
+                                      previous=call["previous"])
+            except BackendUnavailable:
+                pass  # not covered by the API backend, fall back to kubectl
+            else:
+                if out.startswith("ERROR:"):
+                    return out
+                flt = self._log_filter(call)
+                return self._preview(flt.text(out) if flt else out)
+
+        with timed(KUBECTL_SECONDS, f"kubectl {action}", action=action, backend="subprocess"):
+            if self._streams(call):
+                return self._stream_list(cmd, kubeconfig, kind, output, int(settings.KUBECTL_TIMEOUT))
+            try:
+                proc = subprocess.run(
+                    cmd, capture_output=True, text=True,
+                    timeout=int(settings.KUBECTL_TIMEOUT)
+                )
+            except Exception as e:
+                return f"ERROR: execution failed ({e})"
+        return self._finish(proc.returncode, proc.stdout, proc.stderr, kubeconfig, output, self._log_filter(call))
+
+    def _finish(self, returncode: int, stdout: str, stderr: str, kubeconfig: str, output: str,
+                log_filter: Optional[LogFilter] = None) -> str:
+        if returncode != 0:
+            stderr = stderr.replace(kubeconfig, "<KUBECONFIG>")
+            return f"ERROR: kubectl exited {returncode}: {stderr.strip()[:4000]}"
+        if log_filter is not None:
+            stdout = log_filter.text(stdout)
+
+        if output == "compact" and stdout.strip():
+            try:
+                return json.dumps(project_item(json.loads(stdout)), ensure_ascii=False)
+            except ValueError:
+                pass
+        return self._preview(stdout)
+
+    async def _fan_out(self, call: Dict, patterns: List[str], settings) -> str:
+        """Run the same read against every matching context, at most KUBECTL_FANOUT_PARALLEL at once."""
+        if call["action"] in MUTATING_ACTIONS:
+            return "ERROR: 'contexts' fan-out is read-only; run mutating actions per context"
+        targets = match_contexts(patterns, list_contexts(_kubeconfig(settings)))
+        if not targets:
+            return f"ERROR: no kube context matches {', '.join(patterns)}"
+
+        slots = asyncio.Semaphore(max(1, settings.KUBECTL_FANOUT_PARALLEL))
+        timeout = settings.KUBECTL_TIMEOUT
+
+        async def one(ctx: str) -> str:
+            async with slots:
+                try:
+                    # a little slack over the per-call timeout the backends already enforce
+                    return await asyncio.wait_for(self._arun(**{**call, "context": ctx}), timeout + 5)
+                except asyncio.TimeoutError:
+                    return f"ERROR: timed out after {timeout}s"
+                except Exception as e:
+                    return f"ERROR: {e}"
+
+        results = dict(zip(targets, await asyncio.gather(*(one(c) for c in targets))))
+        tabular = (call["action"] == "get" and call["output"] in ROW_OUTPUTS) or call["action"] == "top"
+        return merge_cluster_outputs(results, tabular)
 
+    def _log_fan_out(self, list_cmd: List[str], settings, call: Dict) -> str:
+        """
+        Logs of every pod/container `list_cmd` finds, read concurrently
+        (KUBECTL_LOGS_PARALLEL streams at once) through the grep/level filter,
+        all within KUBECTL_LOGS_DEADLINE seconds.
+        """
+        kubeconfig, timeout = _kubeconfig(settings), int(settings.KUBECTL_TIMEOUT)
         try:
-            proc = subprocess.run(
-                cmd, capture_output=True, text=True,
-                timeout=int(settings.KUBECTL_TIMEOUT)
-            )
+            proc = subprocess.run(list_cmd, capture_output=True, text=True, timeout=timeout)
         except Exception as e:
             return f"ERROR: execution failed ({e})"
-
         if proc.returncode != 0:
-            stderr = proc.stderr.replace(kubeconfig, "<KUBECONFIG>")
-            return f"ERROR: kubectl exited {proc.returncode}: {stderr.strip()[:4000]}"
+            return self._finish(proc.returncode, proc.stdout, proc.stderr, kubeconfig, "json")
+        try:
+            data = json.loads(proc.stdout or "{}")
+        except ValueError as e:
+            return f"ERROR: cannot parse kubectl output ({e})"
+        pods = data["items"] if "items" in data else [data]
+        sources = log_sources(pods, call["container"], call["previous"])
+        if not sources:
+            what = "restarted containers" if call["previous"] else "containers"
+            return f"ERROR: no {what} match {call['name'] or call['selector']} in namespace {call['namespace']}"
+
+        base = self._base(settings, call["context"])
+        extra = ["--timestamps", "--tail", str(call["tail"])]
+        extra += (["--since", call["since"]] if call["since"] else []) + (["--previous"] if call["previous"] else [])
+
+        deadline = time.monotonic() + settings.KUBECTL_LOGS_DEADLINE
+
+        def fetch(source):
+            cmd = base + ["logs", source.pod, "-c", source.container, "-n", source.namespace] + extra
+            yield from self._stream_lines(cmd, kubeconfig, min(timeout, deadline - time.monotonic()))
+
+        picked = sources[:MAX_SOURCES]
+        collect(picked, fetch, LogFilter(call["grep"], call["level"]), settings.KUBECTL_LOGS_PARALLEL, deadline)
+        return render(picked, total=len(sources))
+
+    @staticmethod
+    def _stream_lines(cmd: List[str], kubeconfig: str, timeout: float):
+        """stdout lines of one kubectl call as they arrive; raises when it fails or times out."""
+        with tempfile.TemporaryFile(mode="w+") as err:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True, errors="replace")
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                yield from proc.stdout
+            finally:
+                timer.cancel()
+                proc.stdout.close()
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            if timed_out.is_set():
+                raise RuntimeError(f"kubectl timed out after {timeout:.0f}s")
+            if proc.returncode != 0:
+                err.seek(0)
+                stderr = err.read().replace(kubeconfig, "<KUBECONFIG>").strip()
+                raise RuntimeError(f"kubectl exited {proc.returncode}: {stderr[:300]}")
 
-        out = proc.stdout.strip()
+    @staticmethod
+    def _stream_list(cmd, kubeconfig: str, kind: str, output: str, timeout: int) -> str:
+        """
+        Parse `kubectl get -o json` items as stdout arrives; json/compact stop
+        reading (killing kubectl) once the output budget is full, digest folds
+        every item without keeping it.
+        """
+        with tempfile.TemporaryFile(mode="w+") as err:
+            try:
+                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True)
+            except Exception as e:
+                return f"ERROR: execution failed ({e})"
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                proc.kill()
+
+            eof = threading.Event()
+
+            def chunks():
+                while True:
+                    chunk = proc.stdout.read(65536)
+                    if not chunk:
+                        eof.set()
+                        return
+                    yield chunk
+
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                out = render_list(kind, output, iter_items(chunks()))
+            except ValueError as e:
+                out = f"ERROR: cannot parse kubectl output ({e})"
+            finally:
+                timer.cancel()
+                stopped_early = not eof.is_set()
+                if stopped_early:
+                    proc.kill()
+                proc.stdout.close()
+                proc.wait()
+
+            if timed_out.is_set():
+                return f"ERROR: execution failed (kubectl timed out after {timeout}s)"
+            if not stopped_early and proc.returncode != 0:
+                err.seek(0)
+                stderr = err.read().replace(kubeconfig, "<KUBECONFIG>")
+                return f"ERROR: kubectl exited {proc.returncode}: {stderr.strip()[:4000]}"
+            return out
+
+    @staticmethod
+    def _preview(out: str) -> str:
+        out = out.strip()
         if out.startswith("{") or out.startswith("["):
             try:
-                import json as _json
-                data = _json.loads(out)
-                preview = _json.dumps(data, ensure_ascii=False)[:4000]
+                data = json.loads(out)
+                preview = json.dumps(data, ensure_ascii=False)[:4000]
                 return preview
             except Exception:
                 pass
 
         return out[:4000]
-
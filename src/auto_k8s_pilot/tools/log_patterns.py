@@ -0,0 +1,161 @@
+"""
+Drain-style log template mining.
+
+Lines are fed one at a time (single pass). Variable-looking tokens are
+masked first, then each line is matched against the clusters that share its
+token count and leading token; a close enough match widens the template
+(differing tokens become `<*>`), otherwise a new cluster is opened. The
+number of clusters is capped: when full, the least recently seen of the
+rarest clusters is folded into an "other" bucket, so memory stays bounded no
+matter how many lines stream through. Clusters are kept in per-count buckets
+ordered by last match, so picking that victim does not scan every cluster.
+"""
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET
+
+WILDCARD = "<*>"
+MAX_CLUSTERS = 300
+SIMILARITY = 0.5
+MAX_TOKENS = 64
+
+_MASKS = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<ts>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b", re.I), "<hex>"),
+    (re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:ms|s|m|h|b|kb|mb|gb|%)?(?![\w.])", re.I), "<num>"),
+]
+
+
+def mask(line: str) -> str:
+    for rx, repl in _MASKS:
+        line = rx.sub(repl, line)
+    return line
+
+
+def tokenize(line: str) -> List[str]:
+    tokens = mask(line).split()
+    if len(tokens) > MAX_TOKENS:  # fold the tail so very long lines still cluster
+        tokens = tokens[:MAX_TOKENS - 1] + [WILDCARD]
+    return tokens
+
+
+@dataclass
+class Template:
+    tokens: List[str]
+    count: int
+    first: int
+    last: int
+    sample: str
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+
+class LogPatternMiner:
+    def __init__(self, max_clusters: int = MAX_CLUSTERS, similarity: float = SIMILARITY):
+        self.max_clusters = max_clusters
+        self.similarity = similarity
+        self.lines = 0
+        self.other = 0
+        self._groups: Dict[Tuple[int, str], List[Template]] = {}
+        self._size = 0
+        # count -> clusters with that count, least recently matched first
+        self._by_count: Dict[int, "OrderedDict[int, Tuple[Tuple[int, str], Template]]"] = {}
+        self._min_count = 0
+
+    @staticmethod
+    def _similar(template: List[str], tokens: List[str]) -> Tuple[float, int]:
+        same = wild = 0
+        for a, b in zip(template, tokens):
+            if a == WILDCARD:
+                wild += 1
+            elif a == b:
+                same += 1
+        return same / len(tokens), wild
+
+    def add(self, line: str, ts: int = 0) -> None:
+        self.lines += 1
+        tokens = tokenize(line)
+        if not tokens:
+            return
+        lead = tokens[0] if not any(c.isdigit() for c in tokens[0]) else WILDCARD
+        key = (len(tokens), lead)
+        group = self._groups.setdefault(key, [])
+
+        best: Optional[Template] = None
+        best_score = (-1.0, 0)
+        for t in group:
+            score = self._similar(t.tokens, tokens)
+            if score > best_score:
+                best, best_score = t, score
+        if best is not None and best_score[0] >= self.similarity:
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+            best.count += 1
+            best.first = min(best.first, ts) if ts else best.first
+            best.last = max(best.last, ts)
+            self._bump(key, best)
+            return
+
+        if self._size >= self.max_clusters:
+            self._evict()
+            group = self._groups.setdefault(key, [])  # eviction may have emptied it
+        t = Template(tokens, 1, ts, ts, line.strip()[:200])
+        group.append(t)
+        self._by_count.setdefault(1, OrderedDict())[id(t)] = (key, t)
+        self._min_count = 1
+        self._size += 1
+
+    def _bump(self, key: Tuple[int, str], t: Template) -> None:
+        """Move `t` from its old count bucket to the end of the next one."""
+        bucket = self._by_count[t.count - 1]
+        del bucket[id(t)]
+        if not bucket:
+            del self._by_count[t.count - 1]
+            if self._min_count == t.count - 1:
+                self._min_count = t.count
+        self._by_count.setdefault(t.count, OrderedDict())[id(t)] = (key, t)
+
+    def _evict(self) -> None:
+        # a new cluster follows every eviction and resets the minimum count to 1
+        bucket = self._by_count[self._min_count]
+        _, (key, victim) = bucket.popitem(last=False)
+        if not bucket:
+            del self._by_count[self._min_count]
+        group = [t for t in self._groups[key] if t is not victim]
+        if group:
+            self._groups[key] = group
+        else:
+            del self._groups[key]
+        self.other += victim.count
+        self._size -= 1
+
+    def templates(self) -> List[Template]:
+        return sorted((t for g in self._groups.values() for t in g), key=lambda t: (-t.count, t.first))
+
+    def render(self, budget: int = OUTPUT_BUDGET, fmt_ts=None) -> str:
+        fmt_ts = fmt_ts or str
+        templates = self.templates()
+        lines = [f"Lines: {self.lines} | templates: {len(templates)}"
+                 + (f" | {self.other} lines in evicted rare templates" if self.other else "")]
+        used = len(lines[0])
+        for n, t in enumerate(templates):
+            entry = f"- x{t.count} [{fmt_ts(t.first)} .. {fmt_ts(t.last)}] {t.text}\n  e.g. {t.sample}"
+            if used + len(entry) + 1 > budget:
+                # rare classes matter most: list what is left as bare templates while room remains
+                rest = [f"- x{r.count} {r.text[:120]}" for r in templates[n:]]
+                for i, r in enumerate(rest):
+                    if used + len(r) + 1 > budget - 40:
+                        lines.append(f"... {len(rest) - i} more templates")
+                        break
+                    lines.append(r)
+                    used += len(r) + 1
+                break
+            lines.append(entry)
+            used += len(entry) + 1
+        return "\n".join(lines)
@@ -0,0 +1,108 @@
+"""
+Persisted read cursors for incremental Loki queries.
+
+A cursor remembers, per LogQL query, the newest entry timestamp already
+handed out plus the hashes of the entries at exactly that timestamp. The
+next call starts its window at that timestamp (inclusive) and drops the
+remembered entries, so nothing is read twice and nothing that shares the
+boundary nanosecond is lost. At most MAX_BOUNDARY_HASHES entries are
+remembered per nanosecond; the rest are counted as `overflow` (they can be
+read again) so the caller can report them.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+MAX_BOUNDARY_HASHES = 1000
+
+
+def entry_key(labels: Dict[str, str], ts: int, line: str) -> str:
+    raw = json.dumps(labels, sort_keys=True) + f"\x00{ts}\x00{line}"
+    return hashlib.sha1(raw.encode("utf-8", "replace")).hexdigest()[:16]
+
+
+class Cursor:
+    """Boundary tracker; `admit` must see entries in timestamp order."""
+
+    def __init__(self, ts: int = 0, seen: Optional[Set[str]] = None):
+        self.ts = ts
+        self.seen: Set[str] = set(seen or ())
+        self.admitted = 0
+        self.overflow = 0  # boundary entries admitted but not remembered
+
+    def admit(self, labels: Dict[str, str], ts: int, line: str) -> bool:
+        if ts < self.ts:
+            return False
+        key = entry_key(labels, ts, line)
+        if ts == self.ts:
+            if key in self.seen:
+                return False
+            if len(self.seen) < MAX_BOUNDARY_HASHES:
+                self.seen.add(key)
+            else:
+                self.overflow += 1
+        else:
+            self.ts, self.seen = ts, {key}
+        self.admitted += 1
+        return True
+
+
+class CursorStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str) -> str:
+        return hashlib.sha1(query.strip().encode("utf-8")).hexdigest()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, query: str) -> Optional[Cursor]:
+        with self._lock:
+            entry = self._read().get(self.key(query))
+        if not entry:
+            return None
+        return Cursor(int(entry["ts"]), set(entry.get("seen") or ()))
+
+    def put(self, query: str, cursor: Cursor) -> None:
+        with self._lock:
+            data = self._read()
+            data[self.key(query)] = {"query": query, "ts": cursor.ts, "seen": sorted(cursor.seen)}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def reset(self, query: str) -> None:
+        with self._lock:
+            data = self._read()
+            if data.pop(self.key(query), None) is not None:
+                self.path.write_text(json.dumps(data), encoding="utf-8")
+
+
+_STORES: Dict[str, CursorStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_cursor_store(path: str) -> CursorStore:
+    """One store (and lock) per cursor file, shared by every tool call in the process."""
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = CursorStore(path)
+        return store
+
+
+def window_start(cursor: Optional[Cursor], default_start: int) -> Tuple[int, Cursor]:
+    """Start of the next read: the cursor boundary if it is inside the lookback window."""
+    if cursor is None or cursor.ts < default_start:
+        return default_start, Cursor(default_start)
+    return cursor.ts, cursor
@@ -1,30 +1,169 @@
 import datetime as dt
-import requests
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
-from typing import Type
-from auto_k8s_pilot.settings import Settings
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, Type
+from auto_k8s_pilot.aio import OffloadedTool
+from auto_k8s_pilot.facts import Reported
+from auto_k8s_pilot.http_client import get_http
+from auto_k8s_pilot.settings import Settings, get_settings
+from auto_k8s_pilot.telemetry import instrumented
+from auto_k8s_pilot.tools.log_patterns import LogPatternMiner
+from auto_k8s_pilot.tools.loki_cursor import MAX_BOUNDARY_HASHES, Cursor, get_cursor_store, window_start
+from auto_k8s_pilot.tools.tool_cache import cached_result
+
+try:
+    import websocket  # websocket-client, only needed for mode="tail"
+except ImportError:  # pragma: no cover - optional dependency
+    websocket = None
+
+NS = int(1e9)
+PAGE_SIZE = 5000  # Loki's default max_entries_limit_per_query
+MATCHER = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*(=~|!~|!=|=)\s*("(?:[^"\\]|\\.)*"|`[^`]*`)\s*(?:,|$)')
 
 
 class LokiInput(BaseModel):
     query: str = Field(..., description='LogQL query, e.g. {app="chat-api"} |= "ERROR"')
     minutes: int = Field(30, description='Lookback window in minutes')
     limit: int = Field(200, description='Max entries to fetch')
+    mode: Literal["lines", "count", "patterns", "tail"] = Field(
+        "lines",
+        description='lines = fetch raw entries (count capped at limit); '
+                    'count = exact per-stream counts via count_over_time, samples only for the top streams; '
+                    'patterns = scan up to `limit` lines and group them into message templates with counts; '
+                    'tail = follow the live tail websocket for tail_seconds',
+    )
+    incremental: bool = Field(
+        False, description="lines/patterns/tail: only entries newer than the previous call with the same query",
+    )
+    tail_seconds: int = Field(10, description="tail mode: how long to listen")
+    by: Optional[str] = Field(None, description='count mode: labels to group by, e.g. "app,pod" (default: every stream)')
+    top: int = Field(5, description='count mode: streams to fetch sample lines for')
+
+
+def split_selector(query: str) -> Tuple[str, str]:
+    """Split a log query into its `{...}` stream selector and the pipeline after it."""
+    q = query.strip()
+    if not q.startswith("{"):
+        raise ValueError("log query must start with a {stream selector}")
+    in_str, esc = False, False
+    for i, ch in enumerate(q):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == "}":
+            return q[: i + 1], q[i + 1:].strip()
+    raise ValueError("unterminated stream selector")
+
+
+def parse_selector(selector: str) -> List[Tuple[str, str, str]]:
+    """`{app="a", pod=~"p-.*"}` -> [("app", "=", "a"), ("pod", "=~", "p-.*")]."""
+    inner, pos, matchers = selector.strip()[1:-1].strip(), 0, []
+    while pos < len(inner):
+        m = MATCHER.match(inner, pos)
+        if not m:
+            raise ValueError(f"cannot parse stream selector {selector}")
+        label, op, value = m.groups()
+        value = value[1:-1] if value.startswith("`") else re.sub(r"\\(.)", r"\1", value[1:-1])
+        matchers.append((label, op, value))
+        pos = m.end()
+    return matchers
+
+
+def narrow_query(query: str, labels: Dict[str, str]) -> str:
+    """Pin a log query to one series: an exact matcher per label, unless the selector already has it."""
+    selector, pipeline = split_selector(query)
+    inner = selector[1:-1].strip()
+    exact = {(label, value) for label, op, value in parse_selector(selector) if op == "="}
+    extra = [f'{k}="{_quote(v)}"' for k, v in sorted(labels.items()) if (k, v) not in exact]
+    inner = ", ".join([p for p in [inner] if p] + extra)
+    return f"{{{inner}}} {pipeline}".strip()
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def shard_window(start_ns: int, end_ns: int, shard_ns: int) -> List[Tuple[int, int]]:
+    """[(end, seconds)] sub-ranges covering (start, end], newest first; the last (oldest) one is the remainder."""
+    shards = []
+    t = end_ns
+    while t > start_ns:
+        s = max(start_ns, t - shard_ns)
+        shards.append((t, max(1, (t - s) // NS)))
+        t = s
+    return shards
+
+
+def _clock(ts_ns: int) -> str:
+    if not ts_ns:
+        return "?"
+    return dt.datetime.fromtimestamp(ts_ns / NS, dt.timezone.utc).strftime("%H:%M:%S")
+
+
+def _labels_text(labels: Dict[str, str]) -> str:
+    return "{" + ", ".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
 
+def _overflow_note(cursor: Optional[Cursor]) -> str:
+    if cursor is None or not cursor.overflow:
+        return ""
+    return f"{cursor.overflow} boundary entries past the {MAX_BOUNDARY_HASHES} remembered may repeat next read"
 
-class LokiQueryTool(BaseTool):
+
+class LokiQueryTool(OffloadedTool, BaseTool):
     name: str = "loki_query"
-    description: str = "Query Grafana Loki via HTTP API and summarize recent log events."
+    description: str = (
+        "Query Grafana Loki via HTTP API and summarize recent log events. "
+        'mode="count" gives exact match counts over long windows without downloading the lines.'
+    )
     args_schema: Type[BaseModel] = LokiInput
 
-    def _run(self, query: str, minutes: int = 30, limit: int = 200) -> str:
-        settings = Settings()
+    # incremental reads and tails advance a cursor, so the same arguments mean new data
+    @instrumented
+    @cached_result(scope=lambda s: s.LOKI_URL, uncacheable=lambda a, s: a["incremental"] or a["mode"] == "tail")
+    def _run(self, query: str, minutes: int = 30, limit: int = 200, mode: str = "lines",
+             by: Optional[str] = None, top: int = 5, incremental: bool = False, tail_seconds: int = 10) -> str:
+        settings = get_settings(self.name)
         base = settings.LOKI_URL
-        now = int(dt.datetime.utcnow().timestamp() * 1e9)
-        start = now - minutes * 60 * int(1e9)
+        now = time.time_ns()
+        start = now - minutes * 60 * NS
+        if mode == "count":
+            try:
+                return self._count(base, query, start, now, by, top, settings)
+            except Exception as e:
+                return f"ERROR: Loki request failed ({e})."
+        if mode == "tail" and websocket is None:
+            return "ERROR: mode=\"tail\" needs the 'websocket-client' package (pip install 'auto_k8s_pilot[tail]')"
+        if mode in ("patterns", "tail") or incremental:
+            store = get_cursor_store(settings.LOKI_CURSOR_FILE) if incremental else None
+            start, cursor = window_start(store.get(query) if store else None, start)
+            try:
+                if mode == "patterns":
+                    out = self._patterns(base, query, start, now, limit, cursor)
+                elif mode == "tail":
+                    out = self._tail(base, query, start, limit, tail_seconds, cursor)
+                else:
+                    out = self._new_lines(base, query, start, now, limit, cursor)
+            except Exception as e:
+                return f"ERROR: Loki request failed ({e})."
+            if store is not None:
+                store.put(query, cursor)
+            return out
+
         params = {"query": query, "limit": str(limit), "start": str(start), "end": str(now)}
         try:
-            r = requests.get(f"{base}/loki/api/v1/query_range", params=params, timeout=10)
+            r = get_http("loki").get(f"{base}/loki/api/v1/query_range", params=params)
             r.raise_for_status()
             data = r.json()
         except Exception as e:
@@ -40,5 +179,150 @@ class LokiQueryTool(BaseTool):
                 lines.append(f"{lbl} :: {msg[:200]}")
 
         preview = "\n".join(lines[:10]) or "no matches"
-        return f"Matches: {total}\nPreview:\n{preview}"
+        capped = f" (limit {limit} reached; use mode=\"count\" for the exact number)" if total >= limit else ""
+        return f"Matches: {total}{capped}\nPreview:\n{preview}"
+
+    def _count(self, base: str, query: str, start: int, end: int, by: Optional[str], top: int,
+               settings: Settings) -> str:
+        split_selector(query)  # fail early on metric queries / typos
+        http = get_http("loki")
+        shards = shard_window(start, end, settings.LOKI_SHARD_MINUTES * 60 * NS)
+        group = f"sum by ({by}) " if by else ""
+
+        def count_shard(shard: Tuple[int, int]) -> List[Dict[str, Any]]:
+            at, secs = shard
+            params = {"query": f"{group}(count_over_time({query} [{secs}s]))", "time": str(at)}
+            r = http.get(f"{base}/loki/api/v1/query", params=params)
+            r.raise_for_status()
+            return r.json().get("data", {}).get("result", [])
+
+        totals: Dict[Tuple[Tuple[str, str], ...], int] = {}
+        with ThreadPoolExecutor(max_workers=settings.LOKI_MAX_PARALLEL, thread_name_prefix="loki") as pool:
+            for series in pool.map(count_shard, shards):
+                for s in series:
+                    key = tuple(sorted((s.get("metric") or {}).items()))
+                    totals[key] = totals.get(key, 0) + int(float(s.get("value", [0, "0"])[1]))
+
+            ranked = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))
+            total = sum(totals.values())
+
+            def samples(key: Tuple[Tuple[str, str], ...]) -> List[str]:
+                params = {"query": narrow_query(query, dict(key)), "limit": "3", "direction": "backward",
+                          "start": str(start), "end": str(end)}
+                r = http.get(f"{base}/loki/api/v1/query_range", params=params)
+                r.raise_for_status()
+                out = []
+                for s in r.json().get("data", {}).get("result", []):
+                    out += [msg[:200] for _, msg in s.get("values", [])]
+                return out[:3]
+
+            sampled = list(pool.map(samples, [k for k, _ in ranked[:top]]))
 
+        lines = [f"Matches: {total} (exact, {(end - start) // (60 * NS)}m in {len(shards)} shard(s))",
+                 f"Streams: {len(ranked)}"]
+        lines += [f"{_labels_text(dict(k))}: {n}" for k, n in ranked[:max(top, 10)]]
+        if len(ranked) > max(top, 10):
+            lines.append(f"... {len(ranked) - max(top, 10)} more streams")
+        preview = [f"{_labels_text(dict(k))} :: {msg}" for (k, _), msgs in zip(ranked, sampled) for msg in msgs]
+        lines.append("Preview:")
+        lines.append("\n".join(preview[:10]) or "no matches")
+        return "\n".join(lines)
+
+    def _iter_entries(self, base: str, query: str, start: int, end: int, limit: int,
+                      cursor: Cursor) -> Iterator[Tuple[int, Dict[str, str], str]]:
+        """
+        Page forward through (start, end), yielding each entry once, oldest first.
+
+        Pages restart at the last timestamp seen (Loki's start is inclusive)
+        and the cursor drops what was already yielded, so entries sharing
+        the boundary nanosecond are neither lost nor repeated.
+        """
+        http = get_http("loki")
+        page_start = start
+        while cursor.admitted < limit and page_start < end:
+            page = min(PAGE_SIZE, limit - cursor.admitted + len(cursor.seen))
+            params = {"query": query, "limit": str(page), "direction": "forward",
+                      "start": str(page_start), "end": str(end)}
+            r = http.get(f"{base}/loki/api/v1/query_range", params=params)
+            r.raise_for_status()
+            entries = sorted(
+                ((int(ts), s.get("stream") or {}, msg)
+                 for s in r.json().get("data", {}).get("result", []) for ts, msg in s.get("values", [])),
+                key=lambda e: e[0],
+            )
+            fresh = 0
+            for ts, labels, msg in entries:
+                if cursor.admit(labels, ts, msg):
+                    fresh += 1
+                    yield ts, labels, msg
+                    if cursor.admitted >= limit:
+                        return
+            if len(entries) < page:
+                return
+            # a full page of boundary duplicates: step past that nanosecond
+            page_start = entries[-1][0] if fresh else entries[-1][0] + 1
+
+    def _new_lines(self, base: str, query: str, start: int, end: int, limit: int, cursor: Cursor) -> str:
+        since = _clock(start)
+        return self._summarize(self._iter_entries(base, query, start, end, limit, cursor), limit,
+                               f"new since {since}", cursor)
+
+    @staticmethod
+    def _summarize(entries, limit: int, note: str, cursor: Optional[Cursor] = None) -> str:
+        total, per_stream = 0, {}
+        for _, labels, msg in entries:
+            total += 1
+            key = _labels_text(labels)
+            if key in per_stream or len(per_stream) < 5:
+                samples = per_stream.setdefault(key, [])
+                samples.append(msg[:200])
+                del samples[:-3]  # keep the newest three per stream
+        lines = [f"{k} :: {m}" for k, msgs in per_stream.items() for m in msgs]
+        capped = f", limit {limit} reached" if total >= limit else ""
+        overflow = _overflow_note(cursor)
+        note += capped + (f", {overflow}" if overflow else "")
+        return f"Matches: {total} ({note})\nPreview:\n" + ("\n".join(lines[:10]) or "no matches")
+
+    def _patterns(self, base: str, query: str, start: int, end: int, limit: int, cursor: Cursor) -> Reported:
+        """Feed each page to the miner and drop it; only the templates are kept."""
+        miner = LogPatternMiner()
+        for ts, _, msg in self._iter_entries(base, query, start, end, limit, cursor):
+            miner.add(msg, ts)
+        capped = f" (stopped at limit {limit})" if miner.lines >= limit else ""
+        overflow = f" ({_overflow_note(cursor)})" if cursor.overflow else ""
+        patterns = [{"count": t.count, "template": t.text} for t in miner.templates()]
+        return Reported(f"Scanned: {miner.lines} lines{capped}{overflow}\n" + miner.render(fmt_ts=_clock),
+                        {"patterns": patterns})
+
+    def _tail(self, base: str, query: str, start: int, limit: int, seconds: int, cursor: Cursor) -> str:
+        """
+        Listen on /loki/api/v1/tail for a few seconds, starting at the cursor.
+        Frames are not ordered across streams, so the whole window is buffered
+        and admitted in timestamp order once the tail ends.
+        """
+        url = base.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        url += "/loki/api/v1/tail?" + urlencode({"query": query, "start": str(start), "limit": str(min(limit, 5000))})
+        deadline = time.monotonic() + seconds
+        buffered, dropped = [], 0
+        ws = websocket.create_connection(url, timeout=seconds)
+        try:
+            while time.monotonic() < deadline and len(buffered) < limit + len(cursor.seen):
+                ws.settimeout(max(0.1, deadline - time.monotonic()))
+                try:
+                    frame = json.loads(ws.recv())
+                except websocket.WebSocketTimeoutException:
+                    break
+                dropped += len(frame.get("dropped_entries") or [])
+                buffered += [(int(ts), s.get("stream") or {}, msg)
+                             for s in frame.get("streams", []) for ts, msg in s.get("values", [])]
+        finally:
+            ws.close()
+        buffered.sort(key=lambda e: e[0])
+        received = []
+        for ts, labels, msg in buffered:
+            if cursor.admitted >= limit:
+                break
+            if cursor.admit(labels, ts, msg):
+                received.append((ts, labels, msg))
+        note = f"tailed {seconds}s" + (f", {dropped} dropped by Loki" if dropped else "")
+        return self._summarize(received, limit, note, cursor)
@@ -2,7 +2,8 @@ import json
 from typing import Type, Literal
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
-from auto_k8s_pilot.settings import Settings
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import instrumented
 
 
 class MCPK8sInput(BaseModel):
@@ -14,10 +15,11 @@ class MCPK8sTool(BaseTool):
     description: str = "Validate env for mcp-server-kubernetes and produce a client config snippet."
     args_schema: Type[BaseModel] = MCPK8sInput
 
+    @instrumented
     def _run(self, op: str) -> str:
+        settings = get_settings(self.name)
         if op == "env_check":
             missing = []
-            settings = Settings()
             if not (settings.MCP_K8S_SERVER_URL or settings.MCP_K8S_CMD):
                 missing.append("MCP_K8S_SERVER_URL or MCP_K8S_CMD")
             details = {
@@ -1,8 +1,10 @@
-import requests
 from typing import Type, Literal
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
-from auto_k8s_pilot.settings import Settings
+from auto_k8s_pilot.aio import OffloadedTool
+from auto_k8s_pilot.http_client import get_http
+from auto_k8s_pilot.settings import get_settings
+from auto_k8s_pilot.telemetry import instrumented
 
 
 class ORInput(BaseModel):
@@ -10,13 +12,13 @@ class ORInput(BaseModel):
     timeout: int = Field(10, description="HTTP timeout seconds")
 
 
-class OpenRouterHealthTool(BaseTool):
+class OpenRouterHealthTool(OffloadedTool, BaseTool):
     name: str = "openrouter_health_tool"
     description: str = "OpenRouter gateway health: models listing / ping."
     args_schema: Type[BaseModel] = ORInput
 
     def _headers(self):
-        settings = Settings()
+        settings = get_settings(self.name)
         h = {"Authorization": f"Bearer {settings.OPENROUTER_API_KEY}"} if settings.OPENROUTER_API_KEY else {}
         if settings.OPENROUTER_SITE_URL:
             h["HTTP-Referer"] = settings.OPENROUTER_SITE_URL
@@ -24,15 +26,17 @@ class OpenRouterHealthTool(BaseTool):
             h["X-Title"] = settings.OPENROUTER_APP_NAME
         return h
 
+    @instrumented
     def _run(self, op: str, timeout: int = 10) -> str:
-        settings = Settings()
+        settings = get_settings(self.name)
         base = settings.OPENROUTER_BASE_URL
+        http = get_http("openrouter")
         try:
             if op == "ping":
-                r = requests.get(base, headers=self._headers(), timeout=timeout)
+                r = http.get(base, headers=self._headers(), timeout=timeout)
                 return f"PING {r.status_code}"
             elif op == "models":
-                r = requests.get(f"{base}/models", headers=self._headers(), timeout=timeout)
+                r = http.get(f"{base}/models", headers=self._headers(), timeout=timeout)
                 r.raise_for_status()
                 data = r.json()
                 models = data.get("data", []) if isinstance(data, dict) else data
@@ -0,0 +1,205 @@
+"""
+Log fan-out over every pod and container behind a selector.
+
+`kubectl logs -l` reads a few pods at a time and returns one blob. Here
+each pod/container is its own `kubectl logs --timestamps` stream on a
+bounded pool. Every line goes through the filter (regex and/or level) as
+it arrives, and only the last matching lines of each source are kept, so
+memory does not grow with how chatty the pods are. The whole fan-out
+shares one deadline: streams still open then are cut off and keep what
+they read, streams not started are reported as failed. The report counts
+errors and warnings per pod over all lines read, then merges the kept
+lines of all sources by timestamp into the output budget.
+"""
+import heapq
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from auto_k8s_pilot.facts import Reported
+from auto_k8s_pilot.tools.kube_stream import OUTPUT_BUDGET
+
+KEPT_PER_SOURCE = 50
+MAX_SOURCES = 200
+DURATION = re.compile(r"(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?")
+LEVELS = {
+    "error": re.compile(r"\b(?:error|err|fatal|panic|crit|critical|severe|exception|traceback)\b", re.I),
+    "warn": re.compile(r"\b(?:warn|warning)\b", re.I),
+}
+TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2}T\S+) ")
+
+
+def parse_duration(value: str) -> Optional[int]:
+    """`1h30m` -> 5400 seconds; None if it is not an h/m/s duration."""
+    m = DURATION.fullmatch(value or "")
+    if not value or not m:
+        return None
+    h, mins, s = (int(g or 0) for g in m.groups())
+    return h * 3600 + mins * 60 + s
+
+
+class LogFilter:
+    """Which lines to keep: a regex and/or a minimum level ("error", or "warn" for warn and error)."""
+
+    def __init__(self, grep: Optional[str] = None, level: Optional[str] = None):
+        try:
+            self.grep = re.compile(grep) if grep else None
+        except re.error as e:
+            raise ValueError(f"invalid grep regex ({e})") from None
+        self.level = level
+
+    def keeps(self, line: str, error: Optional[bool] = None, warning: Optional[bool] = None) -> bool:
+        if self.grep and not self.grep.search(line):
+            return False
+        if self.level:
+            error = LEVELS["error"].search(line) is not None if error is None else error
+            if self.level == "error":
+                return error
+            warning = LEVELS["warn"].search(line) is not None if warning is None else warning
+            return error or warning
+        return True
+
+    def text(self, out: str) -> str:
+        """Plain (single stream) logs: only the lines this filter keeps."""
+        return "\n".join(line for line in out.splitlines() if self.keeps(line))
+
+
+@dataclass
+class LogSource:
+    """One pod/container stream and what was read from it."""
+
+    namespace: str
+    pod: str
+    container: str
+    lines: int = 0
+    matched: int = 0
+    errors: int = 0
+    warnings: int = 0
+    failed: Optional[str] = None
+    kept: Deque[Tuple[str, str]] = field(default_factory=lambda: deque(maxlen=KEPT_PER_SOURCE))
+
+    @property
+    def label(self) -> str:
+        return f"{self.namespace}/{self.pod}/{self.container}"
+
+    def feed(self, line: str, flt: LogFilter) -> None:
+        line = line.rstrip("\n")
+        if not line:
+            return
+        m = TIMESTAMP.match(line)
+        ts, text = (m.group(1), line[m.end():]) if m else ("", line)
+        error = LEVELS["error"].search(text) is not None
+        warning = not error and LEVELS["warn"].search(text) is not None
+        self.lines += 1
+        self.errors += error
+        self.warnings += warning
+        if flt.keeps(text, error, warning):
+            self.matched += 1
+            self.kept.append((ts, text))
+
+
+def log_sources(pods: Iterable[Dict[str, Any]], container: Optional[str] = None,
+                previous: bool = False) -> List[LogSource]:
+    """
+    One source per container of each pod (`container` picks one). With
+    `previous`, only containers that restarted have a previous instance.
+    """
+    sources = []
+    for pod in pods:
+        meta = pod.get("metadata", {})
+        statuses = pod.get("status", {}).get("containerStatuses") or []
+        restarts = {c.get("name"): c.get("restartCount", 0) for c in statuses}
+        for c in pod.get("spec", {}).get("containers") or []:
+            name = c.get("name")
+            if (container and name != container) or (previous and not restarts.get(name)):
+                continue
+            sources.append(LogSource(meta.get("namespace") or "default", meta.get("name", ""), name))
+    return sources
+
+
+def collect(sources: List[LogSource], fetch: Callable[[LogSource], Iterable[str]], flt: LogFilter,
+            workers: int, deadline: Optional[float] = None) -> None:
+    """
+    Read every source through `fetch` on at most `workers` threads. A failed
+    source keeps its error and what it read until then; sources not started
+    by `deadline` (a `time.monotonic()` value) are not read.
+    """
+
+    def read(source: LogSource) -> None:
+        if deadline is not None and time.monotonic() >= deadline:
+            source.failed = "not read before the deadline"
+            return
+        try:
+            for line in fetch(source):
+                source.feed(line, flt)
+        except Exception as e:
+            source.failed = str(e) or type(e).__name__
+
+    if not sources:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources))), thread_name_prefix="pod-logs") as pool:
+        list(pool.map(read, sources))
+
+
+def render(sources: List[LogSource], total: Optional[int] = None, budget: int = OUTPUT_BUDGET) -> Reported:
+    """
+    Header totals, then per-pod counts (most errors first) in up to half the
+    budget, streams cut off part way, failures, and the latest kept lines of
+    all sources merged by time. Cut-off streams count with what they read;
+    the per-pod counts of every source read also go along as facts.
+    """
+    read = [s for s in sources if s.failed is None or s.lines]
+    cut = [s for s in read if s.failed is not None]
+    failed = [s for s in sources if s.failed is not None and not s.lines]
+    pods = len({(s.namespace, s.pod) for s in sources})
+    head = [
+        f"Logs: {pods} pods, {len(sources)} containers | lines {sum(s.lines for s in read)} | "
+        f"matched {sum(s.matched for s in read)} | errors {sum(s.errors for s in read)} | "
+        f"warnings {sum(s.warnings for s in read)} | failed {len(failed)} | cut {len(cut)}"
+    ]
+    if total is not None and total > len(sources):
+        head.append(f"Fetched the first {len(sources)} of {total} containers")
+    text = "\n".join(head)
+
+    ranked = sorted(read, key=lambda s: (-s.errors, -s.warnings, -s.matched, s.label))
+    per_pod = [f"- {s.label}: errors {s.errors} | warnings {s.warnings} | matched {s.matched} of {s.lines}"
+               for s in ranked]
+    text = _append(text, "Per pod:", per_pod, len(text) + budget // 2, "pods")
+    text = _append(text, "Cut off:", [f"- {s.label}: {s.failed[:160]}" for s in cut],
+                   len(text) + budget // 16, "cut off")
+    text = _append(text, "Failed:", [f"- {s.label}: {s.failed[:160]}" for s in failed],
+                   len(text) + budget // 8, "failed")
+
+    streams = [[(ts, s.pod, line) for ts, line in s.kept] for s in read]
+    lines = [f"{ts} {pod}: {line}"[:300] for ts, pod, line in heapq.merge(*streams, key=lambda t: _time_key(t[0]))]
+    room, picked = budget - len(text) - 60, []
+    for line in reversed(lines):
+        if room - len(line) - 1 < 0:
+            break
+        picked.append(line)
+        room -= len(line) + 1
+    if picked:
+        text += f"\nLines (last {len(picked)} of {len(lines)} kept, by time):\n" + "\n".join(reversed(picked))
+    facts = [{"namespace": s.namespace, "pod": s.pod, "container": s.container, "errors": s.errors,
+              "warnings": s.warnings, "matched": s.matched, "lines": s.lines} for s in ranked]
+    return Reported(text, {"sources": facts})
+
+
+def _time_key(ts: str) -> Tuple[str, str]:
+    """kubectl's RFC3339Nano drops trailing zeros (`10:00:01Z`, `10:00:01.5Z`); pad before comparing."""
+    base, _, frac = ts.rstrip("Z").partition(".")
+    return base, frac.ljust(9, "0")
+
+
+def _append(text: str, title: str, lines: List[str], limit: int, what: str) -> str:
+    if not lines:
+        return text
+    text += "\n" + title
+    for i, line in enumerate(lines):
+        if len(text) + len(line) + 1 > limit:
+            return text + f"\n... {len(lines) - i} more {what}"
+        text += "\n" + line
+    return text
@@ -0,0 +1,255 @@
+"""
+Content-addressed cache for tool results.
+
+`@cached_result` wraps a tool's `_run`. Calls are keyed on the tool name,
+a scope (the endpoint or kubeconfig the call goes to) and the normalized
+arguments, including defaults, so `get pods` and `get pods namespace=None`
+hit the same entry. Entries live for a per-tool TTL in a size-bounded LRU,
+optionally mirrored to SQLite so separate processes (e.g. scheduled runs)
+share them (a `Reported` result keeps its facts there too). Mutating
+calls bypass the cache and drop every entry of that tool. ERROR results
+are never stored.
+"""
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from auto_k8s_pilot.facts import Reported
+from auto_k8s_pilot.settings import Settings, get_settings
+
+DEFAULT_TTLS: Dict[str, int] = {
+    "kubectl_tool": 15,
+    "argocd_tool": 30,
+    "loki_query": 30,
+    "cloudflare_dns_tool": 300,
+}
+
+Args = Dict[str, Any]
+
+
+class _DiskStore:
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, tool TEXT, expires REAL, value TEXT, facts TEXT)"
+        )
+        if "facts" not in {row[1] for row in self._db.execute("PRAGMA table_info(results)")}:
+            self._db.execute("ALTER TABLE results ADD COLUMN facts TEXT")  # files written before facts
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        row = self._db.execute("SELECT expires, value, facts FROM results WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        return row[0], Reported(row[1], json.loads(row[2])) if row[2] else row[1]
+
+    def put(self, key: str, tool: str, expires: float, value: str) -> None:
+        facts = json.dumps(value.facts) if isinstance(value, Reported) else None
+        self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, tool, expires, value, facts))
+
+    def delete(self, tool: Optional[str] = None) -> None:
+        if tool is None:
+            self._db.execute("DELETE FROM results")
+        else:
+            self._db.execute("DELETE FROM results WHERE tool = ? OR expires < ?", (tool, time.time()))
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class ToolResultCache:
+    def __init__(self, max_entries: int = 512, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._mem: "OrderedDict[str, Tuple[str, float, str]]" = OrderedDict()  # key -> (tool, expires, value)
+        self._disk = _DiskStore(disk_path) if disk_path else None
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, tool: str, what: str) -> None:
+        s = self._stats.setdefault(tool, {"hits": 0, "misses": 0, "bypasses": 0, "invalidations": 0})
+        s[what] += 1
+
+    def get(self, tool: str, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and entry[1] > now:
+                self._mem.move_to_end(key)
+                self._count(tool, "hits")
+                return entry[2]
+            if entry is not None:
+                del self._mem[key]
+            if self._disk is not None:
+                row = self._disk.get(key)
+                if row is not None and row[0] > now:
+                    self._store(tool, key, row[0], row[1])
+                    self._count(tool, "hits")
+                    return row[1]
+            self._count(tool, "misses")
+            return None
+
+    def _store(self, tool: str, key: str, expires: float, value: str) -> None:
+        self._mem[key] = (tool, expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def put(self, tool: str, key: str, value: str, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        expires = time.time() + ttl
+        with self._lock:
+            self._store(tool, key, expires, value)
+            if self._disk is not None:
+                self._disk.put(key, tool, expires, value)
+
+    def bypass(self, tool: str) -> None:
+        with self._lock:
+            self._count(tool, "bypasses")
+
+    def invalidate(self, tool: Optional[str] = None) -> None:
+        with self._lock:
+            for key in [k for k, e in self._mem.items() if tool is None or e[0] == tool]:
+                del self._mem[key]
+            if self._disk is not None:
+                self._disk.delete(tool)
+            if tool is not None:
+                self._count(tool, "invalidations")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {tool: dict(s) for tool, s in self._stats.items()}
+
+    def stats_table(self) -> str:
+        lines = [
+            f"{tool}\thits={s['hits']} misses={s['misses']} bypasses={s['bypasses']} invalidations={s['invalidations']}"
+            for tool, s in sorted(self.stats().items())
+        ]
+        return "\n".join(lines) or "tool cache: no calls"
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+
+_CACHE: Optional[ToolResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            settings = get_settings()
+            _CACHE = ToolResultCache(settings.TOOL_CACHE_MAX_ENTRIES, settings.TOOL_CACHE_FILE)
+        return _CACHE
+
+
+def reset_tool_cache() -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is not None:
+            _CACHE.close()
+        _CACHE = None
+
+
+def cache_key(tool: str, scope: str, args: Args) -> str:
+    norm = {k: v.strip() if isinstance(v, str) else v for k, v in args.items()}
+    raw = json.dumps([tool, scope, norm], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_result(
+    scope: Callable[[Settings], Any] = lambda s: "",
+    mutating: Callable[[Args], bool] = lambda a: False,
+    uncacheable: Callable[[Args, Settings], bool] = lambda a, s: False,
+):
+    """
+    Decorate a tool's `_run` (or async `_arun`; both share entries).
+
+    `scope` picks the settings that decide where the call goes, `mutating`
+    marks calls that must bypass and invalidate, `uncacheable` marks calls
+    that bypass without invalidating (e.g. stateful incremental reads or
+    reads already served from a local snapshot).
+    """
+
+    def decorate(run: Callable[..., Any]) -> Callable[..., Any]:
+        sig = inspect.signature(run)
+
+        def lookup(self, args, kwargs) -> Tuple[str, Any]:
+            """("direct" | "mutating" | "hit" | "miss", data) for one call."""
+            settings = get_settings(self.name)
+            if not settings.TOOL_CACHE_ENABLED:
+                return "direct", None
+            bound = sig.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            call = {k: v for k, v in bound.arguments.items() if k != "self"}
+            cache, tool = get_tool_cache(), self.name
+            if mutating(call):
+                cache.bypass(tool)
+                return "mutating", (cache, tool)
+            if uncacheable(call, settings):
+                cache.bypass(tool)
+                return "direct", None
+
+            key = cache_key(tool, str(scope(settings)), call)
+            hit = cache.get(tool, key)
+            if hit is not None:
+                return "hit", hit
+            ttl = settings.TOOL_CACHE_TTLS.get(tool, DEFAULT_TTLS.get(tool, 0))
+            return "miss", (cache, tool, key, ttl)
+
+        def store(data, result) -> None:
+            cache, tool, key, ttl = data
+            if isinstance(result, str) and not result.startswith("ERROR"):
+                cache.put(tool, key, result, ttl)
+
+        if inspect.iscoroutinefunction(run):
+
+            @wraps(run)
+            async def async_wrapper(self, *args, **kwargs) -> str:
+                kind, data = lookup(self, args, kwargs)
+                if kind == "hit":
+                    return data
+                if kind == "mutating":
+                    try:
+                        return await run(self, *args, **kwargs)
+                    finally:
+                        data[0].invalidate(data[1])
+                result = await run(self, *args, **kwargs)
+                if kind == "miss":
+                    store(data, result)
+                return result
+
+            return async_wrapper
+
+        @wraps(run)
+        def wrapper(self, *args, **kwargs) -> str:
+            kind, data = lookup(self, args, kwargs)
+            if kind == "hit":
+                return data
+            if kind == "mutating":
+                try:
+                    return run(self, *args, **kwargs)
+                finally:
+                    data[0].invalidate(data[1])
+            result = run(self, *args, **kwargs)
+            if kind == "miss":
+                store(data, result)
+            return result
+
+        return wrapper
+
+    return decorate
@@ -3,3 +3,108 @@ from pathlib import Path
 
 # Ensure src directory is on sys.path for imports
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class FakeServer:
+    """
+    Tiny local HTTP server for tool tests.
+
+    `routes[(method, path)]` is either a payload (served as JSON) or a callable
+    `(query, body) -> (status, payload)`. Every request is recorded in `calls`.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                u = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                query = {k: v[0] for k, v in parse_qs(u.query).items()}
+                server.calls.append((self.command, u.path, query, body, dict(self.headers)))
+                route = server.routes.get((self.command, u.path))
+                if route is None:
+                    status, payload = 404, {"kind": "Status", "message": f"{u.path} not found"}
+                elif callable(route):
+                    status, payload = route(query, body)
+                else:
+                    status, payload = 200, route
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_process_state():
+    """Settings, pooled HTTP clients, breakers, cached tool results and metrics are process-wide; start each test clean."""
+    from auto_k8s_pilot.http_client import reset_http
+    from auto_k8s_pilot.settings import reload_settings
+    from auto_k8s_pilot.telemetry import reset_telemetry
+    from auto_k8s_pilot.tools.tool_cache import reset_tool_cache
+
+    reload_settings()
+    reset_http()
+    reset_tool_cache()
+    reset_telemetry()
+    yield
+    reset_telemetry()
+    reset_tool_cache()
+    reset_http()
+    reload_settings()
+
+
+@pytest.fixture
+def fake_server():
+    srv = FakeServer()
+    yield srv
+    srv.close()
+
+
+@pytest.fixture
+def fake_kube(fake_server, tmp_path, monkeypatch):
+    """Fake API server plus a kubeconfig pointing at it, with the API backend enabled."""
+    from auto_k8s_pilot.tools import kube_api, kube_cache
+
+    kubeconfig = tmp_path / "kubeconfig"
+    kubeconfig.write_text(
+        "apiVersion: v1\nkind: Config\ncurrent-context: fake\n"
+        f"clusters:\n- name: fake\n  cluster:\n    server: {fake_server.url}\n"
+        "contexts:\n- name: fake\n  context:\n    cluster: fake\n    user: fake\n"
+        "users:\n- name: fake\n  user:\n    token: fake-token\n"
+    )
+    monkeypatch.setenv("KUBECONFIG", str(kubeconfig))
+    monkeypatch.setenv("KUBECTL_BACKEND", "api")
+    kube_api.reset_clients()
+    yield fake_server
+    kube_cache.reset_stores()
+    kube_api.reset_clients()
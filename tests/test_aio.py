@@ -0,0 +1,63 @@
+import asyncio
+import os
+import stat
+import time
+
+from auto_k8s_pilot.aio import gather_calls, run_sync
+from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
+from auto_k8s_pilot.tools.loki_tool import LokiQueryTool
+from auto_k8s_pilot.tools.tool_cache import get_tool_cache
+
+
+def fake_kubectl(tmp_path, monkeypatch, delay):
+    """A `kubectl` on PATH that sleeps, then echoes the subcommand it was given."""
+    script = tmp_path / "kubectl"
+    script.write_text(f"#!/bin/sh\nsleep {delay}\necho \"$2 $3\"\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("KUBECTL_BACKEND", "subprocess")
+
+
+def test_kubectl_calls_overlap(tmp_path, monkeypatch):
+    fake_kubectl(tmp_path, monkeypatch, 0.5)
+    tool = KubectlTool()
+    t0 = time.perf_counter()
+    nodes, pods = gather_calls([
+        (tool, {"action": "top", "kind": "nodes"}),
+        (tool, {"action": "top", "kind": "pods", "namespace": "all"}),
+    ])
+    assert time.perf_counter() - t0 < 0.9
+    assert nodes == "top nodes" and pods == "top pods"
+
+    # async and sync paths share cached results
+    assert tool._run(action="top", kind="nodes") == "top nodes"
+    assert get_tool_cache().stats()["kubectl_tool"]["hits"] == 1
+
+
+def test_kubectl_async_timeout_and_validation(tmp_path, monkeypatch):
+    fake_kubectl(tmp_path, monkeypatch, 5)
+    monkeypatch.setenv("KUBECTL_TIMEOUT", "1")
+    tool = KubectlTool()
+    assert run_sync(tool._arun(action="top", kind="nodes")) == "ERROR: execution failed (kubectl timed out after 1s)"
+    assert run_sync(tool._arun(action="top", kind="deploy")).startswith("ERROR: top supports")
+
+
+def test_http_tool_arun_uses_pooled_client(fake_server, monkeypatch):
+    fake_server.routes[("GET", "/loki/api/v1/query_range")] = {
+        "data": {"result": [{"stream": {"app": "api"}, "values": [[str(time.time_ns()), "boom"]]}]}
+    }
+    monkeypatch.setenv("LOKI_URL", fake_server.url)
+    out = run_sync(LokiQueryTool()._arun(query='{app="api"}', minutes=5))
+    assert "boom" in out
+
+
+def test_run_sync_refuses_the_shared_loop():
+    async def nested():
+        return run_sync(asyncio.sleep(0))
+
+    try:
+        run_sync(nested())
+    except RuntimeError as e:
+        assert "shared loop" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from auto_k8s_pilot.tools import argo_cache
+from auto_k8s_pilot.tools.argo_cache import AppStateStore
+from auto_k8s_pilot.tools.argocd_tool import ArgoCDTool
+
+
+def _app(name, sync="Synced", health="Healthy", rv="1"):
+    return {
+        "metadata": {"name": name, "resourceVersion": rv},
+        "spec": {"project": "default"},
+        "status": {"sync": {"status": sync}, "health": {"status": health}},
+    }
+
+
+@pytest.fixture
+def argo(fake_server, monkeypatch):
+    monkeypatch.setenv("ARGOCD_BASE_URL", fake_server.url)
+    monkeypatch.setenv("ARGOCD_API_TOKEN", "xxx")
+    fake_server.routes[("GET", "/api/v1/applications")] = {"items": [_app("chat-api"), _app("billing", rv="7")]}
+    yield fake_server
+    argo_cache.reset_app_stores()
+
+
+def _stream(*events):
+    return "\n".join(json.dumps({"result": e}) for e in events).encode() + b"\n"
+
+
+def test_stream_events_update_state_and_notify(argo):
+    argo.routes[("GET", "/api/v1/stream/applications")] = _stream(
+        {"type": "MODIFIED", "application": _app("chat-api", sync="OutOfSync", health="Degraded", rv="9")},
+        {"type": "MODIFIED", "application": _app("billing", rv="10")},
+        {"type": "DELETED", "application": _app("billing", rv="11")},
+    )
+    store = AppStateStore(argo.url, "xxx")
+    seen = []
+    store.subscribe(seen.append)
+    store.relist()
+    assert store.resource_version == "7"
+
+    store.watch_once()
+    assert [c.app for c in seen] == ["chat-api", "billing"]
+    assert seen[0].degraded and not seen[1].degraded  # deletions are not incidents
+    assert seen[0].describe() == "chat-api: sync Synced -> OutOfSync, health Healthy -> Degraded, operation - -> -"
+    assert [a["metadata"]["name"] for a in store.apps()] == ["chat-api"]
+    assert store.resource_version == "11"
+    _, _, query, _, _ = argo.calls[-1]
+    assert query["resourceVersion"] == "7" and "result.application.status.health.status" in query["fields"]
+
+
+def test_tool_answers_from_cache(argo, monkeypatch):
+    monkeypatch.setenv("ARGOCD_CACHE_ENABLED", "true")
+    argo.routes[("GET", "/api/v1/stream/applications")] = b""
+    tool = ArgoCDTool()
+
+    assert "chat-api" in tool._run(op="list_apps")
+    assert tool._run(op="app_status", app="billing") == "App: billing\nSync: Synced\nHealth: Healthy"
+    assert "Needs attention: 0" in tool._run(op="fleet_status")
+    lists = [c for c in argo.calls if c[1] == "/api/v1/applications"]
+    assert len(lists) == 1
+
+
+def test_stream_updates_are_not_hidden_by_the_tool_cache(argo, monkeypatch):
+    monkeypatch.setenv("ARGOCD_CACHE_ENABLED", "true")
+    argo.routes[("GET", "/api/v1/stream/applications")] = b""
+    tool = ArgoCDTool()
+
+    assert tool._run(op="app_status", app="billing").endswith("Health: Healthy")
+    assert "Needs attention: 0" in tool._run(op="fleet_status")
+    store = argo_cache.get_app_store(argo.url, "xxx")
+    store.apply({"type": "MODIFIED", "application": _app("billing", health="Degraded", rv="12")})
+    assert tool._run(op="app_status", app="billing").endswith("Health: Degraded")
+    assert "Needs attention: 1" in tool._run(op="fleet_status")
+
+
+def test_disk_snapshot_warm_start(argo, tmp_path, monkeypatch):
+    path = tmp_path / "argo.json"
+    first = AppStateStore(argo.url, "xxx", path=str(path))
+    first.relist()
+
+    second = AppStateStore(argo.url, "xxx", path=str(path))
+    assert len(second) == 2 and second.resource_version == "7"
+    argo.calls.clear()
+    monkeypatch.setattr(second, "start", lambda: None)  # no background watch for this check
+    second.ensure_fresh(60)
+    assert argo.calls == []
+
+
+def test_connected_stream_counts_as_fresh(argo, monkeypatch):
+    store = AppStateStore(argo.url, "xxx")
+    store.relist()
+    monkeypatch.setattr(store, "start", lambda: None)
+    store.synced_at -= 3600  # quiet fleet: no event for an hour
+    store.watching = True
+    argo.calls.clear()
+    store.ensure_fresh(60)
+    assert argo.calls == []
+
+    store.watching = False  # stream down and stale: relist
+    store.ensure_fresh(60)
+    assert [c[1] for c in argo.calls] == ["/api/v1/applications"]
@@ -1,23 +1,59 @@
-import os, json
 from auto_k8s_pilot.tools.argocd_tool import ArgoCDTool
 
-class Resp:
-    def __init__(self, payload, status=200):
-        self._payload = payload
-        self.status_code = status
-    def raise_for_status(self): pass
-    def json(self): return self._payload
 
-def test_list_apps(monkeypatch):
-    os.environ["ARGOCD_BASE_URL"] = "https://argocd.example.com"
-    os.environ["ARGOCD_API_TOKEN"] = "xxx"
-
-    def fake_get(url, headers, timeout, verify):
-        return Resp({"items": [{"metadata": {"name": "app-a"}}, {"metadata": {"name": "app-b"}}]})
-
-    import requests
-    monkeypatch.setattr(requests, "get", fake_get)
+def test_list_apps(fake_server, monkeypatch):
+    monkeypatch.setenv("ARGOCD_BASE_URL", fake_server.url)
+    monkeypatch.setenv("ARGOCD_API_TOKEN", "xxx")
+    fake_server.routes[("GET", "/api/v1/applications")] = {
+        "items": [{"metadata": {"name": "app-a"}}, {"metadata": {"name": "app-b"}}]
+    }
 
     tool = ArgoCDTool()
     out = tool._run(op="list_apps")
     assert "app-a" in out and "app-b" in out
+    assert fake_server.calls[0][4]["Authorization"] == "Bearer xxx"
+
+
+def _app(name, sync="Synced", health="Healthy", project="default", phase="Succeeded", message=""):
+    return {
+        "metadata": {"name": name},
+        "spec": {"project": project},
+        "status": {
+            "sync": {"status": sync},
+            "health": {"status": health},
+            "operationState": {"phase": phase, "message": message},
+        },
+    }
+
+
+def test_fleet_status_reports_only_unhealthy_apps(fake_server, monkeypatch):
+    monkeypatch.setenv("ARGOCD_BASE_URL", fake_server.url)
+    monkeypatch.setenv("ARGOCD_API_TOKEN", "xxx")
+    apps = [_app(f"ok-{i}") for i in range(300)]
+    apps += [
+        _app("chat-api", sync="OutOfSync"),
+        _app("billing", health="Degraded", project="payments", phase="Failed", message="hook failed"),
+    ]
+    fake_server.routes[("GET", "/api/v1/applications")] = {"items": apps}
+
+    out = ArgoCDTool()._run(op="fleet_status", project="payments", selector="team=chat")
+
+    assert out.startswith("Apps: 302 total")
+    assert "Needs attention: 2" in out
+    assert "chat-api" in out and "billing" in out and "hook failed" in out
+    assert "ok-1" not in out
+    _, path, query, _, _ = fake_server.calls[0]
+    assert query["projects"] == "payments" and query["selector"] == "team=chat"
+    assert "items.status.health.status" in query["fields"]
+    assert len(fake_server.calls) == 1
+
+
+def test_list_apps_is_not_cut_at_100(fake_server, monkeypatch):
+    monkeypatch.setenv("ARGOCD_BASE_URL", fake_server.url)
+    monkeypatch.setenv("ARGOCD_API_TOKEN", "xxx")
+    fake_server.routes[("GET", "/api/v1/applications")] = {
+        "items": [{"metadata": {"name": f"app-{i}"}} for i in range(150)]
+    }
+    out = ArgoCDTool()._run(op="list_apps")
+    assert "app-149" in out
+    assert fake_server.calls[0][2]["fields"] == "items.metadata.name"
@@ -0,0 +1,57 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import run  # noqa: E402
+from benchmarks.fixtures import LokiStream  # noqa: E402
+from benchmarks.stubs import agent_reply  # noqa: E402
+
+
+def test_loki_stream_counts_match_a_line_by_line_scan():
+    stream = LokiStream(10_007, end_ns=10 ** 18)
+    start, end = stream.start_ns + 1234 * stream.step + 5, stream.end_ns - 77 * stream.step
+    lo, hi = stream.index_range(start + 1, end)
+    expected = {}
+    for i in range(lo, hi):
+        if "ERROR" in stream.line(i):
+            pod = stream.labels(i)["pod"]
+            expected[pod] = expected.get(pod, 0) + 1
+    assert stream.count(start, end, ["ERROR"]) == expected
+    assert all("HTTP" in stream.line(i) for i in stream.select(stream.start_ns, stream.end_ns, ["HTTP"]))
+
+
+def test_stub_agent_follows_the_task_script_then_answers():
+    task = {"role": "user", "content": 'Current Task: Use loki_query with mode="count" ...\n\n'
+                                        "This is the context you're working with:\nop=\"list_apps\""}
+    first = agent_reply([{"role": "system", "content": "x"}, task])
+    assert "Action: loki_query" in first and '"mode": "count"' in first
+    second = agent_reply([task, {"role": "assistant", "content": first + "\nObservation: Matches: 3"}])
+    assert '"mode": "patterns"' in second
+    done = agent_reply([task, {"role": "assistant", "content": "a\nObservation: one"},
+                        {"role": "assistant", "content": "b\nObservation: Scanned: 9 lines"}])
+    assert done.endswith("Final Answer: Scanned: 9 lines")
+    assert agent_reply([{"role": "user", "content": "Current Task: explain"}]).endswith("Final Answer: No incident filed")
+
+
+def test_benchmark_run_records_results_and_flags_regressions(tmp_path, capsys):
+    results = tmp_path / "results.jsonl"
+    args = ["--scale", "0.002", "--repeat", "1", "--only", "kubectl.pods.digest,loki.count",
+            "--results", str(results), "--fixtures", str(tmp_path / "fx")]
+    from benchmarks.fixtures import write_fixtures
+
+    write_fixtures(tmp_path / "fx", 0.002)
+    assert run.main(args) == 0
+    record = json.loads(results.read_text())
+    assert record["scale"] == 0.002 and record["fixtures"] == "recorded"
+    digest = record["results"]["kubectl.pods.digest"]
+    assert digest["ok"] and digest["output_chars"] > 0 and digest["peak_rss_mb"] > 0
+    assert record["results"]["loki.count"]["head"].startswith("Matches: ")
+
+    slower = json.loads(json.dumps(record))
+    slower["results"]["loki.count"]["seconds"] += 10
+    report = run.compare(slower, record, threshold=0.25)
+    assert any(line.startswith("REGRESSION") and "loki.count" in line for line in report)
+    assert any(line.startswith("ok") and "kubectl.pods.digest" in line for line in report)
@@ -0,0 +1,92 @@
+import pytest
+
+from auto_k8s_pilot.settings import reload_settings
+from auto_k8s_pilot.tools import cf_zone
+from auto_k8s_pilot.tools.cloudflare_dns_tool import CloudflareDNSTool
+
+ZONE = "/zones/z1"
+
+
+@pytest.fixture
+def cf(fake_server, monkeypatch):
+    records = [
+        {"id": f"r{i}", "type": "A", "name": f"host{i}.example.com", "content": f"10.0.{i // 250}.{i % 250}",
+         "proxied": False, "ttl": 300}
+        for i in range(2500)
+    ]
+    records.append({"id": "api", "type": "A", "name": "api.example.com", "content": "1.1.1.1", "proxied": True, "ttl": 1})
+
+    def page(query, body):
+        n, size = int(query["page"]), int(query["per_page"])
+        size = min(size, 1000)  # the server caps pages below what we ask for
+        chunk = records[(n - 1) * size:n * size]
+        return 200, {"result": chunk, "result_info": {"page": n, "total_pages": -(-len(records) // size)}}
+
+    fake_server.routes[("GET", ZONE)] = {"result": {"id": "z1", "name": "example.com"}}
+    fake_server.routes[("GET", ZONE + "/dns_records")] = page
+    fake_server.records = records
+    monkeypatch.setenv("CLOUDFLARE_API_URL", fake_server.url)
+    monkeypatch.setenv("CLOUDFLARE_API_TOKEN", "t")
+    monkeypatch.setenv("CLOUDFLARE_ZONE_ID", "z1")
+    monkeypatch.setenv("TOOL_CACHE_ENABLED", "false")
+    cf_zone.reset_zone_snapshots()
+    yield fake_server
+    cf_zone.reset_zone_snapshots()
+
+
+def test_list_pages_whole_zone_and_get_is_local(cf):
+    tool = CloudflareDNSTool()
+    out = tool._run(op="list")
+    assert out.startswith("Records: 2501\n") and "(2501 total)" in out
+    pages = [c for c in cf.calls if c[1] == ZONE + "/dns_records"]
+    assert len(pages) == 3
+
+    n = len(cf.calls)
+    assert tool._run(op="get", name="api") == "A api.example.com 1.1.1.1 proxied=True ttl=1 id=api"
+    assert tool._run(op="get", name="HOST7.example.com.", type="a").startswith("A host7.example.com 10.0.0.7")
+    assert tool._run(op="get", name="nope") == "NOT FOUND"
+    assert len(cf.calls) == n
+
+
+def test_batch_upsert_sends_only_differences(cf, monkeypatch):
+    sent = []
+
+    def batch(query, body):
+        sent.append(body)
+        posts = [{**r, "id": f"new-{i}"} for i, r in enumerate(body["posts"])]
+        return 200, {"result": {"posts": posts, "patches": body["patches"]}}
+
+    cf.routes[("POST", ZONE + "/dns_records/batch")] = batch
+    records = [
+        {"name": "api", "type": "A", "content": "1.1.1.1", "proxied": True},       # unchanged
+        {"name": "host1", "type": "A", "content": "10.0.0.1", "ttl": 60},         # ttl change
+        {"name": "www", "type": "CNAME", "content": "api.example.com"},           # new
+    ]
+    tool = CloudflareDNSTool()
+    assert tool._run(op="batch_upsert", records=records).startswith("ERROR: Mutating ops disabled")
+    plan = tool._run(op="batch_upsert", records=records, dry_run=True)
+    assert plan.splitlines()[0] == "PLAN: created 1, updated 1, unchanged 1"
+    assert not sent
+
+    monkeypatch.setenv("ALLOW_MUTATING", "true")
+    reload_settings()
+    assert tool._run(op="batch_upsert", records=records) == "BATCH OK: created 1, updated 1, unchanged 1"
+    assert len(sent) == 1
+    assert sent[0]["posts"] == [{"name": "www.example.com", "type": "CNAME", "content": "api.example.com"}]
+    assert sent[0]["patches"] == [{"name": "host1.example.com", "type": "A", "content": "10.0.0.1", "ttl": 60, "id": "r1"}]
+    assert tool._run(op="get", name="www").endswith("id=new-0")
+
+
+def test_upsert_falls_back_without_batch_endpoint(cf, monkeypatch):
+    monkeypatch.setenv("ALLOW_MUTATING", "true")
+
+    def patch(query, body):
+        rec = next(r for r in cf.records if r["id"] == "api")
+        rec.update(body)
+        return 200, {"result": rec}
+
+    cf.routes[("PATCH", ZONE + "/dns_records/api")] = patch
+    tool = CloudflareDNSTool()
+    assert tool._run(op="upsert", name="api", type="A", content="2.2.2.2") == "UPSERT OK: api"
+    assert [c[0] for c in cf.calls if "batch" in c[1] or c[0] == "PATCH"] == ["POST", "PATCH"]
+    assert tool._run(op="upsert", name="api", type="A", content="2.2.2.2") == "UPSERT OK: api (unchanged)"
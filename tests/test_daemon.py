@@ -0,0 +1,78 @@
+import threading
+import time
+
+import requests
+
+from auto_k8s_pilot.daemon import Daemon, load_schedule
+from auto_k8s_pilot.flow import FlowResult
+
+
+class FakeExecutor:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.runs = []
+        self.release = threading.Event()
+
+    def run(self, flow, inputs=None):
+        self.runs.append(flow)
+        if self.delay:
+            self.release.wait(self.delay)
+        return FlowResult(flow=flow)
+
+
+def test_schedule_file_lists_flows():
+    schedule = load_schedule()
+    assert schedule["flow-loki-errors"] == 60 and schedule["flow-dns-audit"] == 3600
+
+
+def test_due_flows_run_and_do_not_overlap():
+    ex = FakeExecutor(delay=5)
+    d = Daemon(executor=ex, schedule={"a": 60, "b": 3600})
+    wait = d.tick()
+    assert sorted(ex.runs) == ["a", "b"] and 59 < wait <= 60
+    assert d.trigger("a") == "running"
+    assert d.flows["a"].skipped == 1
+    ex.release.set()
+    deadline = time.time() + 2
+    while time.time() < deadline and d.flows["a"].running:
+        time.sleep(0.01)
+    assert d.trigger("a", wait=True) == "started"
+    assert d.flows["a"].runs == 2 and d.flows["a"].last_ok is True
+
+
+def test_http_trigger_and_status():
+    ex = FakeExecutor()
+    d = Daemon(executor=ex, schedule={"flow-dns-audit": 0})
+    httpd = d.serve_http("127.0.0.1", 0)
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    try:
+        assert requests.post(f"{base}/flows/flow-dns-audit/run", timeout=5).status_code == 202
+        assert requests.post(f"{base}/flows/nope/run", timeout=5).status_code == 404
+        deadline = time.time() + 2
+        while time.time() < deadline and not ex.runs:
+            time.sleep(0.01)
+        status = requests.get(f"{base}/flows", timeout=5).json()
+        assert ex.runs == ["flow-dns-audit"]
+        assert set(status) == {"flow-dns-audit"}
+        metrics = requests.get(f"{base}/metrics", timeout=5)
+        assert metrics.headers["Content-Type"].startswith("text/plain")
+        assert "# TYPE autok8s_task_duration_seconds histogram" in metrics.text
+    finally:
+        d.stop()
+
+
+def test_overlapping_flows_get_their_own_crew(monkeypatch):
+    built = []
+
+    class PerRunExecutor(FakeExecutor):
+        def __init__(self):
+            super().__init__(delay=0.2)
+            built.append(self)
+
+    monkeypatch.setattr("auto_k8s_pilot.daemon.FlowExecutor", PerRunExecutor)
+    d = Daemon(schedule={"flow-loki-errors": 60, "flow-infra-health": 300})
+    d.tick()
+    deadline = time.monotonic() + 5
+    while any(s.running for s in d.flows.values()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert sorted(ex.runs[0] for ex in built) == ["flow-infra-health", "flow-loki-errors"]
@@ -0,0 +1,116 @@
+import os
+import sys
+
+from auto_k8s_pilot.aio import run_sync
+from auto_k8s_pilot.settings import reload_settings
+from auto_k8s_pilot.tools import cf_zone
+from auto_k8s_pilot.tools.cloudflare_dns_tool import CloudflareDNSTool
+from auto_k8s_pilot.tools.dns_audit import AUDITED, _list_kubectl
+
+LB = "203.0.113.10"
+
+
+def ingress(ns, name, hosts, ip=LB):
+    return {
+        "metadata": {"namespace": ns, "name": name},
+        "spec": {"rules": [{"host": h} for h in hosts]},
+        "status": {"loadBalancer": {"ingress": [{"ip": ip}]}},
+    }
+
+
+def record(i, type, name, content):
+    return {"id": f"r{i}", "type": type, "name": name, "content": content, "proxied": False, "ttl": 1}
+
+
+def test_audit_joins_zone_against_cluster_hosts(fake_kube, monkeypatch):
+    srv = fake_kube
+    srv.routes[("GET", "/apis/networking.k8s.io/v1/ingresses")] = {"items": [
+        ingress("web", "shop", ["shop.example.com"]),
+        ingress("web", "api", ["api.example.com", "docs.example.com"]),
+        ingress("ext", "partner", ["partner.other.org"]),
+    ]}
+    srv.routes[("GET", "/api/v1/services")] = {"items": [
+        {"metadata": {"namespace": "mon", "name": "grafana",
+                      "annotations": {"external-dns.alpha.kubernetes.io/hostname": "grafana.example.com"}},
+         "spec": {"type": "LoadBalancer"}, "status": {"loadBalancer": {"ingress": [{"ip": "203.0.113.20"}]}}},
+        {"metadata": {"namespace": "web", "name": "internal"}, "spec": {"type": "ClusterIP"}},
+    ]}
+    # no Gateway API installed: /apis/gateway.networking.k8s.io/... answers 404
+    srv.routes[("GET", "/zones/z1")] = {"result": {"name": "example.com"}}
+    srv.routes[("GET", "/zones/z1/dns_records")] = {"result": [
+        record(1, "A", "shop.example.com", LB),
+        record(2, "CNAME", "api.example.com", "lb.example.com"),
+        record(3, "A", "lb.example.com", LB),
+        record(4, "A", "grafana.example.com", "198.51.100.1"),
+        record(5, "A", "old.example.com", LB),
+        record(6, "TXT", "docs.example.com", "verification"),
+        record(7, "A", "mail.example.com", "192.0.2.5"),
+    ], "result_info": {"total_pages": 1}}
+    monkeypatch.setenv("CLOUDFLARE_API_URL", srv.url)
+    monkeypatch.setenv("CLOUDFLARE_API_TOKEN", "t")
+    monkeypatch.setenv("CLOUDFLARE_ZONE_ID", "z1")
+    cf_zone.reset_zone_snapshots()
+
+    out = CloudflareDNSTool()._run(op="audit")
+    lines = out.splitlines()
+    assert lines[0] == "DNS audit: 7 records, 5 cluster hosts | missing 1 | wrong_target 1 | dangling 1"
+    rows = {l.split()[1]: l.split()[0] for l in lines[2:]}
+    assert rows == {
+        "docs.example.com": "missing",
+        "grafana.example.com": "wrong_target",
+        "old.example.com": "dangling",
+    }
+    assert "ingress web/api" in out and "service mon/grafana" in out
+    # zone + one record page, one listing per cluster kind; no per-record lookups
+    assert len(srv.calls) == 6
+
+    # the async path awaits the same reads on the loop instead of blocking a pool thread on them
+    monkeypatch.setenv("TOOL_CACHE_ENABLED", "false")
+    reload_settings()
+    assert run_sync(CloudflareDNSTool()._arun(op="audit")) == out
+    cf_zone.reset_zone_snapshots()
+
+
+def test_audit_resolves_hosts_through_wildcard_records(fake_kube, monkeypatch):
+    srv = fake_kube
+    srv.routes[("GET", "/apis/networking.k8s.io/v1/ingresses")] = {"items": [
+        ingress("web", "tenants", ["*.apps.example.com"]),
+        ingress("web", "preview", ["pr-1.preview.example.com", "pr-2.preview.example.com"]),
+        ingress("web", "blog", ["blog.example.com"]),
+        ingress("web", "edge", ["*.edge.example.com"]),
+    ]}
+    srv.routes[("GET", "/api/v1/services")] = {"items": []}
+    srv.routes[("GET", "/zones/z1")] = {"result": {"name": "example.com"}}
+    srv.routes[("GET", "/zones/z1/dns_records")] = {"result": [
+        record(1, "A", "*.apps.example.com", LB),
+        record(2, "A", "*.example.com", LB),
+        record(3, "A", "tenant-a.apps.example.com", LB),  # served by the wildcard ingress
+        record(4, "A", "blog.example.com", "198.51.100.1"),  # own record wins over *.example.com
+    ], "result_info": {"total_pages": 1}}
+    monkeypatch.setenv("CLOUDFLARE_API_URL", srv.url)
+    monkeypatch.setenv("CLOUDFLARE_API_TOKEN", "t")
+    monkeypatch.setenv("CLOUDFLARE_ZONE_ID", "z1")
+    monkeypatch.setenv("TOOL_CACHE_ENABLED", "false")
+    reload_settings()
+    cf_zone.reset_zone_snapshots()
+
+    out = CloudflareDNSTool()._run(op="audit")
+    lines = out.splitlines()
+    assert lines[0] == "DNS audit: 4 records, 5 cluster hosts | missing 0 | wrong_target 1 | dangling 0"
+    assert lines[2].split()[:2] == ["wrong_target", "blog.example.com"]
+    cf_zone.reset_zone_snapshots()
+
+
+def test_kubectl_fallback_names_the_gateway_api_group(tmp_path, monkeypatch):
+    calls = tmp_path / "calls.txt"
+    kubectl = tmp_path / "kubectl"
+    kubectl.write_text(f"#!{sys.executable}\nimport sys\n"
+                       f"open({str(calls)!r}, 'a').write(sys.argv[3] + '\\n')\nprint('{{\"items\": []}}')\n")
+    kubectl.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    for kind in AUDITED:
+        assert _list_kubectl(kind, "/dev/null", None, 10) == []
+    # a bare `gateways` may resolve to Istio's networking.istio.io Gateways
+    assert calls.read_text().split() == ["ingresses", "services", "gateways.gateway.networking.k8s.io",
+                                         "httproutes.gateway.networking.k8s.io"]
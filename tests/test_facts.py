@@ -0,0 +1,58 @@
+import pytest
+
+from auto_k8s_pilot.facts import Condition, Undecided, merge_facts, parse_facts
+
+
+def test_tool_outputs_parse_into_facts():
+    pods = parse_facts(
+        "Pods: 40 total | Running 37 | Pending 3\nAnomalies: 5 pods in 2 groups\nTop anomalies:\n"
+        "- [CrashLoopBackOff] chat/deployment/chat-api: 4 pod(s), restarts max 90 on node-1; e.g. chat-api-a\n"
+        "- [Pending] batch/pod/job-x: 1 pod(s), restarts max 0; e.g. job-x"
+    )
+    assert pods["anomalies"] == 5 and pods["phases"] == {"Running": 37, "Pending": 3}
+    assert pods["reasons"] == {"CrashLoopBackOff": 4, "Pending": 1}
+
+    app = parse_facts("App: chat-api\nSync: OutOfSync\nHealth: Healthy")
+    assert (app["sync"], app["healthy"]) == ("OutOfSync", False)
+
+    fleet = parse_facts("Apps: 500 total | Synced 480 | OutOfSync 20\nHealth: Healthy 490 | Degraded 10\n"
+                        "Needs attention: 25")
+    assert fleet["needs_attention"] == 25 and fleet["health"] == {"Healthy": 490, "Degraded": 10}
+
+    loki = merge_facts([
+        parse_facts("Matches: 12 (exact, 30m in 1 shard(s))\nStreams: 2\nPreview:\nno matches"),
+        parse_facts("Scanned: 12 lines\nLines: 12 | templates: 3"),
+    ])
+    assert (loki["matches"], loki["exact"], loki["scanned"], loki["templates"]) == (12, True, 12, 3)
+
+    record = parse_facts("A api.example.com 203.0.113.10 proxied=True ttl=1 id=abc")
+    assert record["found"] and record["content"] == "203.0.113.10" and record["id"] == "abc"
+    assert parse_facts("NOT FOUND") == {"ok": True, "chars": 9, "kind": "dns_record", "found": False}
+    assert parse_facts("DNS audit: 9 records, 4 cluster hosts | missing 1 | wrong_target 0 | dangling 2")["findings"] == 3
+
+    error = parse_facts("ERROR: Argo API failed (401)")
+    assert not error["ok"] and "401" in error["error"]
+
+
+def test_conditions_read_facts_and_inputs():
+    facts = {
+        "pods": {"anomalies": 0, "reasons": {}},
+        "dns": {"found": True, "content": "203.0.113.10"},
+    }
+    cond = Condition("pods.anomalies > 0 or 'OOMKilled' in pods.reasons")
+    assert cond.steps == {"pods"} and not cond.evaluate(facts)
+
+    upsert = Condition("not dns.found or dns.content != inputs.content")
+    assert not upsert.evaluate(facts, {"content": "203.0.113.10"})
+    assert upsert.evaluate(facts, {"content": "203.0.113.11"})
+
+    with pytest.raises(Undecided):
+        Condition("argo.healthy").evaluate(facts)
+    with pytest.raises(Undecided):
+        Condition("pods.matches > 0").evaluate(facts)
+
+
+@pytest.mark.parametrize("source", ["__import__('os').system('x')", "pods.anomalies > (lambda: 0)()", "pods >"])
+def test_conditions_reject_anything_but_plain_expressions(source):
+    with pytest.raises(ValueError, match="invalid when"):
+        Condition(source)
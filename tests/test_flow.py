@@ -0,0 +1,244 @@
+import inspect
+import subprocess
+import sys
+import time
+import types
+
+import pytest
+from pydantic import BaseModel
+
+from auto_k8s_pilot.flow import FlowExecutor, load_flow, plan_dependencies
+
+
+class FakeAgent:
+    def interpolate_inputs(self, inputs):
+        pass
+
+
+class FakeTask:
+    def __init__(self, name, agent, context=None, delay=0.2, fail=False, tools=None):
+        self.name = name
+        self.description = f"task {name}"
+        self.expected_output = "anything"
+        self.output_file = None
+        self.agent = agent
+        self.context = context
+        self.tools = tools
+        self.delay = delay
+        self.fail = fail
+        self.seen_context = None
+        self.ran = False
+
+    def interpolate_inputs_and_add_conversation_history(self, inputs):
+        pass
+
+    def execute_sync(self, agent=None, context=None):
+        self.ran = True
+        self.seen_context = context
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return types.SimpleNamespace(raw=f"out:{self.name}")
+
+
+class FakeArgs(BaseModel):
+    kind: str
+    output: str = "digest"
+
+
+class FakeTool:
+    name = "kubectl_tool"
+    args_schema = FakeArgs
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.calls = []
+
+    def _run(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.outputs[kwargs["kind"]]
+
+
+def make_pilot(tasks):
+    pilot = types.SimpleNamespace()
+    for t in tasks:
+        setattr(pilot, t.name, lambda t=t: t)
+    return pilot
+
+
+def test_layer_dependencies_from_task_context(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from auto_k8s_pilot.crew import AutoK8sPilot
+
+    c = AutoK8sPilot()
+    steps = load_flow("flow-infra-health")
+    deps = plan_dependencies(steps, {s["run"]: getattr(c, s["run"])() for s in steps})
+    assert deps["explain_pods"] == ["k8s_pods_overview"]
+    assert deps["cluster_summary"] == ["k8s_pods_overview"]
+    assert deps["argocd_list_apps"] == []
+    assert set(deps["incident_create_issue_if_needed"]) == {s["run"] for s in steps} - {"incident_create_issue_if_needed"}
+
+
+def test_crew_builds_only_referenced_agents(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from auto_k8s_pilot.crew import AutoK8sPilot
+
+    c = AutoK8sPilot()
+    t = c.k8s_top_nodes()
+    assert t.agent.tools[0].name == "kubectl_tool"
+    assert "dns_check_records" in c.tasks_config._pending
+    assert "k8s_top_nodes" not in c.tasks_config._pending
+
+
+def test_lazy_tasks_pins_the_crewbase_internals_it_overrides(monkeypatch):
+    """lazy_tasks replaces CrewBase's private task mapping; fail here, not at run time, when crewAI changes it."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from auto_k8s_pilot.crew import AutoK8sPilot
+
+    base = next(c for c in AutoK8sPilot.__mro__ if c.__module__ == "crewai.project.crew_base")
+    assert "self.map_all_task_variables()" in inspect.getsource(base.__init__)
+    assert callable(base._get_all_functions) and callable(base._filter_functions)
+    assert list(inspect.signature(base._map_task_variables).parameters) == [
+        "self", "task_name", "task_info", "agents", "tasks", "output_json_functions", "tool_functions",
+        "callback_functions", "output_pydantic_functions",
+    ]
+    assert getattr(AutoK8sPilot.k8s_top_nodes, "is_task", False)
+
+
+def test_tools_package_imports_lazily():
+    code = "import sys, auto_k8s_pilot.tools as t; assert 'auto_k8s_pilot.tools.loki_tool' not in sys.modules; t.loki_tool"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_independent_branches_run_concurrently(monkeypatch):
+    k8s, argo, loki = FakeAgent(), FakeAgent(), FakeAgent()
+    pods = FakeTask("pods", k8s)
+    tasks = [
+        pods,
+        FakeTask("explain", FakeAgent(), context=[pods]),
+        FakeTask("argo", argo),
+        FakeTask("loki", loki),
+    ]
+    steps = [{"run": t.name} for t in tasks]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: steps)
+
+    res = FlowExecutor(pilot=make_pilot(tasks), max_workers=4).run("test")
+    assert res.ok
+    assert set(res.timings) == {"pods", "explain", "argo", "loki"}
+    # longest chain is pods -> explain (0.4s), not the sum (0.8s)
+    assert res.wall_time < 0.7
+    assert tasks[1].seen_context == "out:pods"
+
+
+def test_failed_step_skips_dependents(monkeypatch):
+    a = FakeAgent()
+    pods = FakeTask("pods", a, delay=0, fail=True)
+    tasks = [pods, FakeTask("explain", FakeAgent(), context=[pods], delay=0), FakeTask("argo", FakeAgent(), delay=0)]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: [{"run": t.name} for t in tasks])
+
+    res = FlowExecutor(pilot=make_pilot(tasks), max_workers=2).run("test")
+    assert "boom" in res.errors["pods"]
+    assert res.errors["explain"].startswith("skipped")
+    assert "argo" in res.outputs
+
+
+def test_trigger_context_reaches_every_step(monkeypatch):
+    pods = FakeTask("pods", FakeAgent(), delay=0)
+    tasks = [pods, FakeTask("explain", FakeAgent(), context=[pods], delay=0)]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: [{"run": t.name} for t in tasks])
+
+    FlowExecutor(pilot=make_pilot(tasks), max_workers=2).run("test", context="chat-api degraded")
+    assert tasks[0].seen_context == "chat-api degraded"
+    assert tasks[1].seen_context.startswith("chat-api degraded") and "out:pods" in tasks[1].seen_context
+
+
+HEALTHY_PODS = "Pods: 12 total | Running 12\nAnomalies: 0 pods in 0 groups"
+SICK_PODS = ("Pods: 12 total | Running 11 | Pending 1\nAnomalies: 1 pods in 1 groups\n"
+             "- [CrashLoopBackOff] chat/deployment/chat-api: 1 pod(s), restarts max 40; e.g. chat-api-1")
+
+
+@pytest.mark.parametrize("pods, explained", [(HEALTHY_PODS, False), (SICK_PODS, True)])
+def test_when_skips_llm_steps_on_a_healthy_cluster(monkeypatch, pods, explained):
+    tool = FakeTool({"pods": pods, "events": "Events: 3 total | Normal 3\nWarning groups: 0"})
+    overview = FakeTask("pods", FakeAgent(), tools=[tool])
+    events = FakeTask("events", FakeAgent(), tools=[tool])
+    explain = FakeTask("explain", FakeAgent(), context=[overview], delay=0)
+    triage = FakeTask("triage", FakeAgent(), delay=0)
+    tasks = [overview, events, explain, triage]
+    steps = [
+        {"run": "pods", "tool": "kubectl_tool", "args": {"kind": "pods"}},
+        {"run": "events", "tool": "kubectl_tool", "args": {"kind": "events"}},
+        {"run": "explain", "when": "pods.anomalies > 0"},
+        {"run": "triage", "when": "pods.anomalies > 0 or events.warnings > 0"},
+    ]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: steps)
+
+    res = FlowExecutor(pilot=make_pilot(tasks), max_workers=4).run("test")
+    assert res.ok and not overview.ran and not events.ran
+    assert sorted(tool.calls, key=lambda c: c["kind"]) == [{"kind": "events", "output": "digest"},
+                                                           {"kind": "pods", "output": "digest"}]
+    assert res.outputs["pods"].raw == pods
+    assert res.facts["pods"]["anomalies"] == (1 if explained else 0)
+    assert explain.ran is explained and triage.ran is explained
+    if explained:
+        assert "CrashLoopBackOff" in explain.seen_context
+    else:
+        assert res.skipped == {"explain": "when: pods.anomalies > 0",
+                               "triage": "when: pods.anomalies > 0 or events.warnings > 0"}
+
+
+def test_multi_call_tool_step_runs_calls_concurrently(monkeypatch):
+    class SlowTool(FakeTool):
+        def _run(self, **kwargs):
+            time.sleep(0.4)
+            return super()._run(**kwargs)
+
+    tool = SlowTool({"pods": SICK_PODS, "events": "Events: 3 total | Normal 3\nWarning groups: 0"})
+    overview = FakeTask("pods", FakeAgent(), tools=[tool])
+    steps = [{"run": "pods", "tool": "kubectl_tool", "args": [{"kind": "pods"}, {"kind": "events"}]}]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: steps)
+
+    res = FlowExecutor(pilot=make_pilot([overview]), max_workers=1).run("test")
+    assert res.ok and res.timings["pods"] < 0.7
+    assert res.outputs["pods"].raw.startswith("Pods: 12 total") and "Events: 3 total" in res.outputs["pods"].raw
+
+
+def test_undecided_when_runs_the_step(monkeypatch):
+    pods = FakeTask("pods", FakeAgent(), delay=0)  # LLM output "out:pods" carries no anomaly count
+    triage = FakeTask("triage", FakeAgent(), delay=0)
+    steps = [{"run": "pods"}, {"run": "triage", "when": "pods.anomalies > 0"}]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: steps)
+
+    res = FlowExecutor(pilot=make_pilot([pods, triage]), max_workers=2).run("test")
+    assert triage.ran and not res.skipped
+
+
+def test_flow_steps_are_validated_before_anything_runs():
+    pods = FakeTask("pods", FakeAgent(), tools=[FakeTool({})])
+    executor = FlowExecutor(pilot=make_pilot([pods]), max_workers=1)
+    with pytest.raises(ValueError, match="does not run"):
+        executor.run_steps("t", [{"run": "pods", "when": "argo.healthy"}])
+    with pytest.raises(ValueError, match="not one of its agent's tools"):
+        executor.run_steps("t", [{"run": "pods", "tool": "loki_query"}])
+    with pytest.raises(ValueError, match="invalid args"):
+        executor.run_steps("t", [{"run": "pods", "tool": "kubectl_tool", "args": {"output": "wide"}}])
+    assert not pods.ran
+
+
+def test_llm_steps_narrate_rule_findings(monkeypatch):
+    tool = FakeTool({"pods": SICK_PODS})
+    overview = FakeTask("pods", FakeAgent(), tools=[tool])
+    explain = FakeTask("explain", FakeAgent(), context=[overview], delay=0)
+    triage = FakeTask("triage", FakeAgent(), context=[overview], delay=0)
+    steps = [
+        {"run": "pods", "tool": "kubectl_tool", "args": {"kind": "pods"}},
+        {"run": "explain", "when": "findings.total > 0"},
+        {"run": "triage", "when": "findings.warning > 0"},
+    ]
+    monkeypatch.setattr("auto_k8s_pilot.flow.load_flow", lambda flow: steps)
+
+    res = FlowExecutor(pilot=make_pilot([overview, explain, triage]), max_workers=2).run("test")
+    assert [(f.rule, f.subject) for f in res.findings["pods"]] == [("pod-crashloop", "chat/deployment/chat-api")]
+    assert explain.ran and explain.seen_context.startswith("Findings: 1 | critical 1")
+    assert SICK_PODS in explain.seen_context
+    assert not triage.ran and res.skipped == {"triage": "when: findings.warning > 0"}
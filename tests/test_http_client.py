@@ -0,0 +1,45 @@
+import pytest
+import requests
+
+from auto_k8s_pilot.http_client import CircuitOpenError, EndpointPolicy, HttpClient, get_http
+
+
+def test_retries_5xx_then_succeeds(fake_server):
+    attempts = []
+
+    def flaky(query, body):
+        attempts.append(1)
+        return (503, {"error": "busy"}) if len(attempts) < 3 else (200, {"ok": True})
+
+    fake_server.routes[("GET", "/flaky")] = flaky
+    http = HttpClient("t", EndpointPolicy(timeout=2, retries=3, backoff=0.01))
+    r = http.get(f"{fake_server.url}/flaky")
+    assert r.status_code == 200 and r.json() == {"ok": True}
+    assert len(attempts) == 3
+
+
+def test_breaker_opens_and_recovers(fake_server, monkeypatch):
+    fake_server.routes[("GET", "/down")] = lambda q, b: (500, {"error": "down"})
+    http = HttpClient("t", EndpointPolicy(timeout=2, retries=0), breaker_threshold=2, breaker_cooldown=60)
+    for _ in range(2):
+        assert http.get(f"{fake_server.url}/down").status_code == 500
+    with pytest.raises(CircuitOpenError):
+        http.get(f"{fake_server.url}/down")
+    assert len(fake_server.calls) == 2  # short-circuited, no network
+
+    # after the cooldown one probe goes through and closes the breaker on success
+    breaker = http.breaker(fake_server.url.split("//", 1)[1])
+    monkeypatch.setattr(breaker, "opened_at", breaker.opened_at - 61)
+    fake_server.routes[("GET", "/down")] = {"ok": True}
+    assert http.get(f"{fake_server.url}/down").status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_circuit_open_is_a_request_error():
+    assert issubclass(CircuitOpenError, requests.RequestException)
+
+
+def test_get_http_reuses_session(fake_server):
+    assert get_http("loki") is get_http("loki")
+    assert get_http("loki") is not get_http("argocd")
+    assert get_http("loki").policy.timeout == (2, 8)
@@ -0,0 +1,77 @@
+import json
+
+from auto_k8s_pilot.tools.k8s_digest import digest_items, pod_anomaly
+from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
+
+
+def pod(name, ns="web", owner="chat-api-6f7d8c9b5", phase="Running", waiting=None, restarts=0,
+        ready=True, oom=False, node="node-a"):
+    cs = {"ready": ready, "restartCount": restarts, "state": {"waiting": {"reason": waiting}} if waiting else {}}
+    if oom:
+        cs["lastState"] = {"terminated": {"reason": "OOMKilled"}}
+    return {
+        "metadata": {"name": name, "namespace": ns, "labels": {"pod-template-hash": owner.rsplit("-", 1)[-1]},
+                     "ownerReferences": [{"kind": "ReplicaSet", "name": owner}]},
+        "spec": {"nodeName": node, "containers": [{"name": "c"}]},
+        "status": {"phase": phase, "containerStatuses": [cs]},
+    }
+
+
+def test_anomaly_classification():
+    assert pod_anomaly(pod("a")) is None
+    assert pod_anomaly(pod("a", waiting="CrashLoopBackOff", ready=False)) == "CrashLoopBackOff"
+    assert pod_anomaly(pod("a", oom=True)) == "OOMKilled"
+    assert pod_anomaly(pod("a", ready=False)) == "NotReady"
+    assert pod_anomaly(pod("a", phase="Pending")) == "Pending"
+    assert pod_anomaly(pod("a", restarts=9)) == "HighRestarts"
+
+
+def test_digest_keeps_late_anomalies_at_scale():
+    pods = [pod(f"ok-{i}", ns=f"ns-{i % 300}", owner=f"svc{i % 500}-abcde") for i in range(10_000)]
+    pods += [pod(f"chat-api-6f7d8c9b5-{i}", waiting="CrashLoopBackOff", ready=False, restarts=40 + i)
+             for i in range(60)]
+    pods.append(pod("zz-pending", ns="zz", owner="late-12345", phase="Pending"))
+
+    out = digest_items("pods", iter(pods))
+    assert out.startswith("Pods: 10061 total")
+    assert "Anomalies: 61 pods in 2 groups" in out
+    lines = out.splitlines()
+    assert lines[2].startswith("- [CrashLoopBackOff] web/deployment/chat-api: 60 pod(s), restarts max 99")
+    assert lines[3].startswith("- [Pending] zz/deployment/late")
+    assert len(out) <= 4000
+
+
+def test_digest_caps_anomaly_groups_at_the_budget():
+    # 400 distinct broken deployments: ranked groups fill the budget, the rest are counted
+    pods = [pod(f"svc{i}-6f7d8c9b5-abcde", ns=f"ns-{i}", owner=f"svc{i}-6f7d8c9b5", waiting="CrashLoopBackOff",
+                ready=False, restarts=i) for i in range(400)]
+    pods.append(pod("db-0", ns="data", owner="db-7c9d8b6f4", oom=True))
+    out = digest_items("pods", iter(pods))
+    lines = out.splitlines()
+    assert len(out) <= 4000
+    assert "Anomalies: 401 pods in 401 groups" in out
+    assert lines[2].startswith("- [OOMKilled] data/")
+    more = next(l for l in lines if l.endswith(" more groups"))
+    assert lines.index(more) == 2 + sum(l.startswith("- [") for l in lines)
+    assert int(more.split()[1]) == 401 - sum(l.startswith("- [") for l in lines)
+
+
+def test_event_digest_groups_warnings_by_owner():
+    def ev(name, reason, etype="Warning", count=1):
+        return {"metadata": {"namespace": "web"}, "type": etype, "reason": reason, "count": count,
+                "involvedObject": {"kind": "Pod", "name": name}, "message": "Back-off restarting",
+                "lastTimestamp": "2024-01-01T00:00:00Z"}
+
+    events = [ev(f"chat-api-6f7d8c9b5-x{i:04d}", "BackOff", count=3) for i in range(50)]
+    events += [ev("web-1", "Pulled", etype="Normal")]
+    out = digest_items("events", events)
+    assert "Events: 51 total | Warning 50 | Normal 1" in out
+    assert "- [BackOff] web/pod/chat-api-* x150" in out and "50 objects" in out
+
+
+def test_tool_digest_via_api_stream(fake_kube):
+    doc = {"kind": "PodList", "metadata": {}, "items": [pod("a"), pod("b", waiting="ImagePullBackOff", ready=False)]}
+    fake_kube.routes[("GET", "/api/v1/pods")] = json.dumps(doc).encode()
+    out = KubectlTool()._run(action="get", kind="pods", namespace="all", output="digest")
+    assert "[ImagePullBackOff] web/deployment/chat-api: 1 pod(s)" in out
+    assert KubectlTool()._run(action="get", kind="deploy", output="digest").startswith("ERROR:")
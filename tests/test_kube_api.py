@@ -0,0 +1,133 @@
+import subprocess
+
+from auto_k8s_pilot.settings import reload_settings
+from auto_k8s_pilot.tools import kube_api
+from auto_k8s_pilot.tools.kubectl_tool import KubectlTool, merge_cluster_outputs
+
+POD_TABLE = {
+    "kind": "Table",
+    "columnDefinitions": [{"name": n} for n in ("Name", "Ready", "Status", "Restarts", "Age", "IP", "Node")],
+    "rows": [
+        {"cells": ["pod-1", "1/1", "Running", 0, "2d", "10.0.0.1", "node-a"],
+         "object": {"metadata": {"name": "pod-1", "namespace": "default"}}},
+        {"cells": ["pod-2", "0/1", "CrashLoopBackOff", 7, "3h", None, "node-b"],
+         "object": {"metadata": {"name": "pod-2", "namespace": "web"}}},
+    ],
+}
+
+
+def no_subprocess(*args, **kwargs):
+    raise AssertionError("kubectl subprocess must not be used")
+
+
+def test_get_pods_via_api(fake_kube, monkeypatch):
+    fake_kube.routes[("GET", "/api/v1/pods")] = POD_TABLE
+    monkeypatch.setattr(subprocess, "run", no_subprocess)
+
+    tool = KubectlTool()
+    out = tool._run(action="get", kind="pods", namespace="all")
+    lines = out.splitlines()
+    assert lines[0].split() == ["default", "pod-1", "1/1", "Running", "0", "2d", "10.0.0.1", "node-a"]
+    assert "CrashLoopBackOff" in lines[1] and "<none>" in lines[1]
+
+    method, path, query, body, headers = fake_kube.calls[0]
+    assert headers["Authorization"] == "Bearer fake-token"
+    assert "as=Table" in headers["Accept"]
+
+    # same kubeconfig/context -> same pooled client
+    tool._run(action="get", kind="po", namespace="all")
+    assert len(kube_api._CLIENTS) == 1
+
+
+def test_get_json_and_name(fake_kube):
+    fake_kube.routes[("GET", "/apis/apps/v1/namespaces/web/deployments")] = {
+        "kind": "DeploymentList",
+        "items": [{"metadata": {"name": "api", "managedFields": [{"x": 1}]}}],
+    }
+    tool = KubectlTool()
+    out = tool._run(action="get", kind="deploy", namespace="web", output="json")
+    assert '"api"' in out and "managedFields" not in out
+    assert tool._run(action="get", kind="deploy", namespace="web", output="name") == "deployment.apps/api"
+
+
+def test_rollout_restart_patch(fake_kube, monkeypatch):
+    monkeypatch.setenv("ALLOW_MUTATING", "true")
+    path = "/apis/apps/v1/namespaces/default/deployments/api"
+    fake_kube.routes[("PATCH", path)] = {"metadata": {"name": "api"}}
+
+    out = KubectlTool()._run(action="rollout_restart", kind="deployment", name="api", namespace="default")
+    assert out == "deployment.apps/api restarted"
+    method, _, _, body, headers = fake_kube.calls[-1]
+    assert headers["Content-Type"] == "application/strategic-merge-patch+json"
+    assert kube_api.RESTART_ANNOTATION in body["spec"]["template"]["metadata"]["annotations"]
+
+
+def test_api_errors_are_reported(fake_kube):
+    out = KubectlTool()._run(action="describe", kind="pods", name="missing", namespace="default")
+    assert out.startswith("ERROR: kubernetes API 404")
+
+
+def test_unmapped_kind_falls_back_to_kubectl(fake_kube, monkeypatch):
+    seen = {}
+
+    class Proc:
+        returncode = 0
+        stdout = "widget-1\n"
+        stderr = ""
+
+    def fake_run(cmd, capture_output, text, timeout):
+        seen["cmd"] = cmd
+        return Proc()
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    out = KubectlTool()._run(action="get", kind="widgets.example.com", namespace="default")
+    assert out == "widget-1"
+    assert seen["cmd"][0] == "kubectl"
+
+
+def test_fan_out_across_contexts(fake_kube, tmp_path, monkeypatch):
+    fake_kube.routes[("GET", "/api/v1/pods")] = POD_TABLE
+    clusters = {"prod-a": fake_kube.url, "prod-b": fake_kube.url, "prod-c": "http://127.0.0.1:1", "staging": fake_kube.url}
+    kubeconfig = tmp_path / "multi"
+    kubeconfig.write_text(
+        "apiVersion: v1\nkind: Config\n"
+        + "clusters:\n" + "".join(f"- name: {c}\n  cluster:\n    server: {url}\n" for c, url in clusters.items())
+        + "contexts:\n" + "".join(f"- name: {c}\n  context:\n    cluster: {c}\n    user: u\n" for c in clusters)
+        + "users:\n- name: u\n  user:\n    token: fake-token\n"
+    )
+    monkeypatch.setenv("KUBECONFIG", str(kubeconfig))
+    monkeypatch.setenv("KUBECTL_TIMEOUT", "3")
+
+    out = KubectlTool()._run(action="get", kind="pods", namespace="all", contexts=["prod-*"])
+    lines = out.splitlines()
+    assert [l.split()[0] for l in lines[:4]] == ["prod-a", "prod-a", "prod-b", "prod-b"]
+    assert lines[0].split()[1:3] == ["default", "pod-1"]
+    assert "Clusters: 2/3 ok" in out
+    assert any(l.startswith("FAILED prod-c:") for l in lines)
+    assert "staging" not in out
+
+    assert KubectlTool()._run(action="get", kind="pods", contexts=["dev-*"]).startswith("ERROR: no kube context")
+    monkeypatch.setenv("ALLOW_MUTATING", "true")
+    reload_settings()
+    res = KubectlTool()._run(action="cordon", kind="node", name="n1", contexts=["prod-*"])
+    assert res.startswith("ERROR: 'contexts' fan-out is read-only")
+
+
+def test_merged_fan_out_stays_in_budget():
+    rows = "\n".join(f"pod-{i:04d}   1/1   Running   0   2d" for i in range(100))
+    results = {f"prod-{c}": "NAME   READY   STATUS   RESTARTS   AGE\n" + rows for c in "abcd"}
+    results["prod-e"] = "ERROR: timed out after 3s"
+    out = merge_cluster_outputs(results, tabular=True, budget=2000)
+    lines = out.splitlines()
+    assert len(out) <= 2000
+    assert lines[0].split()[:2] == ["CLUSTER", "NAME"]
+    assert lines[-3].startswith("... ") and lines[-3].endswith(" more rows")
+    assert lines[-2:] == ["Clusters: 4/5 ok", "FAILED prod-e: timed out after 3s"]
+
+    capped = {"prod-a": ("pod-0001   1/1   Running   0   2d\n" * 200)[:4000]}
+    out = merge_cluster_outputs(capped, tabular=True)
+    assert "Cut at the per-cluster limit: prod-a" in out
+    assert all(l.endswith("2d") for l in out.splitlines() if l.startswith("prod-a"))
+
+    sections = merge_cluster_outputs({f"prod-{c}": "x" * 900 for c in "abcdef"}, tabular=False, budget=2000)
+    assert len(sections) <= 2000 and "... 4 more clusters" in sections
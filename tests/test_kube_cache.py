@@ -0,0 +1,110 @@
+import json
+import time
+
+from auto_k8s_pilot.tools import kube_cache
+from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
+
+
+def pod(name, ns="default", node="node-a", labels=None, rv="1", phase="Running"):
+    return {
+        "metadata": {"name": name, "namespace": ns, "labels": labels or {}, "resourceVersion": rv,
+                     "creationTimestamp": "2024-01-01T00:00:00Z"},
+        "spec": {"nodeName": node, "containers": [{"name": "c"}]},
+        "status": {"phase": phase, "containerStatuses": [{"ready": phase == "Running", "restartCount": 0}]},
+    }
+
+
+def test_parse_selector():
+    match, equals = kube_cache.parse_selector("app=web,tier!=db,env in (prod, stage),!canary")
+    assert equals == [("app", "web")]
+    assert match({"app": "web", "env": "prod"})
+    assert not match({"app": "web", "env": "dev"})
+    assert not match({"app": "web", "env": "prod", "canary": "1"})
+    assert not match({"app": "web", "env": "prod", "tier": "db"})
+
+
+def test_get_served_from_watched_snapshot(fake_kube, monkeypatch):
+    monkeypatch.setenv("KUBE_CACHE_ENABLED", "true")
+    monkeypatch.setenv("KUBE_CACHE_MAX_STALENESS", "300")
+    watched = {"n": 0}
+
+    def pods(query, body):
+        if query.get("watch"):
+            watched["n"] += 1
+            if watched["n"] > 1:
+                time.sleep(0.2)
+                return 200, b""
+            assert query["resourceVersion"] == "20"
+            events = [
+                {"type": "DELETED", "object": pod("web-1", labels={"app": "web"}, rv="21")},
+                {"type": "ADDED", "object": pod("web-3", node="node-b", labels={"app": "web"}, rv="22")},
+            ]
+            return 200, "\n".join(json.dumps(e) for e in events).encode()
+        if query.get("continue") == "p2":
+            return 200, {"metadata": {"resourceVersion": "20"},
+                         "items": [pod("db-1", ns="data", node="node-b", labels={"app": "db"})]}
+        return 200, {"metadata": {"resourceVersion": "20", "continue": "p2"},
+                     "items": [pod("web-1", labels={"app": "web"}), pod("web-2", labels={"app": "web"})]}
+
+    fake_kube.routes[("GET", "/api/v1/pods")] = pods
+    tool = KubectlTool()
+
+    out = tool._run(action="get", kind="pods", namespace="all", selector="app=web")
+    assert "web-" in out and "db-1" not in out
+
+    deadline = time.time() + 5
+    while time.time() < deadline and "web-3" not in tool._run(action="get", kind="pods", namespace="default"):
+        time.sleep(0.05)
+    out = tool._run(action="get", kind="pods", namespace="default")
+    assert "web-3" in out and "web-1" not in out
+
+    assert tool._run(action="get", kind="pods", namespace="all", node="node-b", output="name").splitlines() == [
+        "pod/db-1", "pod/web-3",
+    ]
+    lists = [c for c in fake_kube.calls if not c[2].get("watch")]
+    assert len(lists) == 2  # one paged list, everything else from the snapshot
+
+
+def test_stale_snapshot_is_relisted(fake_kube):
+    fake_kube.routes[("GET", "/api/v1/pods")] = lambda q, b: (
+        (410, {"kind": "Status", "code": 410, "message": "too old"}) if q.get("watch")
+        else (200, {"metadata": {"resourceVersion": "5"}, "items": [pod("a")]})
+    )
+    from auto_k8s_pilot.tools.kube_api import get_client
+    import os
+
+    store = kube_cache.ResourceStore(get_client(os.environ["KUBECONFIG"]), "pods")
+    store.ensure_fresh(0)
+    store.stop()
+    store.synced_at -= 10
+    store.ensure_fresh(5)
+    store.stop()
+    assert store.lists >= 2 and len(store) == 1
+
+
+def test_live_watch_is_fresh_and_relist_supersedes_it(fake_kube):
+    fake_kube.routes[("GET", "/api/v1/pods")] = lambda q, b: (
+        200, {"metadata": {"resourceVersion": "5"}, "items": [pod("a", rv="5", phase="Running")]}
+    )
+    from auto_k8s_pilot.tools.kube_api import get_client
+    import os
+
+    store = kube_cache.ResourceStore(get_client(os.environ["KUBECONFIG"]), "pods")
+    store.start = lambda: None  # drive the watch state by hand
+    store.ensure_fresh(30)
+    assert store.lists == 1
+
+    # a connected watch on a quiet cluster: no events for a while, still no relist
+    store.watching, store.synced_at = True, store.synced_at - 120
+    store.ensure_fresh(30)
+    assert store.lists == 1
+    store.watching = False
+    store.ensure_fresh(30)
+    assert store.lists == 2 and not store.watching
+
+    # an event from the stream opened before that relist must not roll the snapshot back
+    before = store.generation - 1
+    store.apply({"type": "MODIFIED", "object": pod("a", rv="4", phase="Pending")}, before)
+    assert store.select(name="a")[0]["status"]["phase"] == "Running" and store.resource_version == "5"
+    store.apply({"type": "MODIFIED", "object": pod("a", rv="6", phase="Pending")}, store.generation)
+    assert store.select(name="a")[0]["status"]["phase"] == "Pending" and store.resource_version == "6"
@@ -0,0 +1,74 @@
+import json
+import sys
+
+from auto_k8s_pilot.tools import kube_stream
+from auto_k8s_pilot.tools.kube_stream import iter_items, render_records
+from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
+
+
+def pod(i, reason=None):
+    state = {"waiting": {"reason": reason}} if reason else {"running": {}}
+    return {
+        "metadata": {"name": f"pod-{i}", "namespace": "default", "managedFields": [{"big": "x" * 100}]},
+        "spec": {"nodeName": "node-a", "containers": [{"name": "c"}]},
+        "status": {"phase": "Running", "containerStatuses": [{"restartCount": i, "ready": not reason, "state": state}],
+                   "conditions": [{"type": "Ready", "status": "False" if reason else "True"}]},
+    }
+
+
+def test_scanner_handles_arbitrary_chunking():
+    doc = json.dumps({"apiVersion": "v1", "metadata": {"resourceVersion": "1"},
+                      "items": [pod(1), pod(2, "CrashLoopBackOff")], "kind": "List"})
+    for size in (1, 7, 64, len(doc)):
+        items = list(iter_items(doc[i:i + size] for i in range(0, len(doc), size)))
+        assert [i["metadata"]["name"] for i in items] == ["pod-1", "pod-2"]
+
+
+def test_scanner_reads_a_large_item_once(monkeypatch):
+    # a 300 KB item arriving in 1 KB chunks, with braces and escaped quotes inside strings
+    big = {"metadata": {"name": "cm-1"}, "data": {"k": ('{"x": "\\"}"] ' * 20_000)}}
+    doc = json.dumps({"kind": "List", "items": [big, {"metadata": {"name": "cm-2"}}]})
+    calls = []
+    decode = kube_stream._DECODER.raw_decode
+    monkeypatch.setattr(kube_stream._DECODER, "raw_decode", lambda *a: calls.append(a[1]) or decode(*a))
+
+    items = list(iter_items(doc[i:i + 1024] for i in range(0, len(doc), 1024)))
+    assert [i["metadata"]["name"] for i in items] == ["cm-1", "cm-2"]
+    assert items[0] == big
+    assert len(calls) < 20  # not one re-decode of the big item per chunk
+
+
+def test_compact_projection_and_budget():
+    items = (pod(i) for i in range(10_000))
+    out = render_records(items, budget=500)
+    lines = out.splitlines()
+    assert lines[-1].startswith("... truncated")
+    rec = json.loads(lines[0])
+    assert rec == {"name": "pod-0", "namespace": "default", "phase": "Running", "restarts": 0,
+                   "node": "node-a", "conditions": []}
+    assert len(out) <= 600
+
+    crash = json.loads(render_records([pod(3, "CrashLoopBackOff")]))
+    assert crash["reason"] == "CrashLoopBackOff" and crash["conditions"] == ["Ready"]
+
+
+def test_stream_stops_reading_subprocess_early():
+    # emits an endless list; the tool must stop at the budget and kill the producer
+    script = (
+        "import json,sys\n"
+        "sys.stdout.write('{\"apiVersion\":\"v1\",\"items\":[')\n"
+        "i=0\n"
+        "while True:\n"
+        "    sys.stdout.write((',' if i else '') + json.dumps({'metadata':{'name':'p%d'%i,'namespace':'d'},"
+        "'spec':{'containers':[{}]},'status':{'phase':'Running'}}))\n"
+        "    i+=1\n"
+    )
+    out = KubectlTool._stream_list([sys.executable, "-c", script], "/dev/null", "pods", "compact", timeout=20)
+    assert out.splitlines()[0].startswith('{"name":"p0"')
+    assert "truncated" in out.splitlines()[-1]
+
+
+def test_stream_reports_kubectl_errors():
+    script = "import sys; sys.stderr.write('forbidden'); sys.exit(1)"
+    out = KubectlTool._stream_list([sys.executable, "-c", script], "/dev/null", "pods", "json", timeout=20)
+    assert out == "ERROR: kubectl exited 1: forbidden"
@@ -1,5 +1,8 @@
 import os
+import sys
+import time
 import types
+from auto_k8s_pilot.facts import parse_facts
 from auto_k8s_pilot.tools.kubectl_tool import KubectlTool
 
 class Proc:
@@ -27,3 +30,107 @@ def test_get_pods_wide(monkeypatch):
     tool = KubectlTool()
     out = tool._run(action="get", kind="pods", namespace="default", output="wide")
     assert "pod-1" in out and "pod-2" in out
+
+
+FAKE_KUBECTL = '''#!{python}
+import json, os, sys, time
+args = [a for a in sys.argv[1:] if not a.startswith(("--kubeconfig=", "--context="))]
+if args[:2] == ["get", "pods"]:
+    pods = []
+    for i in range(12):
+        containers = [{{"name": "main"}}] + ([{{"name": "sidecar"}}] if i == 0 else [])
+        statuses = [{{"name": "main", "restartCount": 3 if i < 2 else 0}}]
+        pods.append({{"metadata": {{"name": f"web-{{i}}", "namespace": "shop"}},
+                     "spec": {{"containers": containers}}, "status": {{"containerStatuses": statuses}}}})
+    print(json.dumps({{"kind": "PodList", "items": pods}}))
+    sys.exit(0)
+pod, container = args[1], args[args.index("-c") + 1]
+with open({calls!r}, "a") as f:
+    f.write(" ".join(args) + "\\n")
+if pod == "web-11":
+    sys.stderr.write("error: container main is not valid for pod web-11\\n")
+    sys.exit(1)
+time.sleep(0.05)
+n = int(pod.split("-")[1])
+for s in range(5):
+    level = "ERROR" if (s + n) % 5 == 0 and n % 3 == 0 else "INFO"
+    print(f"2026-10-18T10:00:{{s:02d}}.{{n:02d}}0000000Z {{level}} {{container}} request {{s}} on {{pod}}")
+if pod == os.environ.get("SLOW_POD"):  # a stream that stays open after its lines
+    sys.stdout.flush()
+    time.sleep(30)
+'''
+
+
+def test_logs_digest_fans_out_over_every_pod(tmp_path, monkeypatch):
+    calls = tmp_path / "calls.txt"
+    kubectl = tmp_path / "kubectl"
+    kubectl.write_text(FAKE_KUBECTL.format(python=sys.executable, calls=str(calls)))
+    kubectl.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("KUBECONFIG", "/dev/null")
+    monkeypatch.setenv("TOOL_CACHE_ENABLED", "false")
+    monkeypatch.setenv("KUBECTL_LOGS_PARALLEL", "4")
+
+    out = KubectlTool()._run(action="logs", selector="app=web", namespace="shop", output="digest",
+                             since="15m", tail=100)
+    assert out.splitlines()[0] == ("Logs: 12 pods, 13 containers | lines 60 | matched 60 | errors 5 | "
+                                   "warnings 0 | failed 1 | cut 0")
+    # web-0 (both containers), web-3, web-6 and web-9 log one ERROR each; the failed pod is listed, not dropped
+    assert out.index("- shop/web-0/main: errors 1") < out.index("- shop/web-1/main: errors 0")
+    assert "- shop/web-11/main: kubectl exited 1: error: container main is not valid" in out
+    lines = out.split("by time):\n")[1].splitlines()
+    assert lines == sorted(lines) and lines[-1].startswith("2026-10-18T10:00:04.100000000Z web-10: INFO")
+    fetched = calls.read_text().splitlines()
+    assert len(fetched) == 13 and all("--timestamps --tail 100 --since 15m" in c for c in fetched)
+
+    facts = parse_facts(out)
+    assert (facts["kind"], facts["errors"], facts["failed"]) == ("pod_logs", 5, 1)
+    assert {s["pod"] for s in facts["sources"] if s["errors"]} == {"web-0", "web-3", "web-6", "web-9"}
+
+    calls.unlink()
+    out = KubectlTool()._run(action="logs", selector="app=web", namespace="shop", output="digest",
+                             previous=True, level="error")
+    assert out.startswith("Logs: 2 pods, 2 containers | lines 10 | matched 1 | errors 1")
+    assert out.endswith("web-0: ERROR main request 0 on web-0")
+    assert all(c.endswith("--previous") for c in calls.read_text().splitlines())
+
+    bad = KubectlTool()._run(action="logs", selector="app=web", output="digest", since="yesterday")
+    assert bad.startswith("ERROR: since must be a duration")
+    assert KubectlTool()._run(action="logs", name="web-0", grep="(").startswith("ERROR: invalid grep regex")
+
+
+def test_logs_digest_stops_at_the_deadline(tmp_path, monkeypatch):
+    kubectl = tmp_path / "kubectl"
+    kubectl.write_text(FAKE_KUBECTL.format(python=sys.executable, calls=str(tmp_path / "calls.txt")))
+    kubectl.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("KUBECONFIG", "/dev/null")
+    monkeypatch.setenv("TOOL_CACHE_ENABLED", "false")
+    monkeypatch.setenv("KUBECTL_LOGS_DEADLINE", "3")
+    monkeypatch.setenv("SLOW_POD", "web-3")
+
+    t0 = time.monotonic()
+    out = KubectlTool()._run(action="logs", selector="app=web", namespace="shop", output="digest")
+    assert time.monotonic() - t0 < 6
+    # web-3's lines (and its ERROR) still count; it is listed as cut off, not failed
+    assert out.splitlines()[0] == ("Logs: 12 pods, 13 containers | lines 60 | matched 60 | errors 5 | "
+                                   "warnings 0 | failed 1 | cut 1")
+    assert "Cut off:\n- shop/web-3/main: kubectl timed out after" in out
+    assert "- shop/web-3/main: errors 1 | warnings 0 | matched 5 of 5" in out
+
+
+def test_plain_logs_are_filtered(monkeypatch):
+    seen = {}
+
+    def fake_run(cmd, capture_output, text, timeout):
+        seen["cmd"] = cmd
+        return Proc(0, "INFO ok\nWARN slow upstream\nERROR timeout talking to db\nINFO ok\n", "")
+
+    import subprocess
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    monkeypatch.setenv("TOOL_CACHE_ENABLED", "false")
+
+    out = KubectlTool()._run(action="logs", name="web-0", namespace="shop", level="warn", since="1h", previous=True)
+    assert out == "WARN slow upstream\nERROR timeout talking to db"
+    assert seen["cmd"][-5:] == ["--since", "1h", "--previous", "-n", "shop"]
+    assert KubectlTool()._run(action="logs", name="web-0", grep="db$") == "ERROR timeout talking to db"
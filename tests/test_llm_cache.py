@@ -0,0 +1,68 @@
+import types
+
+import pytest
+from crewai import LLM, Task
+from crewai.tasks.task_output import TaskOutput
+
+from auto_k8s_pilot import llm_cache
+from auto_k8s_pilot.llm_cache import CachedLLM, MemoTask, agent_llm
+from auto_k8s_pilot.settings import reload_settings
+
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setenv("LLM_CACHE_FILE", str(tmp_path / "llm.sqlite"))
+    llm_cache.reset_llm_cache()
+    yield
+    llm_cache.reset_llm_cache()
+
+
+def test_identical_prompts_reuse_the_completion(monkeypatch):
+    calls = []
+
+    def fake_call(self, messages, *args, **kwargs):
+        calls.append(messages)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(LLM, "call", fake_call)
+    llm = CachedLLM(model="openai/gpt-4o-mini", temperature=0.0)
+    prompt = [{"role": "system", "content": "You are K8s Reporting Analyst"},
+              {"role": "user", "content": "Observation: 3 pods Running"}]
+
+    assert llm.call(prompt) == "answer 1"
+    assert llm.call(prompt) == "answer 1"
+    changed = prompt[:1] + [{"role": "user", "content": "Observation: 1 pod CrashLoopBackOff"}]
+    assert llm.call(changed) == "answer 2"
+    # survives a new process via the SQLite file
+    llm_cache.reset_llm_cache()
+    assert llm.call(prompt) == "answer 1"
+    assert len(calls) == 2
+
+
+def test_agent_llm_only_when_enabled(monkeypatch):
+    assert isinstance(agent_llm({"llm": "openai/gpt-4o-mini", "temperature": 0.2}), CachedLLM)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    reload_settings()
+    assert agent_llm({"llm": "openai/gpt-4o-mini"}) is None
+
+
+def test_summarizer_skipped_when_context_unchanged(monkeypatch, tmp_path):
+    runs = []
+
+    def fake_execute(self, agent=None, context=None, tools=None):
+        runs.append(context)
+        return TaskOutput(description=self.description, raw=f"summary of {context}", agent="a")
+
+    monkeypatch.setattr(Task, "execute_sync", fake_execute)
+    monkeypatch.chdir(tmp_path)  # crewAI treats output_file as relative to the working directory
+    out_file = tmp_path / "summary.md"
+    task = MemoTask(description="Explain pods", expected_output="text", output_file="summary.md")
+    agent = types.SimpleNamespace(role="K8s Reporting Analyst", goal="g", backstory="b", llm=None)
+
+    assert task.execute_sync(agent=agent, context="pods v1").raw == "summary of pods v1"
+    assert not out_file.exists()  # the stubbed execution wrote nothing
+    second = task.execute_sync(agent=agent, context="pods v1")
+    assert second.raw == "summary of pods v1" and out_file.read_text() == "summary of pods v1"
+    task.execute_sync(agent=agent, context="pods v2")
+    assert runs == ["pods v1", "pods v2"]
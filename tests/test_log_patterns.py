@@ -0,0 +1,50 @@
+from auto_k8s_pilot.tools.log_patterns import LogPatternMiner, mask
+
+
+def test_mask_variables():
+    assert mask("GET /api 200 in 35ms from 10.0.0.12:4431") == "GET /api <num> in <num> from <ip>"
+
+
+def test_groups_similar_lines_and_keeps_rare_ones():
+    m = LogPatternMiner()
+    for i in range(1000):
+        m.add(f"user u{i} failed login from host-{i % 7}", ts=i)
+    m.add("kernel: out of memory, killed process", ts=2000)
+    ts = m.templates()
+    assert [t.count for t in ts] == [1000, 1]
+    assert ts[0].text == "user <*> failed login from host-<num>"
+    assert (ts[0].first, ts[0].last) == (0, 999)
+    assert "out of memory" in m.render()
+
+
+def test_cluster_count_is_bounded():
+    m = LogPatternMiner(max_clusters=10)
+    for i in range(100):
+        m.add(" ".join(f"w{i}x{j}" for j in range(5)), ts=i)
+    assert len(m.templates()) == 10
+    assert m.other == 90
+    assert "90 lines in evicted rare templates" in m.render()
+
+
+def test_eviction_drops_the_least_recently_seen_rarest_cluster():
+    m = LogPatternMiner(max_clusters=3)
+    m.add("alpha one two", ts=1)
+    m.add("beta one two", ts=2)
+    m.add("alpha one two", ts=3)
+    m.add("gamma one two", ts=4)
+    m.add("delta one two", ts=5)  # full: beta (x1, seen first) goes
+    assert sorted(t.text for t in m.templates()) == ["alpha one two", "delta one two", "gamma one two"]
+    m.add("gamma one two", ts=6)
+    m.add("epsilon one two", ts=7)  # delta is the only single-line cluster left
+    assert sorted(t.text for t in m.templates()) == ["alpha one two", "epsilon one two", "gamma one two"]
+    assert m.other == 2
+
+
+def test_eviction_does_not_scan_every_cluster():
+    m = LogPatternMiner()
+    for i in range(50000):
+        lead = "".join(chr(97 + int(d)) for d in str(i))  # digit-free, so each line opens its own group
+        m.add(f"{lead} started worker", ts=i)
+    assert len(m.templates()) == 300
+    assert m.other == 50000 - 300
+    assert sum(len(b) for b in m._by_count.values()) == 300
@@ -0,0 +1,144 @@
+import json
+import time
+
+import websocket
+
+from auto_k8s_pilot.tools import loki_cursor
+from auto_k8s_pilot.tools.loki_cursor import Cursor
+from auto_k8s_pilot.tools.loki_tool import LokiQueryTool, narrow_query, parse_selector, shard_window, split_selector
+
+NS = int(1e9)
+
+
+def test_selector_helpers():
+    assert split_selector('{app="a}b", ns="x"} |= "ERROR"') == ('{app="a}b", ns="x"}', '|= "ERROR"')
+    assert narrow_query('{app="chat"} |= "ERROR"', {"app": "chat", "pod": "p-1"}) == '{app="chat", pod="p-1"} |= "ERROR"'
+    # regex and negative matchers do not pin the series; values are escaped
+    assert narrow_query('{app=~"chat.*", pod!="x"}', {"app": "chat-api", "pod": "p-1"}) == \
+        '{app=~"chat.*", pod!="x", app="chat-api", pod="p-1"}'
+    assert narrow_query('{app="a\\"b"}', {"app": 'a"b', "path": "C:\\tmp"}) == '{app="a\\"b", path="C:\\\\tmp"}'
+    assert parse_selector('{app = `x"y`, ns!~"kube-.*"}') == [("app", "=", 'x"y'), ("ns", "!~", "kube-.*")]
+    shards = shard_window(0, 150 * 60 * NS, 60 * 60 * NS)
+    assert [s for _, s in shards] == [3600, 3600, 1800]
+    assert sum(s for _, s in shards) == 150 * 60
+
+
+def test_count_mode_sums_shards_and_samples_top_streams(fake_server, monkeypatch):
+    monkeypatch.setenv("LOKI_URL", fake_server.url)
+    monkeypatch.setenv("LOKI_SHARD_MINUTES", "60")
+
+    def instant(query, body):
+        assert query["query"].startswith('sum by (pod) (count_over_time({app="chat"} |= "ERROR" [')
+        return 200, {"data": {"resultType": "vector", "result": [
+            {"metric": {"pod": "p-1"}, "value": [0, "1000"]},
+            {"metric": {"pod": "p-2"}, "value": [0, "7"]},
+        ]}}
+
+    def lines(query, body):
+        pod = "p-1" if 'pod="p-1"' in query["query"] else "p-2"
+        return 200, {"data": {"result": [{"stream": {"pod": pod}, "values": [["1", f"boom on {pod}"]]}]}}
+
+    fake_server.routes[("GET", "/loki/api/v1/query")] = instant
+    fake_server.routes[("GET", "/loki/api/v1/query_range")] = lines
+
+    out = LokiQueryTool()._run(query='{app="chat"} |= "ERROR"', minutes=24 * 60, mode="count", by="pod", top=1)
+
+    # 24 shards x (1000 + 7), far beyond any line limit
+    assert out.startswith("Matches: 24168 (exact, 1440m in 24 shard(s))")
+    assert '{pod="p-1"}: 24000' in out
+    assert "boom on p-1" in out and "boom on p-2" not in out
+    assert sum(1 for c in fake_server.calls if c[1] == "/loki/api/v1/query_range") == 1
+
+
+def test_lines_mode_flags_capped_count(fake_server, monkeypatch):
+    monkeypatch.setenv("LOKI_URL", fake_server.url)
+    fake_server.routes[("GET", "/loki/api/v1/query_range")] = {
+        "data": {"result": [{"stream": {"app": "chat"}, "values": [["1", "x"], ["2", "y"]]}]}
+    }
+    out = LokiQueryTool()._run(query='{app="chat"}', limit=2)
+    assert out.startswith("Matches: 2 (limit 2 reached")
+
+
+def test_patterns_mode_pages_and_groups(fake_server, monkeypatch):
+    import auto_k8s_pilot.tools.loki_tool as loki_tool
+
+    monkeypatch.setenv("LOKI_URL", fake_server.url)
+    monkeypatch.setattr(loki_tool, "PAGE_SIZE", 50)
+    base_ts = int(time.time()) * NS - 10 * 60 * NS  # inside the default 30m window
+    logs = [f"ERROR timeout calling payments after {100 + i}ms req={i:08x}" for i in range(120)]
+    logs.append("ERROR disk full on /var/lib/data")
+
+    def page(query, body):
+        start, limit = int(query["start"]), int(query["limit"])
+        vals = [[str(base_ts + i), m] for i, m in enumerate(logs) if base_ts + i >= start][:limit]
+        return 200, {"data": {"result": [{"stream": {"app": "chat"}, "values": vals}]}}
+
+    fake_server.routes[("GET", "/loki/api/v1/query_range")] = page
+
+    out = LokiQueryTool()._run(query='{app="chat"} |= "ERROR"', mode="patterns", limit=1000)
+    assert out.startswith("Scanned: 121 lines")
+    assert "x120" in out and "timeout calling payments" in out
+    assert "x1" in out and "disk full" in out  # the rare class is not drowned out
+    assert len(fake_server.calls) == 3
+
+
+
+def test_incremental_reads_only_new_entries(fake_server, monkeypatch, tmp_path):
+    monkeypatch.setenv("LOKI_URL", fake_server.url)
+    monkeypatch.setenv("LOKI_CURSOR_FILE", str(tmp_path / "cursors.json"))
+    t0 = int(time.time()) * NS - 10 * 60 * NS
+    logs = [(t0, "a"), (t0 + 1, "b"), (t0 + 1, "c")]
+
+    def query_range(query, body):
+        start = int(query["start"])
+        vals = [[str(ts), m] for ts, m in logs if ts >= start]
+        return 200, {"data": {"result": [{"stream": {"app": "chat"}, "values": vals}]}}
+
+    fake_server.routes[("GET", "/loki/api/v1/query_range")] = query_range
+    tool = LokiQueryTool()
+
+    assert tool._run(query='{app="chat"}', incremental=True).startswith("Matches: 3 (new since")
+    logs.append((t0 + 1, "d"))  # shares the boundary nanosecond with b and c
+    logs.append((t0 + 5, "e"))
+    out = tool._run(query='{app="chat"}', incremental=True)
+    assert out.startswith("Matches: 2 (new since")
+    assert ":: d" in out and ":: e" in out and ":: b" not in out
+    assert int(fake_server.calls[-1][2]["start"]) == t0 + 1
+    assert tool._run(query='{app="chat"}', incremental=True).startswith("Matches: 0")
+    # other queries keep their own cursor
+    assert tool._run(query='{app="chat"} |= "x"', incremental=True).startswith("Matches: 5")
+
+
+def test_tail_orders_frames_across_streams(monkeypatch, tmp_path):
+    monkeypatch.setenv("LOKI_URL", "http://loki.local")
+    monkeypatch.setenv("LOKI_CURSOR_FILE", str(tmp_path / "cursors.json"))
+    t0 = int(time.time()) * NS - 60 * NS
+    frames = [  # the api stream's frame arrives before an older entry of the worker stream
+        {"streams": [{"stream": {"app": "api"}, "values": [[str(t0 + 5), "late api"]]}]},
+        {"streams": [{"stream": {"app": "worker"}, "values": [[str(t0 + 2), "early worker"]]}]},
+    ]
+
+    class FakeSocket:
+        def settimeout(self, _):
+            pass
+
+        def recv(self):
+            if not frames:
+                raise websocket.WebSocketTimeoutException()
+            return json.dumps(frames.pop(0))
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(websocket, "create_connection", lambda url, timeout: FakeSocket())
+    out = LokiQueryTool()._run(query='{app=~".+"}', mode="tail", tail_seconds=1, incremental=True)
+    assert out.startswith("Matches: 2 (tailed 1s)")
+    assert ":: early worker" in out and ":: late api" in out
+
+
+def test_cursor_reports_boundary_overflow(monkeypatch):
+    monkeypatch.setattr(loki_cursor, "MAX_BOUNDARY_HASHES", 2)
+    cursor = Cursor(100)
+    assert all(cursor.admit({"app": "a"}, 100, f"line {i}") for i in range(3))
+    assert len(cursor.seen) == 2 and cursor.overflow == 1
+    assert not cursor.admit({"app": "a"}, 100, "line 0")
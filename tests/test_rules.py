@@ -0,0 +1,97 @@
+import pytest
+
+from auto_k8s_pilot.facts import parse_facts
+from auto_k8s_pilot.rules import Rule, RuleSet, load_rules, render_findings, summarize
+from auto_k8s_pilot.tools.argocd_tool import ArgoCDTool
+from auto_k8s_pilot.tools.k8s_digest import digest_items
+
+SICK_PODS = (
+    "Pods: 40 total | Running 36 | Pending 4\nAnomalies: 8 pods in 3 groups\n"
+    "- [CrashLoopBackOff] chat/deployment/chat-api: 4 pod(s), restarts max 90 on node-1; e.g. chat-api-a\n"
+    "- [Pending] batch/pod/job-x: 3 pod(s), restarts max 0; e.g. job-x\n"
+    "- [HighRestarts] obs/daemonset/vector: 1 pod(s), restarts max 7; e.g. vector-1"
+)
+FLEET = (
+    "Apps: 3 total | Synced 1 | OutOfSync 2\nHealth: Healthy 2 | Degraded 1\nNeeds attention: 2\n"
+    "NAME      PROJECT  SYNC       HEALTH    OPERATION  MESSAGE\n"
+    "billing   default  OutOfSync  Degraded  Failed     one or more objects failed to apply\n"
+    "chat-api  default  OutOfSync  Healthy   Succeeded  -"
+)
+LOKI = "Scanned: 900 lines\nLines: 900 | templates: 2\n- x880 [10:00 .. 10:30] GET <*> 500\n  e.g. GET /a 500\n" \
+       "- x20 [10:01 .. 10:02] panic: runtime error: <*>\n  e.g. panic: runtime error: nil map"
+
+
+def test_packaged_rules_find_typed_anomalies():
+    rules = load_rules()
+    pods = rules.evaluate("k8s_pods_overview", parse_facts(SICK_PODS))
+    assert [(f.rule, f.severity, f.subject) for f in pods] == [
+        ("pod-crashloop", "critical", "chat/deployment/chat-api"),
+        ("pod-pending", "warning", "batch/pod/job-x"),
+        ("pod-degraded", "info", "obs/daemonset/vector"),
+    ]
+    assert pods[0].message == "4 pod(s) in CrashLoopBackOff, restarts max 90"
+
+    fleet = rules.evaluate("argocd_list_apps", parse_facts(FLEET))
+    assert [(f.rule, f.subject) for f in fleet] == [("argo-fleet-degraded", "default/billing"),
+                                                    ("argo-fleet-out-of-sync", "default/chat-api")]
+    app = rules.evaluate("argocd_app_status_chat_api", parse_facts("App: chat-api\nSync: Synced\nHealth: Degraded"))
+    assert [f.rule for f in app] == ["argo-degraded"]
+
+    errors = rules.evaluate("loki_recent_errors_chat_api", parse_facts("Matches: 900 (exact)\n\n" + LOKI))
+    assert [f.rule for f in errors] == ["loki-error-burst", "loki-fatal-template"]
+    # the same volume on a non-error query is not an error burst
+    assert not rules.evaluate("loki_http_activity_chat_api", parse_facts("Matches: 900 (exact)"))
+
+    summary = summarize(pods + fleet)
+    assert (summary["total"], summary["critical"], summary["rules"]["pod-pending"]) == (5, 2, 1)
+    assert render_findings(pods).startswith("Findings: 3 | critical 1 | warning 1 | info 1\n- [critical] chat/")
+
+
+def test_rules_see_groups_the_text_had_no_room_for():
+    rules = load_rules()
+    pods = [{"metadata": {"name": f"svc{i}-0", "namespace": "web", "ownerReferences": [{"kind": "StatefulSet",
+                                                                                      "name": f"svc{i}"}]},
+             "status": {"phase": "Running", "containerStatuses": [
+                 {"ready": False, "restartCount": 9, "state": {"waiting": {"reason": "CrashLoopBackOff"}}}]}}
+            for i in range(120)]
+    out = digest_items("pods", pods)
+    assert " more groups" in out and out.count("- [CrashLoopBackOff]") < 120
+    found = rules.evaluate("k8s_pods_overview", parse_facts(out))
+    assert [f.rule for f in found] == ["pod-crashloop"] * 120
+
+    events = [{"metadata": {"namespace": "web"}, "type": "Warning", "reason": "FailedMount",
+               "involvedObject": {"kind": "Deployment", "name": f"svc{i}"}, "message": "volume not ready " * 8}
+              for i in range(120)]
+    out = digest_items("events", events)
+    assert " more groups" in out
+    assert len(rules.evaluate("k8s_events_recent", parse_facts(out))) == 120
+
+    rows = [[f"app-{i}", "default", "OutOfSync", "Degraded", "Failed", "sync failed " * 6] for i in range(120)]
+    out = ArgoCDTool._fleet_text(rows)
+    assert "more apps need attention" in out
+    fleet = rules.evaluate("argocd_list_apps", parse_facts(out))
+    assert [f.rule for f in fleet] == ["argo-fleet-degraded"] * 120
+
+
+def test_healthy_outputs_have_no_findings():
+    rules = load_rules()
+    for text in ("Pods: 12 total | Running 12\nAnomalies: 0 pods in 0 groups",
+                 "Apps: 3 total | Synced 3\nHealth: Healthy 3\nNeeds attention: 0",
+                 "App: chat-api\nSync: Synced\nHealth: Healthy",
+                 "Matches: 0 (exact)",
+                 "ERROR: Argo API failed (401)"):
+        assert rules.evaluate("loki_recent_errors_x", parse_facts(text)) == []
+
+
+def test_rules_are_validated_when_loaded():
+    with pytest.raises(ValueError, match="severity"):
+        Rule({"id": "x", "kind": "pods", "severity": "bad"})
+    with pytest.raises(ValueError, match="unknown keys"):
+        Rule({"id": "x", "kind": "pods", "wehn": "pods > 0"})
+    with pytest.raises(ValueError, match="invalid when"):
+        Rule({"id": "x", "kind": "pods", "when": "pods >"})
+    with pytest.raises(ValueError, match="invalid match"):
+        Rule({"id": "x", "kind": "loki", "match": {"template": "("}})
+    # an item without the field a rule reads does not fire
+    only = RuleSet([Rule({"id": "x", "kind": "pods", "each": "groups", "when": "restarts > 5"})])
+    assert only.evaluate("s", {"kind": "pods", "groups": [{"reason": "Pending"}]}) == []
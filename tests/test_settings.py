@@ -0,0 +1,32 @@
+from auto_k8s_pilot import settings as settings_mod
+from auto_k8s_pilot.settings import get_settings, reload_if_changed, reload_settings
+from auto_k8s_pilot.tools.kubectl_tool import KubectlInput
+
+
+def test_settings_are_cached_until_reload(monkeypatch):
+    first = get_settings()
+    monkeypatch.setenv("LOKI_URL", "http://other:3100")
+    assert get_settings() is first and first.LOKI_URL == "http://loki:3100"
+    reload_settings()
+    assert get_settings().LOKI_URL == "http://other:3100"
+    assert settings_mod.SETTINGS is get_settings()
+
+
+def test_per_tool_overrides(monkeypatch):
+    monkeypatch.setenv("TOOL_OVERRIDES", '{"loki_query": {"LOKI_URL": "http://loki-read:3100", "LOKI_MAX_PARALLEL": "8"}}')
+    scoped = get_settings("loki_query")
+    assert scoped.LOKI_URL == "http://loki-read:3100" and scoped.LOKI_MAX_PARALLEL == 8
+    assert get_settings("loki_query") is scoped
+    assert get_settings("kubectl_tool") is get_settings()
+    assert get_settings().LOKI_URL == "http://loki:3100"
+
+
+def test_reload_when_env_file_changes(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DEFAULT_NAMESPACE", raising=False)
+    assert get_settings().DEFAULT_NAMESPACE == "default"
+    assert reload_if_changed() is False
+    (tmp_path / ".env").write_text("DEFAULT_NAMESPACE=apps\n")
+    assert reload_if_changed() is True
+    assert get_settings().DEFAULT_NAMESPACE == "apps"
+    assert KubectlInput(action="get", kind="pods").namespace == "apps"
@@ -0,0 +1,84 @@
+import json
+
+from crewai import Agent, Task
+from crewai.events import (
+    LLMCallCompletedEvent, LLMCallStartedEvent, TaskCompletedEvent, TaskStartedEvent,
+    crewai_event_bus,
+)
+from crewai.events.types.llm_events import LLMCallType
+from crewai.tasks.task_output import TaskOutput
+
+from auto_k8s_pilot.telemetry import (
+    DURATION_BUCKETS, HTTP_REQUESTS, KUBECTL_SECONDS, TOOL_SECONDS, TOOL_TRUNCATIONS, recording, render_metrics,
+)
+from auto_k8s_pilot.tools.openrouter_health_tool import OpenRouterHealthTool
+
+
+def test_tool_and_http_calls_are_measured_and_traced(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENROUTER_BASE_URL", fake_server.url)
+    monkeypatch.setenv("TELEMETRY_DIR", str(tmp_path))
+    monkeypatch.setenv("TELEMETRY_TRACES_FILE", str(tmp_path / "traces.jsonl"))
+    monkeypatch.delenv("OTEL_SDK_DISABLED", raising=False)
+    fake_server.routes[("GET", "/models")] = {"data": [{"id": f"model-{i}"} for i in range(3)]}
+    tool = OpenRouterHealthTool()
+
+    with recording("unit") as run:
+        assert tool._run(op="models").startswith("Models:3")
+        assert tool._run(op="nope").startswith("ERROR")
+
+    assert TOOL_SECONDS.value(tool="openrouter_health_tool", status="ok")["count"] == 1
+    assert TOOL_SECONDS.value(tool="openrouter_health_tool", status="error")["count"] == 1
+    assert HTTP_REQUESTS.value(client="openrouter", code="200") == 1
+    assert [t.ok for t in run.of("tool")] == [True, False]
+
+    summary = (tmp_path / "timings_unit.md").read_text()
+    assert "| openrouter_health_tool | 2 |" in summary
+    assert 'autok8s_http_requests_total{client="openrouter",code="200"} 1' in (tmp_path / "metrics.prom").read_text()
+
+    spans = {s["name"]: s for s in map(json.loads, (tmp_path / "traces.jsonl").read_text().splitlines())}
+    run_span, http_span = spans["run unit"], spans["HTTP GET"]
+    assert spans["tool openrouter_health_tool"]["parent_id"] == run_span["context"]["span_id"]
+    assert http_span["context"]["trace_id"] == run_span["context"]["trace_id"]
+    assert http_span["attributes"]["http.status_code"] == 200
+
+
+def test_tasks_rank_by_wall_time_with_llm_tokens(tmp_path, monkeypatch):
+    monkeypatch.setenv("TELEMETRY_DIR", str(tmp_path))
+    agent = Agent(role="k8s operator", goal="report", backstory="ops", llm="gpt-4o-mini")
+    with recording("crew") as run:
+        for name, tokens in (("k8s_top_nodes", (120, 30)), ("explain_pods", (900, 400))):
+            task = Task(name=name, description=name, expected_output="text", agent=agent)
+            crewai_event_bus.emit(task, TaskStartedEvent(context=None, task=task))
+            crewai_event_bus.emit(None, LLMCallStartedEvent(
+                model="gpt-test", messages="hi", task_name=name, from_agent=agent,
+            ))
+            agent._token_process.sum_prompt_tokens(tokens[0])
+            agent._token_process.sum_completion_tokens(tokens[1])
+            crewai_event_bus.emit(None, LLMCallCompletedEvent(
+                model="gpt-test", messages="hi", response="ok", call_type=LLMCallType.LLM_CALL, task_name=name,
+                from_agent=agent,
+            ))
+            output = TaskOutput(description=name, agent=agent.role, raw="ok")
+            crewai_event_bus.emit(task, TaskCompletedEvent(output=output, task=task))
+
+    tasks = {t.name: t for t in run.of("task")}
+    assert (tasks["explain_pods"].prompt_tokens, tasks["explain_pods"].completion_tokens) == (900, 400)
+    assert [t.task for t in run.of("llm")] == ["k8s_top_nodes", "explain_pods"]
+    summary = (tmp_path / "timings_crew.md").read_text()
+    assert "2 tasks, 0 tool calls, 2 LLM calls (1020 prompt / 430 completion tokens)" in summary
+    assert "| gpt-test | 2 |" in summary
+
+
+def test_prometheus_text_format():
+    for v in (0.001, 0.2, 500):
+        KUBECTL_SECONDS.observe(v, action='get "x"', backend="api")
+    lines = KUBECTL_SECONDS.samples()
+    labels = 'action="get \\"x\\"",backend="api"'
+    assert lines[0] == f'autok8s_kubectl_duration_seconds_bucket{{{labels},le="0.005"}} 1'
+    assert lines[len(DURATION_BUCKETS) - 1] == f'autok8s_kubectl_duration_seconds_bucket{{{labels},le="300"}} 2'
+    assert lines[len(DURATION_BUCKETS)] == f'autok8s_kubectl_duration_seconds_bucket{{{labels},le="+Inf"}} 3'
+    assert lines[-1] == f'autok8s_kubectl_duration_seconds_count{{{labels}}} 3'
+
+    TOOL_TRUNCATIONS.inc(tool="kubectl_tool")
+    text = render_metrics()
+    assert '# TYPE autok8s_tool_truncations_total counter\nautok8s_tool_truncations_total{tool="kubectl_tool"} 1' in text
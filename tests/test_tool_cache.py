@@ -0,0 +1,90 @@
+import pytest
+
+from auto_k8s_pilot.facts import Reported
+from auto_k8s_pilot.tools import tool_cache
+from auto_k8s_pilot.tools.argocd_tool import ArgoCDTool
+from auto_k8s_pilot.tools.tool_cache import ToolResultCache, cached_result, get_tool_cache
+
+
+@pytest.fixture(autouse=True)
+def _ttl(monkeypatch):
+    monkeypatch.setenv("TOOL_CACHE_TTLS", '{"fake_tool": 60}')
+
+
+class _Tool:
+    name = "fake_tool"
+
+    def __init__(self):
+        self.calls = 0
+
+    @cached_result(mutating=lambda a: a["op"] == "write")
+    def _run(self, op: str, arg: str = "x") -> str:
+        self.calls += 1
+        return "ERROR: nope" if op == "fail" else f"{op}:{arg}:{self.calls}"
+
+
+def test_hits_normalize_defaults_and_whitespace():
+    t = _Tool()
+    assert t._run("read") == "read:x:1"
+    assert t._run(op="read", arg=" x ") == "read:x:1"
+    assert t._run("read", "y") == "read:y:2"
+    assert get_tool_cache().stats()["fake_tool"] == {"hits": 1, "misses": 2, "bypasses": 0, "invalidations": 0}
+
+
+def test_mutation_bypasses_and_invalidates():
+    t = _Tool()
+    t._run("read")
+    assert t._run("write") == "write:x:2"
+    assert t._run("read") == "read:x:3"
+    stats = get_tool_cache().stats()["fake_tool"]
+    assert stats["bypasses"] == 1 and stats["invalidations"] == 1
+
+
+def test_errors_are_not_cached(monkeypatch):
+    t = _Tool()
+    t._run("fail")
+    t._run("fail")
+    assert t.calls == 2
+
+
+def test_ttl_expiry_and_lru_bound(monkeypatch):
+    c = ToolResultCache(max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(tool_cache.time, "time", lambda: now[0])
+    c.put("t", "a", "A", ttl=10)
+    c.put("t", "b", "B", ttl=10)
+    assert c.get("t", "a") == "A"
+    c.put("t", "c", "C", ttl=10)  # evicts b, the least recently used
+    assert c.get("t", "b") is None and c.get("t", "a") == "A"
+    now[0] += 11
+    assert c.get("t", "a") is None
+
+
+def test_disk_backend_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ToolResultCache(disk_path=path).put("t", "k", "V", ttl=60)
+    other = ToolResultCache(disk_path=path)
+    assert other.get("t", "k") == "V"
+    other.invalidate("t")
+    assert ToolResultCache(disk_path=path).get("t", "k") is None
+
+    # the complete facts of a budgeted result survive the round trip
+    ToolResultCache(disk_path=path).put("t", "k", Reported("Pods: 1 total", {"groups": [{"pods": 1}]}), ttl=60)
+    hit = ToolResultCache(disk_path=path).get("t", "k")
+    assert hit == "Pods: 1 total" and hit.facts == {"groups": [{"pods": 1}]}
+
+
+def test_argocd_reads_are_cached_until_sync(fake_server, monkeypatch):
+    monkeypatch.setenv("ARGOCD_BASE_URL", fake_server.url)
+    monkeypatch.setenv("ARGOCD_API_TOKEN", "xxx")
+    monkeypatch.setenv("ALLOW_MUTATING", "true")
+    fake_server.routes[("GET", "/api/v1/applications/chat-api")] = {"status": {"sync": {"status": "Synced"}}}
+    fake_server.routes[("POST", "/api/v1/applications/chat-api/sync")] = {}
+    tool = ArgoCDTool()
+
+    tool._run(op="app_status", app="chat-api")
+    tool._run(op="app_status", app="chat-api")
+    assert len(fake_server.calls) == 1
+    tool._run(op="app_sync", app="chat-api")
+    tool._run(op="app_status", app="chat-api")
+    assert len(fake_server.calls) == 3